@@ -0,0 +1,43 @@
+# Latencia de agendar_turno según la cantidad de turnos ya almacenados.
+# Uso: python -m benchmarks.bench_agendar_turno [tamaño ...]
+import sys
+import time
+from datetime import datetime, timedelta
+
+from src.clinica import Clinica, Paciente, Medico, Especialidad
+
+MEDICOS = 100
+PACIENTES = 1000
+MUESTRAS = 1000
+TAMANIOS = [1_000, 10_000, 100_000, 1_000_000]
+
+def preparar_clinica():
+    clinica = Clinica()
+    especialidad = Especialidad("Clínica Médica", ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"])
+    for i in range(PACIENTES):
+        clinica.agregar_paciente(Paciente(str(10_000_000 + i), f"Paciente {i}", "01/01/1980"))
+    for i in range(MEDICOS):
+        clinica.agregar_medico(Medico(str(i), f"Dr. {i}", [especialidad]))
+    return clinica, especialidad
+
+def agendar(clinica, especialidad, base, desde, hasta):
+    # Cada médico recibe un turno cada 30 minutos; los pacientes rotan sin superponerse
+    for i in range(desde, hasta):
+        fecha = base + timedelta(minutes=30 * (i // MEDICOS))
+        clinica.agendar_turno(fecha, str(10_000_000 + i % PACIENTES), str(i % MEDICOS), especialidad)
+
+def main(tamanios):
+    clinica, especialidad = preparar_clinica()
+    base = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    cargados = 0
+    print(f"{'turnos':>10} {'µs/turno':>10}")
+    for tamanio in tamanios:
+        agendar(clinica, especialidad, base, cargados, tamanio)
+        inicio = time.perf_counter()
+        agendar(clinica, especialidad, base, tamanio, tamanio + MUESTRAS)
+        transcurrido = time.perf_counter() - inicio
+        cargados = tamanio + MUESTRAS
+        print(f"{tamanio:>10} {transcurrido / MUESTRAS * 1e6:>10.2f}")
+
+if __name__ == "__main__":
+    main([int(t) for t in sys.argv[1:]] or TAMANIOS)
@@ -0,0 +1,74 @@
+# Reportes de analítica: bucles sobre objetos Turno/Paciente contra src.analitica (NumPy).
+# Uso: python -m benchmarks.bench_analitica [cantidad_de_turnos ...]
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from src.analitica import AnaliticaClinica
+from src.clinica import AlmacenTurnosColumnar, Clinica, Paciente, Medico, Especialidad
+
+MEDICOS = 100
+PACIENTES = 100_000
+TAMANIOS = [100_000, 1_000_000]
+
+def preparar(turnos):
+    clinica = Clinica(almacen_turnos=AlmacenTurnosColumnar())
+    especialidad = Especialidad("Clínica Médica", ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"])
+    clinica.agregar_especialidad(especialidad)
+    for i in range(PACIENTES):
+        clinica.agregar_paciente(Paciente(str(10_000_000 + i), f"Paciente {i}", f"{i % 28 + 1:02d}/{i % 12 + 1:02d}/{1930 + i % 90}"))
+    for i in range(MEDICOS):
+        clinica.agregar_medico(Medico(str(i), f"Dr. {i}", [especialidad]))
+    base = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    lote = [(base + timedelta(minutes=30 * (i // MEDICOS)), str(10_000_000 + i % PACIENTES), str(i % MEDICOS), especialidad)
+            for i in range(turnos)]
+    clinica.agendar_turnos_lote(lote, todo_o_nada=False)
+    return clinica, base, base + timedelta(days=30)
+
+def reportes_en_bucle(clinica, desde, hasta, hoy):
+    mapa = [[0] * 24 for _ in range(7)]
+    minutos = {}
+    totales, marcados = {}, {}
+    for turno in clinica.iter_turnos():
+        fecha_hora = turno.__fecha_hora__
+        matricula = turno.__medico__.__matricula__
+        mapa[fecha_hora.weekday()][fecha_hora.hour] += 1
+        if desde <= fecha_hora < hasta:
+            minutos[matricula] = minutos.get(matricula, 0) + turno.__duracion__
+        totales[matricula] = totales.get(matricula, 0) + 1
+        marcados[matricula] = marcados.get(matricula, 0) + (fecha_hora.minute == 0)
+    capacidad = (hasta - desde).days * (Clinica.HORA_CIERRE - Clinica.HORA_APERTURA) * 60
+    utilizacion = {matricula: minutos.get(matricula, 0) / capacidad for matricula in clinica.__medicos__}
+    tasas = {matricula: marcados[matricula] / totales[matricula] for matricula in totales}
+    bordes = AnaliticaClinica.BORDES_EDADES
+    edades = [0] * (len(bordes) - 1)
+    for paciente in clinica.__pacientes__.values():
+        edad = paciente.calcular_edad(hoy)
+        for posicion in range(len(edades)):
+            if bordes[posicion] <= edad < bordes[posicion + 1]:
+                edades[posicion] += 1
+                break
+    return mapa, utilizacion, tasas, edades
+
+def reportes_vectorizados(clinica, desde, hasta, hoy):
+    analitica = AnaliticaClinica(clinica)
+    # Misma marca que el bucle: turnos que empiezan en punto
+    marcas = analitica.__inicios__ % 60 == 0
+    return (analitica.mapa_calor(), analitica.utilizacion_medicos(desde, hasta),
+            analitica.tasas_por_medico(marcas), analitica.distribucion_edades(fecha=hoy))
+
+def main(tamanios):
+    print(f"{'turnos':>10} {'bucles s':>10} {'numpy s':>10}")
+    hoy = date.today()
+    for tamanio in tamanios:
+        clinica, desde, hasta = preparar(tamanio)
+        inicio = time.perf_counter()
+        reportes_en_bucle(clinica, desde, hasta, hoy)
+        bucles = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        reportes_vectorizados(clinica, desde, hasta, hoy)
+        vectorizado = time.perf_counter() - inicio
+        print(f"{tamanio:>10} {bucles:>10.3f} {vectorizado:>10.3f}")
+
+if __name__ == "__main__":
+    main([int(t) for t in sys.argv[1:]] or TAMANIOS)
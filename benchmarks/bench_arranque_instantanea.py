@@ -0,0 +1,57 @@
+# Tiempo de arranque: snapshot pickle del diario contra instantánea binaria mapeada en memoria.
+# Uso: python -m benchmarks.bench_arranque_instantanea [cantidad_de_turnos ...]
+import os
+import pickle
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from src.clinica import Clinica, Paciente, Medico, Especialidad
+from src.instantanea import escribir_instantanea, InstantaneaBinaria
+
+MEDICOS = 100
+PACIENTES = 1000
+TAMANIOS = [10_000, 100_000, 1_000_000]
+
+def preparar(turnos):
+    clinica = Clinica()
+    especialidad = Especialidad("Clínica Médica", ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"])
+    clinica.agregar_especialidad(especialidad)
+    for i in range(PACIENTES):
+        clinica.agregar_paciente(Paciente(str(10_000_000 + i), f"Paciente {i}", "01/01/1980"))
+    for i in range(MEDICOS):
+        clinica.agregar_medico(Medico(str(i), f"Dr. {i}", [especialidad]))
+    base = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    for i in range(turnos):
+        fecha = base + timedelta(minutes=30 * (i // MEDICOS))
+        clinica.agendar_turno(fecha, str(10_000_000 + i % PACIENTES), str(i % MEDICOS), especialidad)
+    return clinica
+
+def main(tamanios):
+    print(f"{'turnos':>10} {'pickle s':>10} {'mmap s':>10} {'1ª consulta ms':>15}")
+    for tamanio in tamanios:
+        clinica = preparar(tamanio)
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta_pickle = os.path.join(directorio, "clinica.pickle")
+            ruta_binaria = os.path.join(directorio, "clinica.bin")
+            with open(ruta_pickle, "wb") as archivo:
+                pickle.dump(clinica, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            escribir_instantanea(clinica, ruta_binaria)
+
+            inicio = time.perf_counter()
+            with open(ruta_pickle, "rb") as archivo:
+                pickle.load(archivo)
+            tiempo_pickle = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            restaurada = Clinica(almacenamiento=InstantaneaBinaria(ruta_binaria))
+            tiempo_mmap = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            restaurada.obtener_turnos_medico("0")
+            primera_consulta = time.perf_counter() - inicio
+            restaurada.cerrar()
+        print(f"{tamanio:>10} {tiempo_pickle:>10.3f} {tiempo_mmap:>10.3f} {primera_consulta * 1000:>15.2f}")
+
+if __name__ == "__main__":
+    main([int(t) for t in sys.argv[1:]] or TAMANIOS)
@@ -0,0 +1,61 @@
+# Recetas por segundo de emitir_recetas_lote frente a un bucle de emitir_receta, en memoria
+# y con almacenamiento SQLite (donde el lote escribe en una sola transacción).
+# Uso: python -m benchmarks.bench_emitir_recetas_lote [cantidad_de_recetas ...]
+import os
+import sys
+import tempfile
+import time
+
+from src.almacenamiento import AlmacenamientoSQLite
+from src.clinica import Clinica, Paciente, Medico, Especialidad
+
+MEDICOS = 100
+PACIENTES = 10_000
+TAMANIOS = [10_000, 100_000]
+MEDICAMENTOS = ["Ibuprofeno", "Omeprazol", "Amoxicilina", "Paracetamol", "Enalapril", "Metformina"]
+
+def preparar(almacenamiento=None):
+    clinica = Clinica(almacenamiento=almacenamiento)
+    especialidad = Especialidad("Clínica Médica", ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"])
+    clinica.agregar_especialidad(especialidad)
+    for i in range(MEDICOS):
+        clinica.agregar_medico(Medico(str(i), f"Dr. {i}", [especialidad]))
+    for i in range(PACIENTES):
+        clinica.agregar_paciente(Paciente(str(10_000_000 + i), f"Paciente {i}", "01/01/1980"))
+    # Con reglas cargadas cada receta recorre las recientes del paciente
+    clinica.agregar_interaccion("Enalapril", "Ibuprofeno")
+    return clinica
+
+def generar(cantidad):
+    return [(str(10_000_000 + i % PACIENTES), str(i % MEDICOS), [MEDICAMENTOS[i % 4], MEDICAMENTOS[4 + i % 2]])
+            for i in range(cantidad)]
+
+def en_bucle(clinica, recetas):
+    for receta in recetas:
+        try:
+            clinica.emitir_receta(*receta)
+        except Exception:
+            pass
+
+def en_lote(clinica, recetas):
+    clinica.emitir_recetas_lote(recetas, todo_o_nada=False)
+
+def medir(funcion, recetas, directorio=None):
+    almacenamiento = AlmacenamientoSQLite(os.path.join(directorio, f"{funcion.__name__}.db")) if directorio else None
+    clinica = preparar(almacenamiento)
+    inicio = time.perf_counter()
+    funcion(clinica, recetas)
+    tiempo = time.perf_counter() - inicio
+    clinica.cerrar()
+    return len(recetas) / tiempo
+
+def main(tamanios):
+    print(f"{'recetas':>10} {'bucle/s':>10} {'lote/s':>10} {'bucle sqlite/s':>15} {'lote sqlite/s':>14}")
+    for tamanio in tamanios:
+        recetas = generar(tamanio)
+        with tempfile.TemporaryDirectory() as directorio:
+            print(f"{tamanio:>10} {medir(en_bucle, recetas):>10.0f} {medir(en_lote, recetas):>10.0f}"
+                  f" {medir(en_bucle, recetas, directorio):>15.0f} {medir(en_lote, recetas, directorio):>14.0f}")
+
+if __name__ == "__main__":
+    main([int(t) for t in sys.argv[1:]] or TAMANIOS)
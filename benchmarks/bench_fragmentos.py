@@ -0,0 +1,68 @@
+# Turnos y recetas por segundo de una Clinica contra ClinicaFragmentada con N procesos.
+# Uso: python -m benchmarks.bench_fragmentos [cantidad_de_fragmentos ...]
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from src.clinica import Clinica, Paciente, Medico, Especialidad
+from src.fragmentos import ClinicaFragmentada
+
+MEDICOS = 100
+PACIENTES = 10_000
+TURNOS = 50_000
+RECETAS = 50_000
+BLOQUE = 2_000
+
+def cargar(clinica, especialidad):
+    clinica.agregar_especialidad(especialidad)
+    for i in range(MEDICOS):
+        clinica.agregar_medico(Medico(str(i), f"Dr. {i}", [especialidad]))
+    pacientes = [Paciente(str(10_000_000 + i), f"Paciente {i}", "01/01/1980") for i in range(PACIENTES)]
+    if isinstance(clinica, ClinicaFragmentada):
+        clinica.agregar_pacientes(pacientes)
+    else:
+        for paciente in pacientes:
+            clinica.agregar_paciente(paciente)
+
+def medir(clinica, especialidad):
+    base = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    turnos = [(base + timedelta(minutes=30 * (i // MEDICOS)), str(10_000_000 + i % PACIENTES), str(i % MEDICOS), especialidad)
+              for i in range(TURNOS)]
+    recetas = [(str(10_000_000 + i % PACIENTES), str(i % MEDICOS), ["Ibuprofeno", "Omeprazol"]) for i in range(RECETAS)]
+
+    inicio = time.perf_counter()
+    for desde in range(0, TURNOS, BLOQUE):
+        if isinstance(clinica, ClinicaFragmentada):
+            clinica.agendar_turnos_lote(turnos[desde:desde + BLOQUE])
+        else:
+            clinica.agendar_turnos_lote(turnos[desde:desde + BLOQUE], todo_o_nada=False)
+    tiempo_turnos = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for desde in range(0, RECETAS, BLOQUE):
+        if isinstance(clinica, ClinicaFragmentada):
+            clinica.emitir_recetas(recetas[desde:desde + BLOQUE])
+        else:
+            for receta in recetas[desde:desde + BLOQUE]:
+                clinica.emitir_receta(*receta)
+    tiempo_recetas = time.perf_counter() - inicio
+    return TURNOS / tiempo_turnos, RECETAS / tiempo_recetas
+
+def main(fragmentos):
+    print(f"(núcleos disponibles: {os.cpu_count()})")
+    print(f"{'fragmentos':>10} {'turnos/s':>10} {'recetas/s':>10}")
+    especialidad = Especialidad("Clínica Médica", ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"])
+    clinica = Clinica()
+    cargar(clinica, especialidad)
+    turnos, recetas = medir(clinica, especialidad)
+    print(f"{'sin':>10} {turnos:>10.0f} {recetas:>10.0f}")
+    for cantidad in fragmentos:
+        clinica = ClinicaFragmentada(cantidad)
+        cargar(clinica, especialidad)
+        turnos, recetas = medir(clinica, especialidad)
+        clinica.cerrar()
+        print(f"{cantidad:>10} {turnos:>10.0f} {recetas:>10.0f}")
+
+if __name__ == "__main__":
+    main([int(f) for f in sys.argv[1:]] or [1, 2, 4, 8])
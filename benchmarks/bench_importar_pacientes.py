@@ -0,0 +1,41 @@
+# Filas por segundo de importar_pacientes frente a un bucle de agregar_paciente.
+# Uso: python -m benchmarks.bench_importar_pacientes [cantidad_de_filas ...]
+import csv
+import os
+import sys
+import tempfile
+import time
+
+from src.clinica import Clinica, Paciente
+
+TAMANIOS = [10_000, 100_000, 1_000_000]
+
+def generar_csv(ruta, filas):
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(["dni", "nombre", "fecha_nacimiento"])
+        for i in range(filas):
+            escritor.writerow([str(10_000_000 + i), f"Paciente {i}", f"{i % 28 + 1:02d}/{i % 12 + 1:02d}/{1940 + i % 80}"])
+
+def importar_en_bucle(ruta):
+    clinica = Clinica()
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        for fila in csv.DictReader(archivo):
+            clinica.agregar_paciente(Paciente(fila["dni"], fila["nombre"], fila["fecha_nacimiento"]))
+
+def main(tamanios):
+    print(f"{'filas':>10} {'bucle filas/s':>15} {'importar filas/s':>17}")
+    for tamanio in tamanios:
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "pacientes.csv")
+            generar_csv(ruta, tamanio)
+            inicio = time.perf_counter()
+            importar_en_bucle(ruta)
+            bucle = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            Clinica().importar_pacientes(ruta)
+            importacion = time.perf_counter() - inicio
+        print(f"{tamanio:>10} {tamanio / bucle:>15.0f} {tamanio / importacion:>17.0f}")
+
+if __name__ == "__main__":
+    main([int(t) for t in sys.argv[1:]] or TAMANIOS)
@@ -0,0 +1,52 @@
+# Bytes por entidad (medidos con tracemalloc) con __slots__ frente a la disposición
+# anterior basada en __dict__. Sólo se mide el objeto: los valores referenciados
+# (strings, fechas, listas) se comparten entre todas las copias.
+# Uso: python -m benchmarks.bench_memoria_entidades [cantidad ...]
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+from src.clinica import Paciente, Medico, Turno, Receta, Especialidad
+
+CANTIDADES = [100_000, 1_000_000]
+
+def plantillas():
+    especialidad = Especialidad("Clínica Médica", ["lunes", "martes", "miércoles", "jueves", "viernes"])
+    paciente = Paciente("12345678", "Juan Pérez", "01/01/1980")
+    medico = Medico("100", "Dr. Sosa", [especialidad])
+    fecha = datetime.now() + timedelta(days=1)
+    while not especialidad.atiende_dia_semana(fecha.weekday()):
+        fecha += timedelta(days=1)
+    turno = Turno(paciente, medico, fecha, especialidad)
+    receta = Receta(paciente, medico, ["Paracetamol", "Ibuprofeno"])
+    return [paciente, medico, especialidad, turno, receta]
+
+def medir(clase, plantilla, cantidad):
+    # __weakref__ no es un atributo de datos (Turno lo declara para AlmacenTurnosColumnar)
+    atributos = [(nombre, getattr(plantilla, nombre)) for nombre in type(plantilla).__slots__ if nombre != "__weakref__"]
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    objetos = []
+    for _ in range(cantidad):
+        objeto = object.__new__(clase)
+        for nombre, valor in atributos:
+            setattr(objeto, nombre, valor)
+        objetos.append(objeto)
+    despues = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Se descuenta la lista que mantiene vivos a los objetos
+    return (despues - antes - sys.getsizeof(objetos)) / cantidad
+
+def main(cantidades):
+    print(f"{'entidad':>14} {'cantidad':>10} {'con __dict__':>13} {'con __slots__':>14}")
+    for plantilla in plantillas():
+        clase = type(plantilla)
+        # Misma clase sin __slots__: equivale a la representación anterior
+        clase_con_dict = type(clase.__name__ + "ConDict", (), {})
+        for cantidad in cantidades:
+            con_dict = medir(clase_con_dict, plantilla, cantidad)
+            con_slots = medir(clase, plantilla, cantidad)
+            print(f"{clase.__name__:>14} {cantidad:>10} {con_dict:>11.1f} B {con_slots:>12.1f} B")
+
+if __name__ == "__main__":
+    main([int(c) for c in sys.argv[1:]] or CANTIDADES)
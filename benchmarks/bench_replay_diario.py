@@ -0,0 +1,43 @@
+# Velocidad de repetición del diario de eventos al arrancar (eventos por segundo).
+# Uso: python -m benchmarks.bench_replay_diario [cantidad_de_turnos ...]
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from src.clinica import Clinica, Paciente, Medico, Especialidad
+from src.diario import DiarioEventos
+
+MEDICOS = 100
+PACIENTES = 1000
+TAMANIOS = [10_000, 100_000, 1_000_000]
+
+def generar(directorio, turnos):
+    # Sin snapshots intermedios para medir la repetición completa del diario
+    clinica = Clinica.restaurar(DiarioEventos(directorio, eventos_por_sync=1024, eventos_por_snapshot=10 ** 9))
+    especialidad = Especialidad("Clínica Médica", ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"])
+    clinica.agregar_especialidad(especialidad)
+    for i in range(PACIENTES):
+        clinica.agregar_paciente(Paciente(str(10_000_000 + i), f"Paciente {i}", "01/01/1980"))
+    for i in range(MEDICOS):
+        clinica.agregar_medico(Medico(str(i), f"Dr. {i}", [especialidad]))
+    base = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    for i in range(turnos):
+        fecha = base + timedelta(minutes=30 * (i // MEDICOS))
+        clinica.agendar_turno(fecha, str(10_000_000 + i % PACIENTES), str(i % MEDICOS), especialidad)
+    clinica.cerrar()
+    return 1 + PACIENTES + MEDICOS + turnos
+
+def main(tamanios):
+    print(f"{'eventos':>10} {'segundos':>10} {'eventos/s':>12}")
+    for tamanio in tamanios:
+        with tempfile.TemporaryDirectory() as directorio:
+            eventos = generar(directorio, tamanio)
+            inicio = time.perf_counter()
+            clinica = Clinica.restaurar(DiarioEventos(directorio))
+            transcurrido = time.perf_counter() - inicio
+            clinica.cerrar()
+        print(f"{eventos:>10} {transcurrido:>10.2f} {eventos / transcurrido:>12.0f}")
+
+if __name__ == "__main__":
+    main([int(t) for t in sys.argv[1:]] or TAMANIOS)
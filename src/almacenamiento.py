@@ -0,0 +1,219 @@
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+class Almacenamiento(ABC):
+    #Interfaz de los backends persistentes de Clinica. Los métodos guardar_* reciben las
+    #entidades del modelo y se llaman en cada modificación (escritura inmediata); los
+    #métodos cargar_* devuelven tuplas simples que la clínica convierte en entidades.
+
+    @abstractmethod
+    def guardar_paciente(self, paciente):
+        pass
+
+    def guardar_pacientes(self, pacientes):
+        for paciente in pacientes:
+            self.guardar_paciente(paciente)
+
+    @abstractmethod
+    def cargar_paciente(self, dni: str):
+        pass
+
+    @abstractmethod
+    def cargar_pacientes(self):
+        pass
+
+    @abstractmethod
+    def guardar_medico(self, medico):
+        pass
+
+    @abstractmethod
+    def cargar_medicos(self):
+        pass
+
+    @abstractmethod
+    def guardar_especialidad(self, especialidad):
+        pass
+
+    @abstractmethod
+    def cargar_especialidades(self):
+        pass
+
+    @abstractmethod
+    def guardar_turnos(self, registros):
+        pass
+
+    @abstractmethod
+    def cargar_turnos_medico(self, matricula: str):
+        pass
+
+    @abstractmethod
+    def cargar_turnos_paciente(self, dni: str):
+        pass
+
+    @abstractmethod
+    def iterar_turnos(self, desde: datetime = None, hasta: datetime = None, offset: int = 0, limit: int = None):
+        pass
+
+    @abstractmethod
+    def guardar_recetas(self, registros):
+        pass
+
+    @abstractmethod
+    def cargar_recetas_paciente(self, dni: str):
+        pass
+
+    @abstractmethod
+    def iterar_medicamentos_recetas(self):
+        # Lista de medicamentos de cada receta guardada, en una sola pasada
+        pass
+
+    def cerrar(self):
+        pass
+
+class AlmacenamientoSQLite(Almacenamiento):
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS pacientes (
+            dni TEXT PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            fecha_nacimiento TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS medicos (
+            matricula TEXT PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            especialidades TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS especialidades (
+            nombre TEXT PRIMARY KEY,
+            tipo TEXT NOT NULL,
+            dias TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS turnos (
+            id INTEGER PRIMARY KEY,
+            dni TEXT NOT NULL,
+            matricula TEXT NOT NULL,
+            fecha_hora TEXT NOT NULL,
+            duracion INTEGER NOT NULL,
+            especialidad TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS turnos_medico_fecha ON turnos (matricula, fecha_hora);
+        CREATE INDEX IF NOT EXISTS turnos_paciente_fecha ON turnos (dni, fecha_hora);
+        CREATE TABLE IF NOT EXISTS recetas (
+            id INTEGER PRIMARY KEY,
+            dni TEXT NOT NULL,
+            matricula TEXT NOT NULL,
+            fecha TEXT NOT NULL,
+            medicamentos TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS recetas_paciente ON recetas (dni, fecha);
+    """
+
+    def __init__(self, ruta: str):
+        self.__conexion__ = sqlite3.connect(ruta)
+        self.__conexion__.execute("PRAGMA journal_mode=WAL")
+        self.__conexion__.execute("PRAGMA synchronous=NORMAL")
+        self.__conexion__.executescript(self.ESQUEMA)
+
+    #Pacientes
+    def guardar_paciente(self, paciente):
+        with self.__conexion__:
+            self.__conexion__.execute(
+                "INSERT OR REPLACE INTO pacientes (dni, nombre, fecha_nacimiento) VALUES (?, ?, ?)",
+                (paciente.__dni__, paciente.__nombre__, paciente.__fecha_nacimiento__))
+
+    def guardar_pacientes(self, pacientes):
+        with self.__conexion__:
+            self.__conexion__.executemany(
+                "INSERT OR REPLACE INTO pacientes (dni, nombre, fecha_nacimiento) VALUES (?, ?, ?)",
+                [(paciente.__dni__, paciente.__nombre__, paciente.__fecha_nacimiento__) for paciente in pacientes])
+
+    def cargar_paciente(self, dni: str):
+        return self.__conexion__.execute(
+            "SELECT dni, nombre, fecha_nacimiento FROM pacientes WHERE dni = ?", (dni,)).fetchone()
+
+    def cargar_pacientes(self):
+        return self.__conexion__.execute("SELECT dni, nombre, fecha_nacimiento FROM pacientes ORDER BY rowid")
+
+    #Médicos y especialidades
+    def guardar_medico(self, medico):
+        especialidades = medico.__especialidades__ if isinstance(medico.__especialidades__, list) else [medico.__especialidades__]
+        # Las especialidades cargadas sólo por nombre se guardan sin días
+        filas = [[esp, None] if isinstance(esp, str) else [esp.__tipo__, list(esp.__dias__ or [])] for esp in especialidades]
+        with self.__conexion__:
+            self.__conexion__.execute(
+                "INSERT OR REPLACE INTO medicos (matricula, nombre, especialidades) VALUES (?, ?, ?)",
+                (medico.__matricula__, medico.__nombre__, json.dumps(filas)))
+
+    def cargar_medicos(self):
+        for matricula, nombre, especialidades in self.__conexion__.execute(
+                "SELECT matricula, nombre, especialidades FROM medicos ORDER BY rowid"):
+            yield matricula, nombre, json.loads(especialidades)
+
+    def guardar_especialidad(self, especialidad):
+        with self.__conexion__:
+            self.__conexion__.execute(
+                "INSERT OR REPLACE INTO especialidades (nombre, tipo, dias) VALUES (?, ?, ?)",
+                (especialidad.__tipo__.strip().lower(), especialidad.__tipo__, json.dumps(list(especialidad.__dias__ or []))))
+
+    def cargar_especialidades(self):
+        for tipo, dias in self.__conexion__.execute("SELECT tipo, dias FROM especialidades ORDER BY rowid"):
+            yield tipo, json.loads(dias)
+
+    #Turnos
+    def guardar_turnos(self, registros):
+        # registros: lista de (turno, dni, matricula)
+        with self.__conexion__:
+            self.__conexion__.executemany(
+                "INSERT INTO turnos (dni, matricula, fecha_hora, duracion, especialidad) VALUES (?, ?, ?, ?, ?)",
+                [(dni, matricula, turno.__fecha_hora__.isoformat(" "), turno.__duracion__, turno.__especialidad__.__tipo__)
+                 for turno, dni, matricula in registros])
+
+    def _filas_turnos(self, cursor):
+        for dni, matricula, fecha_hora, duracion, especialidad in cursor:
+            yield dni, matricula, datetime.fromisoformat(fecha_hora), duracion, especialidad
+
+    def cargar_turnos_medico(self, matricula: str):
+        return self._filas_turnos(self.__conexion__.execute(
+            "SELECT dni, matricula, fecha_hora, duracion, especialidad FROM turnos WHERE matricula = ? ORDER BY fecha_hora",
+            (matricula,)))
+
+    def cargar_turnos_paciente(self, dni: str):
+        return self._filas_turnos(self.__conexion__.execute(
+            "SELECT dni, matricula, fecha_hora, duracion, especialidad FROM turnos WHERE dni = ? ORDER BY fecha_hora",
+            (dni,)))
+
+    def iterar_turnos(self, desde: datetime = None, hasta: datetime = None, offset: int = 0, limit: int = None):
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append("fecha_hora >= ?")
+            parametros.append(desde.isoformat(" "))
+        if hasta is not None:
+            condiciones.append("fecha_hora < ?")
+            parametros.append(hasta.isoformat(" "))
+        donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        parametros += [-1 if limit is None else limit, offset]
+        return self._filas_turnos(self.__conexion__.execute(
+            f"SELECT dni, matricula, fecha_hora, duracion, especialidad FROM turnos {donde} ORDER BY id LIMIT ? OFFSET ?",
+            parametros))
+
+    #Recetas
+    def guardar_recetas(self, registros):
+        # registros: lista de (receta, dni, matricula)
+        with self.__conexion__:
+            self.__conexion__.executemany(
+                "INSERT INTO recetas (dni, matricula, fecha, medicamentos) VALUES (?, ?, ?, ?)",
+                [(dni, matricula, receta.__fecha__.isoformat(" "), json.dumps(list(receta.__medicamentos__)))
+                 for receta, dni, matricula in registros])
+
+    def cargar_recetas_paciente(self, dni: str):
+        for dni_fila, matricula, fecha, medicamentos in self.__conexion__.execute(
+                "SELECT dni, matricula, fecha, medicamentos FROM recetas WHERE dni = ? ORDER BY id", (dni,)):
+            yield dni_fila, matricula, datetime.fromisoformat(fecha), json.loads(medicamentos)
+
+    def iterar_medicamentos_recetas(self):
+        for (medicamentos,) in self.__conexion__.execute("SELECT medicamentos FROM recetas"):
+            yield json.loads(medicamentos)
+
+    def cerrar(self):
+        self.__conexion__.close()
@@ -0,0 +1,133 @@
+from datetime import date, datetime
+from typing import Dict, List, Sequence
+
+from src.clinica import AlmacenTurnosColumnar, Clinica, Especialidad
+
+try:
+    import numpy as np
+except ImportError:  # Este módulo no tiene versión en Python puro
+    np = None
+
+class AnaliticaClinica:
+    #Reportes de capacidad sobre una Clinica. Los turnos y pacientes se exportan una sola vez a
+    #columnas de NumPy (inicio en minutos desde EPOCA, duración, médico; fecha de nacimiento
+    #como ordinal) y cada reporte es una operación vectorizada sobre esas columnas. Los
+    #turnos registrados después de la exportación no se ven: hay que volver a crearla.
+    EPOCA = AlmacenTurnosColumnar.EPOCA
+    MINUTO = AlmacenTurnosColumnar.MINUTO
+    MINUTOS_POR_DIA = 24 * 60
+    # EPOCA (1/1/1970) fue jueves: weekday() == 3
+    DIA_SEMANA_EPOCA = EPOCA.weekday()
+    BORDES_EDADES = (0, 18, 30, 45, 60, 75, 130)
+
+    def __init__(self, clinica: Clinica):
+        if np is None:
+            raise ImportError("src.analitica requiere NumPy")
+        self.__hora_apertura__ = clinica.HORA_APERTURA
+        self.__hora_cierre__ = clinica.HORA_CIERRE
+        self.__matriculas__: List[str] = list(clinica.__medicos__)
+        posiciones = {matricula: posicion for posicion, matricula in enumerate(self.__matriculas__)}
+        # Días de atención de cada médico: unión de las máscaras de sus especialidades
+        self.__mascaras_medicos__ = np.array([self._mascara_medico(clinica, matricula) for matricula in self.__matriculas__],
+                                             dtype=np.int64)
+        self._exportar_turnos(clinica, posiciones)
+        self.__nacimientos__ = np.fromiter((paciente.__fecha_ordinal__ for paciente in clinica._pacientes_para_exportar()
+                                            if paciente.__fecha_ordinal__), dtype=np.int64)
+
+    @staticmethod
+    def _mascara_medico(clinica: Clinica, matricula: str) -> int:
+        mascara = 0
+        for especialidad in clinica.__indice_medicos__.get(matricula, ({},))[0].values():
+            if isinstance(especialidad, Especialidad):
+                mascara |= especialidad.__mascara_dias__
+        return mascara
+
+    def _exportar_turnos(self, clinica: Clinica, posiciones: Dict[str, int]):
+        almacen = clinica.__turnos__
+        if isinstance(almacen, AlmacenTurnosColumnar) and clinica.__almacenamiento__ is None:
+            # Las columnas ya existen: sólo se traducen los códigos de médico del almacén
+            traduccion = np.array([posiciones.get(medico.__matricula__, -1) for medico in almacen.__medicos__] or [-1], dtype=np.int64)
+            inicios = np.frombuffer(almacen.__inicio__, dtype=np.int64)
+            duraciones = np.frombuffer(almacen.__duracion__, dtype=np.int32).astype(np.int64)
+            medicos = traduccion[np.frombuffer(almacen.__id_medico__, dtype=np.int64)]
+        else:
+            if clinica.__almacenamiento__ is not None:
+                # Directo de las filas del backend, sin armar turnos ni leer pacientes
+                filas = ((matricula, fecha_hora, duracion) for _, matricula, fecha_hora, duracion, _ in clinica.__almacenamiento__.iterar_turnos())
+            else:
+                filas = ((turno.__medico__.__matricula__ if turno.__medico__ is not None else None, turno.__fecha_hora__, turno.__duracion__)
+                         for turno in clinica.iter_turnos())
+            inicios, duraciones, medicos = [], [], []
+            for matricula, fecha_hora, duracion in filas:
+                inicios.append((fecha_hora - self.EPOCA) // self.MINUTO)
+                duraciones.append(duracion)
+                medicos.append(posiciones.get(matricula, -1))
+            inicios = np.array(inicios, dtype=np.int64)
+            duraciones = np.array(duraciones, dtype=np.int64)
+            medicos = np.array(medicos, dtype=np.int64)
+        validos = medicos >= 0
+        self.__inicios__ = inicios[validos]
+        self.__duraciones__ = duraciones[validos]
+        self.__medicos__ = medicos[validos]
+
+    def __len__(self) -> int:
+        return len(self.__inicios__)
+
+    def _ventana(self, desde: datetime = None, hasta: datetime = None):
+        mascara = np.ones(len(self.__inicios__), dtype=bool)
+        if desde is not None:
+            mascara &= self.__inicios__ >= (desde - self.EPOCA) // self.MINUTO
+        if hasta is not None:
+            mascara &= self.__inicios__ < (hasta - self.EPOCA) // self.MINUTO
+        return mascara
+
+    #Reportes
+    def mapa_calor(self, desde: datetime = None, hasta: datetime = None, por_duracion: bool = False):
+        # Matriz 7x24: fila = día de la semana (lunes = 0), columna = hora de inicio. Cuenta
+        # turnos o, con por_duracion, minutos reservados.
+        mascara = self._ventana(desde, hasta)
+        inicios = self.__inicios__[mascara]
+        dias = (inicios // self.MINUTOS_POR_DIA + self.DIA_SEMANA_EPOCA) % 7
+        horas = inicios % self.MINUTOS_POR_DIA // 60
+        pesos = self.__duraciones__[mascara] if por_duracion else None
+        return np.bincount(dias * 24 + horas, weights=pesos, minlength=7 * 24).reshape(7, 24)
+
+    def utilizacion_medicos(self, desde: datetime, hasta: datetime) -> Dict[str, float]:
+        # Minutos reservados / minutos de atención de cada médico en [desde, hasta). La
+        # capacidad cuenta los días de la ventana en que atiende alguna de sus especialidades,
+        # de HORA_APERTURA a HORA_CIERRE.
+        mascara = self._ventana(desde, hasta)
+        reservados = np.bincount(self.__medicos__[mascara], weights=self.__duraciones__[mascara],
+                                 minlength=len(self.__matriculas__))
+        primer_dia = (desde - self.EPOCA).days
+        ultimo_dia = (hasta - self.EPOCA - self.MINUTO).days + 1
+        dias_por_semana = np.bincount((np.arange(primer_dia, max(primer_dia, ultimo_dia)) + self.DIA_SEMANA_EPOCA) % 7, minlength=7)
+        atiende = (self.__mascaras_medicos__[:, None] >> np.arange(7)) & 1
+        capacidad = atiende @ dias_por_semana * (self.__hora_cierre__ - self.__hora_apertura__) * 60
+        utilizacion = np.divide(reservados, capacidad, out=np.zeros(len(capacidad)), where=capacidad > 0)
+        return dict(zip(self.__matriculas__, utilizacion.tolist()))
+
+    def tasas_por_medico(self, marcas: Sequence[bool]) -> Dict[str, float]:
+        # Proporción de turnos marcados por médico (p. ej. ausencias). La clínica no registra
+        # asistencia: 'marcas' trae un valor por turno, en el orden de la exportación.
+        marcas = np.asarray(marcas, dtype=bool)
+        if len(marcas) != len(self.__medicos__):
+            raise ValueError(f"Se esperaban {len(self.__medicos__)} marcas y se recibieron {len(marcas)}.")
+        totales = np.bincount(self.__medicos__, minlength=len(self.__matriculas__))
+        marcados = np.bincount(self.__medicos__, weights=marcas, minlength=len(self.__matriculas__))
+        tasas = np.divide(marcados, totales, out=np.zeros(len(totales)), where=totales > 0)
+        return dict(zip(self.__matriculas__, tasas.tolist()))
+
+    def edades(self, fecha: date = None):
+        # Edad en años cumplidos de cada paciente a 'fecha' (hoy por defecto)
+        fecha = fecha or date.today()
+        nacimientos = (self.__nacimientos__ - self.EPOCA.toordinal()).astype("datetime64[D]")
+        anios = nacimientos.astype("datetime64[Y]").astype(np.int64) + 1970
+        meses = nacimientos.astype("datetime64[M]")
+        mes_dia = (meses.astype(np.int64) % 12 + 1) * 100 + (nacimientos - meses.astype("datetime64[D]")).astype(np.int64) + 1
+        return fecha.year - anios - (fecha.month * 100 + fecha.day < mes_dia)
+
+    def distribucion_edades(self, bordes: Sequence[int] = BORDES_EDADES, fecha: date = None):
+        # (cantidades, bordes) como np.histogram: intervalos [bordes[i], bordes[i + 1]), salvo el
+        # último, que incluye su borde superior
+        return np.histogram(self.edades(fecha), bins=np.asarray(bordes))
@@ -1,5 +1,18 @@
-from datetime import datetime
-from typing import List, Dict
+import csv
+import heapq
+from collections import OrderedDict
+import json
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import List, Dict, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se usan recorridos en Python puro
+    np = None
 
 class PacienteNoExisteError(Exception):
     pass
@@ -16,10 +29,27 @@ class MedicoYaExisteError(Exception):
 class TurnoDuplicadoError(Exception):
     pass
 
+class TurnoSuperpuestoError(TurnoDuplicadoError):
+    pass
+
 class RecetaInvalidaError(Exception):
     pass
 
+class InteraccionMedicamentosaError(RecetaInvalidaError):
+    pass
+
+class LoteInvalidoError(Exception):
+    def __init__(self, errores):
+        super().__init__(f"El lote contiene {len(errores)} elemento(s) inválido(s); no se registró ninguno.")
+        self.errores = errores
+
 class Paciente:
+    # __fecha_nacimiento__ conserva el texto dd/mm/aaaa para mostrar; __fecha_ordinal__ la misma
+    # fecha como date.toordinal(), para calcular edades u ordenar sin volver a parsear
+    __slots__ = ("__dni__", "__nombre__", "__fecha_nacimiento__", "__fecha_ordinal__")
+    DIAS_ANTES_DEL_MES = (0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+    DIAS_DEL_MES = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
     def __init__(self, dni_paciente: str, nombre_paciente: str, fecha_nacimiento: str):
         
         if not dni_paciente.strip():
@@ -27,14 +57,85 @@ class Paciente:
         if not nombre_paciente.strip():
             raise ValueError("El nombre del paciente no puede estar vacío.")
 
-        try:
-            self.__fecha_nacimiento__ = datetime.strptime(fecha_nacimiento, "%d/%m/%Y")
-        except ValueError:
+        ordinal = Paciente._ordinal_fecha(fecha_nacimiento) if isinstance(fecha_nacimiento, str) else 0
+        if not ordinal:
             raise ValueError(f"Formato de fecha inválido: {fecha_nacimiento}. Debe ser dd/mm/aaaa.")
 
         self.__dni__ = dni_paciente
         self.__nombre__ = nombre_paciente
         self.__fecha_nacimiento__ = fecha_nacimiento
+        self.__fecha_ordinal__ = ordinal
+
+    @staticmethod
+    def _ordinal_fecha(texto: str) -> int:
+        # Acepta lo mismo que strptime(texto, "%d/%m/%Y") (sólo con cifras ASCII) sin su costo.
+        # Devuelve el ordinal de la fecha (date.toordinal) o 0 si no es válida.
+        partes = texto.split("/")
+        if len(partes) != 3:
+            return 0
+        dia, mes, anio = partes
+        if not (0 < len(dia) <= 2 and 0 < len(mes) <= 2 and len(anio) == 4
+                and (dia + mes + anio).isascii() and (dia + mes + anio).isdigit()):
+            return 0
+        dia, mes, anio = int(dia), int(mes), int(anio)
+        if anio < 1 or not 1 <= mes <= 12:
+            return 0
+        bisiesto = anio % 4 == 0 and (anio % 100 != 0 or anio % 400 == 0)
+        if not 1 <= dia <= Paciente.DIAS_DEL_MES[mes - 1] + (bisiesto and mes == 2):
+            return 0
+        anteriores = anio - 1
+        return (anteriores * 365 + anteriores // 4 - anteriores // 100 + anteriores // 400
+                + Paciente.DIAS_ANTES_DEL_MES[mes - 1] + (bisiesto and mes > 2) + dia)
+
+    @staticmethod
+    def _parsear_fecha(texto: str):
+        # Equivalente a strptime(texto, "%d/%m/%Y"); devuelve None si no es válida
+        ordinal = Paciente._ordinal_fecha(texto)
+        return datetime.fromordinal(ordinal) if ordinal else None
+
+    @staticmethod
+    def _ordinales_fechas(textos) -> list:
+        # Versión por columna de _ordinal_fecha para importaciones: con NumPy, las fechas con
+        # formato fijo dd/mm/aaaa se validan juntas y sólo el resto pasa por el parser escalar
+        textos = list(textos)
+        if np is None or not textos:
+            return [Paciente._ordinal_fecha(texto) for texto in textos]
+        columna = np.asarray(textos, dtype=str)
+        ancho = columna.dtype.itemsize // 4
+        ordinales = np.zeros(len(textos), dtype=np.int64)
+        if ancho >= 10:
+            caracteres = columna.view(np.uint32).reshape(len(textos), ancho)
+            cifras = caracteres[:, [0, 1, 3, 4, 6, 7, 8, 9]].astype(np.int64) - 48
+            fijas = ((np.char.str_len(columna) == 10) & (caracteres[:, 2] == 47) & (caracteres[:, 5] == 47)
+                     & ((cifras >= 0) & (cifras <= 9)).all(axis=1))
+            dia = cifras[:, 0] * 10 + cifras[:, 1]
+            mes = cifras[:, 2] * 10 + cifras[:, 3]
+            anio = cifras[:, 4] * 1000 + cifras[:, 5] * 100 + cifras[:, 6] * 10 + cifras[:, 7]
+            fijas &= (anio >= 1) & (mes >= 1) & (mes <= 12)
+            indice_mes = np.where(fijas, mes - 1, 0)
+            bisiesto = (anio % 4 == 0) & ((anio % 100 != 0) | (anio % 400 == 0))
+            maximo = np.asarray(Paciente.DIAS_DEL_MES)[indice_mes] + (bisiesto & (mes == 2))
+            fijas &= (dia >= 1) & (dia <= maximo)
+            anteriores = anio - 1
+            calculados = (anteriores * 365 + anteriores // 4 - anteriores // 100 + anteriores // 400
+                          + np.asarray(Paciente.DIAS_ANTES_DEL_MES)[indice_mes] + (bisiesto & (mes > 2)) + dia)
+            ordinales = np.where(fijas, calculados, 0)
+        else:
+            fijas = np.zeros(len(textos), dtype=bool)
+        resultado = ordinales.tolist()
+        for posicion in np.flatnonzero(~fijas).tolist():
+            resultado[posicion] = Paciente._ordinal_fecha(textos[posicion])
+        return resultado
+
+    @classmethod
+    def _restaurar(cls, dni_paciente: str, nombre_paciente: str, fecha_nacimiento: str, fecha_ordinal: int = None):
+        # Crea un paciente con datos ya validados (importación masiva) sin repetir las validaciones
+        paciente = object.__new__(cls)
+        paciente.__dni__ = dni_paciente
+        paciente.__nombre__ = nombre_paciente
+        paciente.__fecha_nacimiento__ = fecha_nacimiento
+        paciente.__fecha_ordinal__ = fecha_ordinal if fecha_ordinal is not None else cls._ordinal_fecha(fecha_nacimiento)
+        return paciente
 
     def obtener_dni(self):
         return f'El DNI del paciente {self.__nombre__} es: {self.__dni__}'
@@ -48,19 +149,30 @@ class Paciente:
     
     def set_nacimiento(self, fecha_nacimiento):
         self.__fecha_nacimiento__ = fecha_nacimiento
+        self.__fecha_ordinal__ = Paciente._ordinal_fecha(fecha_nacimiento) if isinstance(fecha_nacimiento, str) else 0
         
     def obtener_nombre(self):
         return f'El nombre del paciente es: {self.__nombre__}'
     
     def obtener_nacimiento(self):
         return f'La fecha de nacimiento del paciente {self.__nombre__} es: {self.__fecha_nacimiento__}'
+
+    def calcular_edad(self, hoy: date = None) -> int:
+        nacimiento = date.fromordinal(self.__fecha_ordinal__)
+        hoy = hoy or date.today()
+        return hoy.year - nacimiento.year - ((hoy.month, hoy.day) < (nacimiento.month, nacimiento.day))
     
     #Función STR
     def __str__(self) -> str:
         return f"Paciente: {self.__nombre__} (DNI: {self.__dni__}) - Nacimiento: {self.__fecha_nacimiento__}"
 
 class Especialidad:
+    __slots__ = ("__tipo__", "__dias__", "__mascara_dias__", "__especialidades__", "__observadores__")
     DIAS_VALIDOS = {"lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"}
+    # Días en el orden de datetime.weekday(); cada uno ocupa un bit de la máscara de días
+    DIAS_SEMANA = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
+    NUMERO_DIA = {dia: indice for indice, dia in enumerate(DIAS_SEMANA)}
+    BIT_DIA = {dia: 1 << indice for indice, dia in enumerate(DIAS_SEMANA)}
 
     def __init__(self, tipo: str, dias: list[str] = None):
 
@@ -80,10 +192,32 @@ class Especialidad:
         
         self.__tipo__ = tipo
         self.__dias__ = dias
+        self.__mascara_dias__ = 0
+        for dia in dias_normalizados:
+            self.__mascara_dias__ |= self.BIT_DIA[dia]
         self.__especialidades__ = []
+        # Clínicas que indexan esta especialidad y deben enterarse de sus cambios. Referencias
+        # débiles: suscribirse no mantiene viva a una clínica que ya nadie usa.
+        self.__observadores__ = weakref.WeakSet()
         
     def obtener_especialidad(self) -> str:
         return f"{self.__tipo__}"
+
+    def suscribir(self, observador):
+        self.__observadores__.add(observador)
+
+    def _notificar(self):
+        for observador in self.__observadores__:
+            observador.especialidad_modificada(self)
+
+    def __getstate__(self):
+        # Las clínicas observadoras no se serializan; Clinica.__setstate__ vuelve a suscribirse
+        return {nombre: getattr(self, nombre) for nombre in self.__slots__ if nombre != "__observadores__"}
+
+    def __setstate__(self, estado):
+        for nombre, valor in estado.items():
+            setattr(self, nombre, valor)
+        self.__observadores__ = weakref.WeakSet()
     
     #Funciones agregadas
     
@@ -91,21 +225,29 @@ class Especialidad:
         if not especialidad.strip():
             raise ValueError("El tipo de especialidad no puede estar vacío.")
         self.__tipo__ = especialidad
+        self._notificar()
     
     def set_dias(self, dia):
+        # Mismas validaciones que el constructor: __dias__ y la máscara no pueden divergir
+        dia_normalizado = dia.lower()
+        if dia_normalizado not in self.DIAS_VALIDOS:
+            raise ValueError(f"El día '{dia_normalizado}' no es válido. Debe ser uno de {', '.join(self.DIAS_VALIDOS)}.")
         if self.__dias__ is None:
             self.__dias__ = []
+            self.__mascara_dias__ = 0
+        if self.__mascara_dias__ & self.BIT_DIA[dia_normalizado]:
+            raise ValueError(f"La especialidad {self.__tipo__} ya atiende el día {dia_normalizado}.")
         self.__dias__.append(dia)
+        self.__mascara_dias__ |= self.BIT_DIA[dia_normalizado]
+        self._notificar()
     
     #Validaciones
     def verificar_dia(self, dia: str) -> bool:
-        if not self.__dias__:
-            return False
-            
-        for d in self.__dias__:
-            if d.lower() == dia.lower():
-                return True
-        return False
+        return bool(self.__mascara_dias__ & self.BIT_DIA.get(dia.lower(), 0))
+
+    def atiende_dia_semana(self, dia_semana: int) -> bool:
+        # dia_semana según datetime.weekday() (0 = lunes)
+        return bool(self.__mascara_dias__ >> dia_semana & 1)
 
     #Función STR
     def __str__(self) -> str:
@@ -116,6 +258,8 @@ class Especialidad:
             return f"Especialidad: {self.__tipo__} - Sin días asignados"
 
 class Medico:
+    __slots__ = ("__matricula__", "__nombre__", "__especialidades__", "__observadores__")
+
     def __init__(self, matricula_medico: str, nombre_medico: str, especialidad: list[Especialidad]):
         
         if matricula_medico is None or not str(matricula_medico).strip():
@@ -127,7 +271,23 @@ class Medico:
         self.__matricula__ = matricula_medico
         self.__nombre__ = nombre_medico
         self.__especialidades__ = especialidad if isinstance(especialidad, list) else [especialidad]
+        # Clínicas que indexan a este médico y deben enterarse de sus cambios (referencias débiles)
+        self.__observadores__ = weakref.WeakSet()
+
+    def suscribir(self, observador):
+        self.__observadores__.add(observador)
+
+    def _notificar(self):
+        for observador in self.__observadores__:
+            observador.medico_modificado(self)
 
+    def __getstate__(self):
+        return {nombre: getattr(self, nombre) for nombre in self.__slots__ if nombre != "__observadores__"}
+
+    def __setstate__(self, estado):
+        for nombre, valor in estado.items():
+            setattr(self, nombre, valor)
+        self.__observadores__ = weakref.WeakSet()
 
     def obtener_matricula(self):
         return f'{self.__matricula__}'
@@ -148,12 +308,14 @@ class Medico:
     
     def set_especialidad(self, especialidad):
         self.__especialidades__ = especialidad
+        self._notificar()
 
     def agregar_especialidad(self, nueva_especialidad: Especialidad):
         if nueva_especialidad in self.__especialidades__:
             raise ValueError(f"La especialidad {nueva_especialidad.__tipo__} ya está asignada al médico.")
         
         self.__especialidades__.append(nueva_especialidad)
+        self._notificar()
     
     def get_nombre(self):
         return f'El nombre del Médico es: {self.__nombre__}'
@@ -170,25 +332,50 @@ class Medico:
         return f"{self.__nombre__} - {self.__especialidades__} (Matrícula: {self.__matricula__})"
 
 class Turno:
-    def __init__(self, paciente: Paciente, medico: Medico, fecha_hora: datetime, especialidad: Especialidad):
+    # __weakref__: AlmacenTurnosColumnar recuerda los turnos materializados mientras sigan en uso
+    __slots__ = ("__paciente__", "__medico__", "__fecha_hora__", "__especialidad__", "__duracion__", "__fin__", "__weakref__")
+    DURACION_PREDETERMINADA = 30  # minutos
+
+    def __init__(self, paciente: Paciente, medico: Medico, fecha_hora: datetime, especialidad: Especialidad, duracion: int = DURACION_PREDETERMINADA):
         if paciente is None or medico is None:
             raise ValueError("Paciente y médico son requeridos para crear un turno.")
+        if duracion <= 0:
+            raise ValueError("La duración del turno debe ser mayor a cero minutos.")
         
-        dia_semana = Clinica.obtener_dia_semana_en_espanol(fecha_hora)
-
-        if dia_semana.lower() not in [d.lower() for d in especialidad.__dias__]:
+        if not especialidad.atiende_dia_semana(fecha_hora.weekday()):
+            dia_semana = Clinica.obtener_dia_semana_en_espanol(fecha_hora)
             raise ValueError(f"El médico no trabaja el día {dia_semana}. Días disponibles: {', '.join(especialidad.__dias__)}")
 
         self.__paciente__ = paciente
         self.__medico__ = medico
         self.__fecha_hora__ = fecha_hora
         self.__especialidad__ = especialidad
+        self.__duracion__ = duracion
+        self.__fin__ = fecha_hora + timedelta(minutes=duracion)
+
+    @classmethod
+    def _restaurar(cls, paciente: Paciente, medico: Medico, fecha_hora: datetime, especialidad: Especialidad, duracion: int):
+        # Reconstruye un turno que ya fue validado al agendarlo (almacenes, persistencia) sin volver a validarlo
+        turno = object.__new__(cls)
+        turno.__paciente__ = paciente
+        turno.__medico__ = medico
+        turno.__fecha_hora__ = fecha_hora
+        turno.__especialidad__ = especialidad
+        turno.__duracion__ = duracion
+        turno.__fin__ = fecha_hora + timedelta(minutes=duracion)
+        return turno
     
     def obtener_medico(self) -> Medico:
         return self.__medico__
     
     def obtener_fecha_hora(self) -> datetime:
         return self.__fecha_hora__
+
+    def obtener_duracion(self) -> int:
+        return self.__duracion__
+
+    def obtener_fin(self) -> datetime:
+        return self.__fin__
     
     #Función STR
     def __str__(self) -> str:
@@ -198,7 +385,144 @@ class Turno:
                 f"Fecha y Hora: {fecha_formateada}, "
                 f"Especialidad: {self.__especialidad__}")
 
+class CatalogoMedicamentos:
+    #Interna los nombres de medicamentos como códigos enteros chicos. Cada forma escrita
+    #distinta tiene su propio código (para mostrarla tal cual se prescribió) y además apunta
+    #al código canónico de su nombre normalizado, que es el que se compara entre recetas.
+    def __init__(self):
+        self.__codigos__: Dict[str, int] = {}
+        self.__nombres__: List[str] = []
+        self.__canonicos__ = array("I")
+        self.__por_normalizado__: Dict[str, int] = {}
+
+    @staticmethod
+    def normalizar(nombre: str) -> str:
+        return nombre.strip().lower()
+
+    def codigo(self, nombre: str) -> int:
+        codigo = self.__codigos__.get(nombre)
+        if codigo is None:
+            codigo = self.__codigos__[nombre] = len(self.__nombres__)
+            self.__nombres__.append(nombre)
+            self.__canonicos__.append(self.__por_normalizado__.setdefault(self.normalizar(nombre), codigo))
+        return codigo
+
+    def codificar(self, nombres: List[str]) -> array:
+        return array("I", [self.codigo(nombre) for nombre in nombres])
+
+    def nombre(self, codigo: int) -> str:
+        return self.__nombres__[codigo]
+
+    def decodificar(self, codigos) -> List[str]:
+        nombres = self.__nombres__
+        return [nombres[codigo] for codigo in codigos]
+
+    def canonico(self, codigo: int) -> int:
+        return self.__canonicos__[codigo]
+
+    def buscar(self, nombre: str):
+        # Código canónico de un nombre ya prescrito, o None
+        return self.__por_normalizado__.get(self.normalizar(nombre))
+
+    def buscar_normalizados(self, normalizados) -> Set[int]:
+        # Códigos canónicos de los nombres (ya normalizados) que están en el catálogo, sin
+        # agregar los que no están
+        por_normalizado = self.__por_normalizado__
+        return {por_normalizado[nombre] for nombre in normalizados if nombre in por_normalizado}
+
+    def __len__(self) -> int:
+        return len(self.__nombres__)
+
+class IndiceMedicamentos:
+    #Nombres normalizados de los medicamentos prescriptos en una lista ordenada: los que
+    #empiezan con un prefijo quedan contiguos y se ubican con búsqueda binaria. Cada nombre
+    #lleva la cantidad de veces que se prescribió para ordenar las sugerencias.
+    def __init__(self):
+        self.__claves__: List[str] = []
+        self.__frecuencias__: Dict[str, int] = {}
+        self.__nombres__: Dict[str, str] = {}
+
+    def registrar(self, nombres: List[str]):
+        for nombre in nombres:
+            clave = CatalogoMedicamentos.normalizar(nombre)
+            frecuencia = self.__frecuencias__.get(clave)
+            if frecuencia is None:
+                insort(self.__claves__, clave)
+                # Se muestra la primera forma en que se escribió
+                self.__nombres__[clave] = nombre.strip()
+                frecuencia = 0
+            self.__frecuencias__[clave] = frecuencia + 1
+
+    def sugerir(self, prefijo: str, n: int = 5) -> List[str]:
+        prefijo = CatalogoMedicamentos.normalizar(prefijo)
+        if not prefijo or n <= 0:
+            return []
+        # El rango [prefijo, prefijo + U+10FFFF) contiene todas las claves con ese prefijo
+        inicio = bisect_left(self.__claves__, prefijo)
+        fin = bisect_left(self.__claves__, prefijo + "\U0010ffff", inicio)
+        candidatos = self.__claves__[inicio:fin]
+        mejores = heapq.nsmallest(n, candidatos, key=lambda clave: (-self.__frecuencias__[clave], clave))
+        return [self.__nombres__[clave] for clave in mejores]
+
+    def frecuencia(self, nombre: str) -> int:
+        return self.__frecuencias__.get(CatalogoMedicamentos.normalizar(nombre), 0)
+
+    def __len__(self) -> int:
+        return len(self.__claves__)
+
+class ReglasInteraccion:
+    #Pares de medicamentos contraindicados, guardados como adyacencia entre códigos canónicos
+    #de Receta.CATALOGO: verificar una receta es una intersección de conjuntos por medicamento.
+    def __init__(self):
+        self.__adyacencia__: Dict[int, Set[int]] = {}
+
+    def agregar(self, medicamento_a: str, medicamento_b: str):
+        a = Receta.CATALOGO.canonico(Receta.CATALOGO.codigo(medicamento_a.strip()))
+        b = Receta.CATALOGO.canonico(Receta.CATALOGO.codigo(medicamento_b.strip()))
+        if a == b:
+            raise ValueError(f"Un medicamento no puede interactuar consigo mismo: {medicamento_a.strip()}")
+        self.__adyacencia__.setdefault(a, set()).add(b)
+        self.__adyacencia__.setdefault(b, set()).add(a)
+
+    def cargar_csv(self, ruta: str) -> int:
+        # CSV con encabezado medicamento_a,medicamento_b; devuelve la cantidad de pares leídos
+        pares = 0
+        with open(ruta, newline="", encoding="utf-8") as archivo:
+            for fila in csv.DictReader(archivo):
+                if (fila.get("medicamento_a") or "").strip() and (fila.get("medicamento_b") or "").strip():
+                    self.agregar(fila["medicamento_a"], fila["medicamento_b"])
+                    pares += 1
+        return pares
+
+    def buscar(self, nuevos: Set[int], previos: Set[int]):
+        # Primer par (nuevo, otro) contraindicado entre los nuevos o contra los previos, o None
+        for codigo in nuevos:
+            contraindicados = self.__adyacencia__.get(codigo)
+            if contraindicados:
+                for otro in (contraindicados & nuevos) or (contraindicados & previos):
+                    return codigo, otro
+        return None
+
+    def __bool__(self) -> bool:
+        return bool(self.__adyacencia__)
+
+    def __len__(self) -> int:
+        return sum(len(vecinos) for vecinos in self.__adyacencia__.values()) // 2
+
+    def __getstate__(self):
+        # Los códigos del catálogo sólo valen en este proceso; se serializan los nombres
+        nombre = Receta.CATALOGO.nombre
+        return [(nombre(a), nombre(b)) for a, vecinos in self.__adyacencia__.items() for b in vecinos if a <= b]
+
+    def __setstate__(self, pares):
+        self.__adyacencia__ = {}
+        for medicamento_a, medicamento_b in pares:
+            self.agregar(medicamento_a, medicamento_b)
+
 class Receta:
+    __slots__ = ("__paciente__", "__medico__", "__codigos__", "__fecha__")
+    # Catálogo compartido por todas las recetas del proceso
+    CATALOGO = CatalogoMedicamentos()
     
     def __init__(self, paciente: Paciente, medico: Medico, medicamentos: List[str], fecha: datetime = None):
 
@@ -209,12 +533,32 @@ class Receta:
         
         self.__paciente__ = paciente
         self.__medico__ = medico
-        self.__medicamentos__ = medicamentos
+        # Acepta los nombres o un array de códigos ya internados en CATALOGO
+        self.__codigos__ = medicamentos if isinstance(medicamentos, array) else self.CATALOGO.codificar(medicamentos)
         self.__fecha__ = fecha if fecha else datetime.now()
+
+    @property
+    def __medicamentos__(self) -> List[str]:
+        return self.CATALOGO.decodificar(self.__codigos__)
+
+    @__medicamentos__.setter
+    def __medicamentos__(self, medicamentos: List[str]):
+        self.__codigos__ = self.CATALOGO.codificar(medicamentos)
+
+    def __getstate__(self):
+        # Los códigos sólo valen en este proceso; al serializar viajan los nombres
+        return {"__paciente__": self.__paciente__, "__medico__": self.__medico__,
+                "__medicamentos__": self.__medicamentos__, "__fecha__": self.__fecha__}
+
+    def __setstate__(self, estado):
+        self.__paciente__ = estado["__paciente__"]
+        self.__medico__ = estado["__medico__"]
+        self.__codigos__ = self.CATALOGO.codificar(estado["__medicamentos__"])
+        self.__fecha__ = estado["__fecha__"]
     
     #Funciones agregadas
     def agregar_medicamentos (self, medicamento):
-        self.__medicamentos__.append(medicamento)
+        self.__codigos__.append(self.CATALOGO.codigo(medicamento))
 
     #Función STR
     def __str__(self) -> str:
@@ -225,25 +569,64 @@ class Receta:
 class HistoriaClinica():
     def __init__(self, paciente: Paciente ):
         self.__paciente__ = paciente
+        # Turnos en orden cronológico; __fechas_turnos__ guarda la fecha de cada uno (datetime.min
+        # para los nulos) para ubicar un rango con búsqueda binaria
         self.__turnos__: List[Turno] = []
+        self.__fechas_turnos__: List[datetime] = []
         self.__recetas__: List[Receta] = []
 
     #Registro de datos
     def agregar_turno_a_lista(self, turno : Turno):
-        self.__turnos__.append(turno)
+        fecha_hora = turno.__fecha_hora__ if turno is not None else datetime.min
+        if not self.__fechas_turnos__ or self.__fechas_turnos__[-1] <= fecha_hora:
+            self.__fechas_turnos__.append(fecha_hora)
+            self.__turnos__.append(turno)
+            return
+        posicion = bisect_right(self.__fechas_turnos__, fecha_hora)
+        self.__fechas_turnos__.insert(posicion, fecha_hora)
+        self.__turnos__.insert(posicion, turno)
+
+    def agregar_turnos(self, turnos: List[Turno]):
+        for turno in turnos:
+            self.agregar_turno_a_lista(turno)
     
     def agregar_receta_hist(self, receta):
         if receta is None:
             raise ValueError("La receta no puede ser nula.")
         self.__recetas__.append(receta)
 
+    def agregar_recetas(self, recetas: List[Receta]):
+        if any(receta is None for receta in recetas):
+            raise ValueError("La receta no puede ser nula.")
+        self.__recetas__.extend(recetas)
+
     
     #Acceso a la información
+    def iter_turnos(self, desde: datetime = None, hasta: datetime = None, offset: int = 0, limit: int = None):
+        inicio, fin = 0, len(self.__turnos__)
+        if desde is not None or hasta is not None:
+            # Con un rango los turnos nulos (al principio, con fecha datetime.min) quedan afuera
+            fechas = self.__fechas_turnos__
+            inicio = bisect_left(fechas, desde) if desde is not None else bisect_right(fechas, datetime.min)
+            fin = bisect_left(fechas, hasta, inicio) if hasta is not None else fin
+        inicio += offset
+        if limit is not None:
+            fin = min(fin, inicio + limit)
+        return islice(self.__turnos__, inicio, max(inicio, fin))
+
+    def iter_recetas(self, desde: datetime = None, hasta: datetime = None, offset: int = 0, limit: int = None):
+        recetas = self.__recetas__
+        if desde is not None or hasta is not None:
+            recetas = (receta for receta in recetas
+                       if (desde is None or receta.__fecha__ >= desde)
+                       and (hasta is None or receta.__fecha__ < hasta))
+        return islice(recetas, offset, None if limit is None else offset + limit)
+
     def obtener_turnos(self):
-        return f'Los Turnos son: {[str(turno) for turno in self.__turnos__]}'
+        return f'Los Turnos son: {[str(turno) for turno in self.iter_turnos()]}'
     
     def obtener_receta(self):
-        return f'Las Recetas son: {[str(receta) for receta in self.__recetas__]}'
+        return f'Las Recetas son: {[str(receta) for receta in self.iter_recetas()]}'
     
     #Función STR
     def __str__(self) -> str:
@@ -252,37 +635,847 @@ class HistoriaClinica():
     
         return f"Historia Clínica de {self.__paciente__.__nombre__} - {turnos_info}, {recetas_info}"
 
+class HistoriaColumnar(HistoriaClinica):
+    #Historia de un paciente en una clínica con AlmacenTurnosColumnar: los turnos no se copian
+    #a la historia, se leen de la agenda del paciente en el almacén. Las recetas, igual que en
+    #HistoriaClinica.
+    def __init__(self, paciente: Paciente, almacen: "AlmacenTurnosColumnar"):
+        self.__paciente__ = paciente
+        self.__almacen__ = almacen
+        self.__recetas__: List[Receta] = []
+
+    def _agenda(self):
+        return self.__almacen__.agenda_paciente(self.__paciente__)
+
+    @property
+    def __turnos__(self) -> List[Turno]:
+        agenda = self._agenda()
+        return agenda.turnos_entre() if agenda is not None else []
+
+    @property
+    def __fechas_turnos__(self) -> List[datetime]:
+        agenda = self._agenda()
+        return agenda.fechas() if agenda is not None else []
+
+    def agregar_turno_a_lista(self, turno: Turno):
+        raise ValueError("Los turnos de esta historia se registran en el almacén de turnos de la clínica.")
+
+    def iter_turnos(self, desde: datetime = None, hasta: datetime = None, offset: int = 0, limit: int = None):
+        agenda = self._agenda()
+        if agenda is None:
+            return iter(())
+        return islice(agenda.iter_entre(desde, hasta), offset, None if limit is None else offset + limit)
+
+class AgendaTurnos:
+    #Lista ordenada de intervalos [inicio, fin) de los turnos de un médico o de un paciente.
+    #La clínica no admite turnos superpuestos en una misma agenda, por lo que los fines
+    #también quedan ordenados y ambas listas se pueden recorrer con búsqueda binaria.
+    def __init__(self):
+        self.__fechas__: List[datetime] = []
+        self.__fines__: List[datetime] = []
+        self.__turnos__: List[Turno] = []
+
+    def agregar(self, turno: Turno):
+        fecha_hora = turno.__fecha_hora__
+        # Caso habitual: los turnos llegan en orden cronológico y se agregan al final
+        if not self.__fechas__ or self.__fechas__[-1] <= fecha_hora:
+            self.__fechas__.append(fecha_hora)
+            self.__fines__.append(turno.__fin__)
+            self.__turnos__.append(turno)
+            return
+        posicion = bisect_right(self.__fechas__, fecha_hora)
+        self.__fechas__.insert(posicion, fecha_hora)
+        self.__fines__.insert(posicion, turno.__fin__)
+        self.__turnos__.insert(posicion, turno)
+
+    def quitar(self, turno: Turno) -> bool:
+        inicio = bisect_left(self.__fechas__, turno.__fecha_hora__)
+        fin = bisect_right(self.__fechas__, turno.__fecha_hora__, inicio)
+        for posicion in range(inicio, fin):
+            if self.__turnos__[posicion] is turno:
+                del self.__fechas__[posicion], self.__fines__[posicion], self.__turnos__[posicion]
+                return True
+        return False
+
+    def superpuestos(self, inicio: datetime, fin: datetime) -> List[Turno]:
+        # Primer turno que termina después de 'inicio' hasta el primero que empieza en 'fin' o después
+        desde = bisect_right(self.__fines__, inicio)
+        hasta = bisect_left(self.__fechas__, fin, desde)
+        return self.__turnos__[desde:hasta]
+
+    def hay_superposicion(self, inicio: datetime, fin: datetime) -> bool:
+        posicion = bisect_right(self.__fines__, inicio)
+        return posicion < len(self.__fechas__) and self.__fechas__[posicion] < fin
+
+    def turnos_en(self, fecha_hora: datetime) -> List[Turno]:
+        inicio = bisect_left(self.__fechas__, fecha_hora)
+        fin = bisect_right(self.__fechas__, fecha_hora, inicio)
+        return self.__turnos__[inicio:fin]
+
+    def existe(self, fecha_hora: datetime) -> bool:
+        posicion = bisect_left(self.__fechas__, fecha_hora)
+        return posicion < len(self.__fechas__) and self.__fechas__[posicion] == fecha_hora
+
+    def turnos_entre(self, desde: datetime = None, hasta: datetime = None) -> List[Turno]:
+        inicio = 0 if desde is None else bisect_left(self.__fechas__, desde)
+        fin = len(self.__fechas__) if hasta is None else bisect_left(self.__fechas__, hasta)
+        return self.__turnos__[inicio:fin]
+
+    def consultar(self, desde: datetime = None, hasta: datetime = None, descendente: bool = False, limite: int = None) -> List[Turno]:
+        # Turnos con desde <= fecha_hora < hasta; el límite se aplica desde el extremo que
+        # corresponde al orden pedido, así sólo se copian los turnos devueltos
+        inicio = 0 if desde is None else bisect_left(self.__fechas__, desde)
+        fin = len(self.__fechas__) if hasta is None else max(inicio, bisect_left(self.__fechas__, hasta, inicio))
+        if limite is not None:
+            if descendente:
+                inicio = max(inicio, fin - limite)
+            else:
+                fin = min(fin, inicio + limite)
+        turnos = self.__turnos__[inicio:fin]
+        if descendente:
+            turnos.reverse()
+        return turnos
+
+    def __len__(self) -> int:
+        return len(self.__turnos__)
+
+    def __iter__(self):
+        return iter(self.__turnos__)
+
+class ContadoresOcupacion:
+    #Cantidad de turnos por médico, especialidad, día de la semana y hora, y por médico y día
+    #(de la semana o fecha). Se actualizan al registrar o quitar cada turno, así que leerlos
+    #es O(1). Las claves que vuelven a cero se eliminan para poder comparar dos instancias.
+    DIMENSIONES = ("medicos", "especialidades", "dias_semana", "horas", "medico_dia_semana", "medico_fecha")
+
+    def __init__(self):
+        self.__contadores__: Dict[str, dict] = {dimension: {} for dimension in self.DIMENSIONES}
+
+    def contar(self, matricula: str, especialidad: str, fecha_hora: datetime, cantidad: int = 1):
+        dia = fecha_hora.weekday()
+        claves = (matricula, especialidad.strip().lower(), dia, fecha_hora.hour, (matricula, dia), (matricula, fecha_hora.date()))
+        for dimension, clave in zip(self.DIMENSIONES, claves):
+            contador = self.__contadores__[dimension]
+            total = contador.get(clave, 0) + cantidad
+            if total:
+                contador[clave] = total
+            else:
+                del contador[clave]
+
+    def descontar(self, matricula: str, especialidad: str, fecha_hora: datetime):
+        self.contar(matricula, especialidad, fecha_hora, -1)
+
+    def obtener(self, dimension: str, clave) -> int:
+        return self.__contadores__[dimension].get(clave, 0)
+
+    def diferencias(self, otros: "ContadoresOcupacion") -> List[tuple]:
+        # [(dimensión, clave, cantidad propia, cantidad en 'otros')] para cada clave que difiere
+        resultado = []
+        for dimension in self.DIMENSIONES:
+            propios, ajenos = self.__contadores__[dimension], otros.__contadores__[dimension]
+            for clave in propios.keys() | ajenos.keys():
+                if propios.get(clave, 0) != ajenos.get(clave, 0):
+                    resultado.append((dimension, clave, propios.get(clave, 0), ajenos.get(clave, 0)))
+        return resultado
+
+class AlmacenTurnosColumnar:
+    #Almacén alternativo para Clinica.__turnos__: guarda cada turno como una fila de columnas
+    #numéricas (array) y sólo construye objetos Turno cuando alguien los pide. Lleva además
+    #las agendas de cada médico y de cada paciente (AgendaColumnar), así que la clínica valida
+    #duplicados y superposiciones sobre las columnas y no guarda turnos en otro lado.
+    EPOCA = datetime(1970, 1, 1)
+    MINUTO = timedelta(minutes=1)
+
+    def __init__(self):
+        self.__id_paciente__ = array('q')
+        self.__id_medico__ = array('q')
+        self.__inicio__ = array('q')  # minutos desde EPOCA
+        self.__duracion__ = array('i')  # minutos
+        self.__id_especialidad__ = array('i')
+        # Tablas de claves sustitutas: posición -> objeto y objeto -> posición
+        self.__pacientes__: List[Paciente] = []
+        self.__medicos__: List[Medico] = []
+        self.__especialidades__: List[Especialidad] = []
+        self.__codigos__: Dict[object, int] = {}
+        # Agendas por código de médico y de paciente
+        self.__agendas_medicos__: Dict[int, "AgendaColumnar"] = {}
+        self.__agendas_pacientes__: Dict[int, "AgendaColumnar"] = {}
+        # Turnos ya materializados que siguen en uso, para devolver siempre el mismo objeto
+        self.__vivos__ = weakref.WeakValueDictionary()
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        del estado["__vivos__"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self.__vivos__ = weakref.WeakValueDictionary()
+
+    def _codigo(self, objeto, tabla: list) -> int:
+        codigo = self.__codigos__.get(objeto)
+        if codigo is None:
+            codigo = self.__codigos__[objeto] = len(tabla)
+            tabla.append(objeto)
+        return codigo
+
+    def _minutos(self, fecha_hora: datetime) -> int:
+        return (fecha_hora - self.EPOCA) // self.MINUTO
+
+    def append(self, turno: Turno):
+        posicion = len(self.__inicio__)
+        id_paciente = self._codigo(turno.__paciente__, self.__pacientes__)
+        id_medico = self._codigo(turno.__medico__, self.__medicos__)
+        inicio = self._minutos(turno.__fecha_hora__)
+        self.__id_paciente__.append(id_paciente)
+        self.__id_medico__.append(id_medico)
+        self.__inicio__.append(inicio)
+        self.__duracion__.append(turno.__duracion__)
+        self.__id_especialidad__.append(self._codigo(turno.__especialidad__, self.__especialidades__))
+        for agendas, codigo in ((self.__agendas_medicos__, id_medico), (self.__agendas_pacientes__, id_paciente)):
+            agenda = agendas.get(codigo)
+            if agenda is None:
+                agenda = agendas[codigo] = AgendaColumnar(self)
+            agenda.agregar_fila(posicion, inicio, inicio + turno.__duracion__)
+        self.__vivos__[posicion] = turno
+
+    def extend(self, turnos):
+        for turno in turnos:
+            self.append(turno)
+
+    def __len__(self) -> int:
+        return len(self.__inicio__)
+
+    def __getitem__(self, posicion):
+        if isinstance(posicion, slice):
+            return [self._materializar(i) for i in range(*posicion.indices(len(self)))]
+        if posicion < 0:
+            posicion += len(self)
+        if not 0 <= posicion < len(self):
+            raise IndexError("Índice de turno fuera de rango")
+        return self._materializar(posicion)
+
+    def __iter__(self):
+        for posicion in range(len(self)):
+            yield self._materializar(posicion)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def _materializar(self, posicion: int) -> Turno:
+        turno = self.__vivos__.get(posicion)
+        if turno is None:
+            turno = Turno._restaurar(self.__pacientes__[self.__id_paciente__[posicion]],
+                                     self.__medicos__[self.__id_medico__[posicion]],
+                                     self.EPOCA + self.__inicio__[posicion] * self.MINUTO,
+                                     self.__especialidades__[self.__id_especialidad__[posicion]],
+                                     self.__duracion__[posicion])
+            self.__vivos__[posicion] = turno
+        return turno
+
+    def agenda_medico(self, medico: Medico) -> "AgendaColumnar":
+        return self.__agendas_medicos__.get(self.__codigos__.get(medico))
+
+    def agenda_paciente(self, paciente: Paciente) -> "AgendaColumnar":
+        return self.__agendas_pacientes__.get(self.__codigos__.get(paciente))
+
+    #Consultas vectorizadas sobre las columnas
+    def _filtro(self, desde: datetime = None, hasta: datetime = None, medico: Medico = None):
+        # Devuelve una máscara booleana (NumPy) o una lista de posiciones (Python puro)
+        minimo = None if desde is None else self._minutos(desde)
+        maximo = None if hasta is None else self._minutos(hasta)
+        id_medico = None if medico is None else self.__codigos__.get(medico, -1)
+        if np is not None:
+            inicios = np.frombuffer(self.__inicio__, dtype=np.int64)
+            mascara = np.ones(len(inicios), dtype=bool)
+            if minimo is not None:
+                mascara &= inicios >= minimo
+            if maximo is not None:
+                mascara &= inicios < maximo
+            if id_medico is not None:
+                mascara &= np.frombuffer(self.__id_medico__, dtype=np.int64) == id_medico
+            return mascara
+        return [posicion for posicion, (inicio, medico_fila) in enumerate(zip(self.__inicio__, self.__id_medico__))
+                if (minimo is None or inicio >= minimo) and (maximo is None or inicio < maximo)
+                and (id_medico is None or medico_fila == id_medico)]
+
+    def contar_en_rango(self, desde: datetime = None, hasta: datetime = None, medico: Medico = None) -> int:
+        filtro = self._filtro(desde, hasta, medico)
+        return int(filtro.sum()) if np is not None else len(filtro)
+
+    def turnos_en_rango(self, desde: datetime = None, hasta: datetime = None, medico: Medico = None):
+        filtro = self._filtro(desde, hasta, medico)
+        posiciones = np.flatnonzero(filtro).tolist() if np is not None else filtro
+        for posicion in posiciones:
+            yield self._materializar(posicion)
+
+    #Validaciones por médico: búsqueda binaria en su agenda
+    def existe(self, medico: Medico, fecha_hora: datetime) -> bool:
+        agenda = self.agenda_medico(medico)
+        return agenda is not None and agenda.existe(fecha_hora)
+
+    def hay_superposicion(self, medico: Medico, inicio: datetime, fin: datetime) -> bool:
+        agenda = self.agenda_medico(medico)
+        return agenda is not None and agenda.hay_superposicion(inicio, fin)
+
+class AgendaColumnar:
+    #Agenda de un médico o de un paciente dentro de un AlmacenTurnosColumnar. Igual que
+    #AgendaTurnos, pero en vez de turnos guarda inicio, fin (minutos desde EPOCA) y posición
+    #de cada fila en el almacén; los Turno se materializan recién al devolverlos.
+    def __init__(self, almacen: AlmacenTurnosColumnar):
+        self.__almacen__ = almacen
+        self.__inicios__ = array('q')
+        self.__fines__ = array('q')
+        self.__posiciones__ = array('q')
+
+    def agregar_fila(self, posicion: int, inicio: int, fin: int):
+        if not self.__inicios__ or self.__inicios__[-1] <= inicio:
+            self.__inicios__.append(inicio)
+            self.__fines__.append(fin)
+            self.__posiciones__.append(posicion)
+            return
+        indice = bisect_right(self.__inicios__, inicio)
+        self.__inicios__.insert(indice, inicio)
+        self.__fines__.insert(indice, fin)
+        self.__posiciones__.insert(indice, posicion)
+
+    def _turnos(self, desde: int, hasta: int) -> List[Turno]:
+        materializar = self.__almacen__._materializar
+        return [materializar(posicion) for posicion in self.__posiciones__[desde:hasta]]
+
+    def _rango(self, desde: datetime = None, hasta: datetime = None) -> Tuple[int, int]:
+        minutos = self.__almacen__._minutos
+        inicio = 0 if desde is None else bisect_left(self.__inicios__, minutos(desde))
+        fin = len(self.__inicios__) if hasta is None else max(inicio, bisect_left(self.__inicios__, minutos(hasta), inicio))
+        return inicio, fin
+
+    def superpuestos(self, inicio: datetime, fin: datetime) -> List[Turno]:
+        minutos = self.__almacen__._minutos
+        desde = bisect_right(self.__fines__, minutos(inicio))
+        hasta = bisect_left(self.__inicios__, minutos(fin), desde)
+        return self._turnos(desde, hasta)
+
+    def hay_superposicion(self, inicio: datetime, fin: datetime) -> bool:
+        minutos = self.__almacen__._minutos
+        posicion = bisect_right(self.__fines__, minutos(inicio))
+        return posicion < len(self.__inicios__) and self.__inicios__[posicion] < minutos(fin)
+
+    def turnos_en(self, fecha_hora: datetime) -> List[Turno]:
+        minuto = self.__almacen__._minutos(fecha_hora)
+        inicio = bisect_left(self.__inicios__, minuto)
+        return self._turnos(inicio, bisect_right(self.__inicios__, minuto, inicio))
+
+    def existe(self, fecha_hora: datetime) -> bool:
+        minuto = self.__almacen__._minutos(fecha_hora)
+        posicion = bisect_left(self.__inicios__, minuto)
+        return posicion < len(self.__inicios__) and self.__inicios__[posicion] == minuto
+
+    def iter_entre(self, desde: datetime = None, hasta: datetime = None):
+        inicio, fin = self._rango(desde, hasta)
+        materializar = self.__almacen__._materializar
+        for indice in range(inicio, fin):
+            yield materializar(self.__posiciones__[indice])
+
+    def turnos_entre(self, desde: datetime = None, hasta: datetime = None) -> List[Turno]:
+        return self._turnos(*self._rango(desde, hasta))
+
+    def consultar(self, desde: datetime = None, hasta: datetime = None, descendente: bool = False, limite: int = None) -> List[Turno]:
+        inicio, fin = self._rango(desde, hasta)
+        if limite is not None:
+            if descendente:
+                inicio = max(inicio, fin - limite)
+            else:
+                fin = min(fin, inicio + limite)
+        turnos = self._turnos(inicio, fin)
+        if descendente:
+            turnos.reverse()
+        return turnos
+
+    def fechas(self) -> List[datetime]:
+        epoca, minuto = self.__almacen__.EPOCA, self.__almacen__.MINUTO
+        return [epoca + inicio * minuto for inicio in self.__inicios__]
+
+    def __len__(self) -> int:
+        return len(self.__posiciones__)
+
+    def __iter__(self):
+        return self.iter_entre()
+
+class CacheLRU(OrderedDict):
+    #Diccionario acotado a 'limite' entradas: al superarlo descarta la usada hace más tiempo.
+    #get cuenta como uso; 'in' y [] no cambian el orden.
+    def __init__(self, limite: int = 1024):
+        super().__init__()
+        self.__limite__ = limite
+
+    def __reduce__(self):
+        # El límite tiene que estar antes de reinsertar las entradas al deserializar
+        return type(self), (self.__limite__,), None, None, iter(self.items())
+
+    def get(self, clave, predeterminado=None):
+        if clave in self:
+            self.move_to_end(clave)
+            return super().__getitem__(clave)
+        return predeterminado
+
+    def __setitem__(self, clave, valor):
+        super().__setitem__(clave, valor)
+        self.move_to_end(clave)
+        if len(self) > self.__limite__:
+            self.popitem(last=False)
+
 class Clinica():
+    # Horario de atención usado para buscar turnos libres
+    HORA_APERTURA = 8
+    HORA_CIERRE = 20
+    # Recetas previas del paciente contra las que se verifican interacciones
+    DIAS_VENTANA_INTERACCIONES = 90
+
     def __init__(
             self,
+            almacen_turnos=None,
+            almacenamiento=None,
+            limite_historias: int = 1024,
     ):
-        self.__pacientes__: Dict[str, Paciente] = {}  
+        # Con un backend persistente pacientes, historias y agendas son cachés LRU (CacheLRU)
+        # de a lo sumo limite_historias entradas cada una; lo descartado se vuelve a leer
+        self.__pacientes__: Dict[str, Paciente] = CacheLRU(limite_historias) if almacenamiento is not None else {}
         self.__medicos__: Dict[str, Medico] = {}      
-        self.__turnos__: List[Turno] = []
-        self.__historias_clinicas__: Dict[str, HistoriaClinica] = {}
+        # Por defecto una lista; también acepta un AlmacenTurnosColumnar. Con un backend queda
+        # vacío: los turnos se leen del backend.
+        self.__turnos__: List[Turno] = almacen_turnos if almacen_turnos is not None else []
+        # Sin backend, un almacén columnar lleva también las agendas y los turnos de las historias
+        self.__columnar__ = almacen_turnos if isinstance(almacen_turnos, AlmacenTurnosColumnar) and almacenamiento is None else None
+        self.__historias_clinicas__: Dict[str, HistoriaClinica] = CacheLRU(limite_historias) if almacenamiento is not None else {}
+        # Medicamentos prescriptos, para autocompletar por prefijo según frecuencia
+        self.__indice_medicamentos__ = IndiceMedicamentos()
+        self.__reglas_interaccion__ = ReglasInteraccion()
         self.__especialidades__: List[Especialidad] = []
+        # Especialidades registradas por nombre normalizado (sincronizado con __especialidades__)
+        self.__especialidades_por_nombre__: Dict[str, Especialidad] = {}
+        self.__nombres_especialidades__: Dict[Especialidad, str] = {}
+        # Índices por matrícula y por DNI: agendas ordenadas por fecha_hora
+        self.__agendas_medicos__: Dict[str, AgendaTurnos] = CacheLRU(limite_historias) if almacenamiento is not None else {}
+        self.__agendas_pacientes__: Dict[str, AgendaTurnos] = CacheLRU(limite_historias) if almacenamiento is not None else {}
+        # Índice invertido (especialidad normalizada, día de la semana) -> matrículas
+        self.__medicos_por_especialidad_dia__: Dict[Tuple[str, int], Set[str]] = {}
+        # Por matrícula: especialidades resueltas por nombre normalizado y claves indexadas
+        self.__indice_medicos__: Dict[str, Tuple[Dict[str, Especialidad], Set[Tuple[str, int]]]] = {}
+        # Matrículas que referencian cada especialidad (objeto o nombre de texto)
+        self.__medicos_por_especialidad__: Dict[Especialidad, Set[str]] = {}
+        self.__medicos_por_nombre__: Dict[str, Set[str]] = {}
+        # Backend persistente opcional (p. ej. AlmacenamientoSQLite). Con None todo vive en
+        # los diccionarios de arriba; con un backend, especialidades y médicos se cargan al
+        # iniciar y pacientes, agendas e historias se leen recién cuando se consultan.
+        self.__almacenamiento__ = almacenamiento
+        # Diario de eventos (src/diario.py); se asigna con Clinica.restaurar
+        self.__diario__ = None
+        # Contadores de ocupación; con un backend se arman recién en la primera consulta,
+        # recorriendo los turnos guardados, y desde ahí se mantienen al registrar turnos
+        self.__ocupacion__ = ContadoresOcupacion() if almacenamiento is None else None
+        if almacenamiento is not None:
+            self._cargar_desde_almacenamiento()
+
+    #Persistencia
+    def _cargar_desde_almacenamiento(self):
+        almacenamiento, self.__almacenamiento__ = self.__almacenamiento__, None
+        try:
+            for tipo, dias in almacenamiento.cargar_especialidades():
+                self.agregar_especialidad(Especialidad(tipo, dias))
+            for matricula, nombre, filas in almacenamiento.cargar_medicos():
+                self.agregar_medico(Medico(matricula, nombre, self._especialidades_desde_filas(filas)))
+            # Las recetas quedan en el backend, pero el índice de sugerencias se arma completo
+            for medicamentos in almacenamiento.iterar_medicamentos_recetas():
+                self.__indice_medicamentos__.registrar(medicamentos)
+        finally:
+            self.__almacenamiento__ = almacenamiento
+
+    def _especialidades_desde_filas(self, filas) -> list:
+        # filas: [[tipo, días]]; sin días la especialidad se había cargado sólo por nombre
+        especialidades = []
+        for tipo, dias in filas:
+            if dias is None:
+                especialidades.append(tipo)
+                continue
+            registrada = self.obtener_especialidad(tipo)
+            if registrada is not None and registrada.__dias__ == dias:
+                especialidades.append(registrada)
+            else:
+                especialidades.append(Especialidad(tipo, dias))
+        return especialidades
+
+    @classmethod
+    def restaurar(cls, diario):
+        # Arranque desde un diario: carga el último snapshot y repite sólo los eventos posteriores
+        secuencia, clinica = diario.cargar_snapshot()
+        if clinica is None:
+            clinica = cls()
+        for evento in diario.eventos(secuencia):
+            clinica._aplicar_evento(evento)
+        diario.abrir()
+        clinica.__diario__ = diario
+        return clinica
+
+    def _aplicar_evento(self, evento: list):
+        tipo = evento[0]
+        if tipo == "T":
+            self._registrar_turnos([(self._turno_desde_fila((dni, matricula, datetime.fromisoformat(fecha_hora), duracion, especialidad)), dni, matricula)
+                                    for dni, matricula, fecha_hora, duracion, especialidad in evento[1]])
+        elif tipo == "P":
+            self.agregar_paciente(Paciente(*evento[1:]))
+        elif tipo == "R":
+            _, dni, matricula, fecha, medicamentos = evento
+            receta = Receta(self._paciente(dni), self.__medicos__[matricula], medicamentos, datetime.fromisoformat(fecha))
+            self._registrar_recetas([(receta, dni, matricula)])
+        elif tipo == "M":
+            _, matricula, nombre, filas = evento
+            self.agregar_medico(Medico(matricula, nombre, self._especialidades_desde_filas(filas)))
+        elif tipo == "E":
+            self.agregar_especialidad(Especialidad(evento[1], evento[2]))
+        else:
+            raise ValueError(f"Evento desconocido en el diario: {tipo}")
+
+    def _registrar_evento(self, evento: list):
+        if self.__diario__ is not None and self.__diario__.registrar(evento):
+            self.__diario__.guardar_snapshot(self)
+
+    def __getstate__(self):
+        # El snapshot no incluye el diario ni el backend persistente. Las reglas de interacción
+        # tampoco: son configuración que no pasa por el diario, y se vuelven a cargar al abrir
+        estado = self.__dict__.copy()
+        estado["__diario__"] = None
+        estado["__almacenamiento__"] = None
+        del estado["__reglas_interaccion__"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self.__reglas_interaccion__ = ReglasInteraccion()
+        for medico in self.__medicos__.values():
+            medico.suscribir(self)
+        for especialidad in self.__nombres_especialidades__:
+            especialidad.suscribir(self)
+        for especialidad in self.__medicos_por_especialidad__:
+            especialidad.suscribir(self)
+
+    def _paciente(self, dni: str, cachear: bool = True):
+        # Con cachear=False un paciente leído del backend no se guarda en __pacientes__
+        paciente = self.__pacientes__.get(dni)
+        if paciente is None and self.__almacenamiento__ is not None:
+            fila = self.__almacenamiento__.cargar_paciente(dni)
+            if fila is not None:
+                paciente = Paciente(*fila)
+                if cachear:
+                    self.__pacientes__[dni] = paciente
+        return paciente
+
+    def _agenda_medico(self, matricula: str):
+        if self.__columnar__ is not None:
+            return self.__columnar__.agenda_medico(self.__medicos__.get(matricula))
+        agenda = self.__agendas_medicos__.get(matricula)
+        if agenda is None and self.__almacenamiento__ is not None:
+            agenda = self.__agendas_medicos__[matricula] = self._agenda_desde_filas(self.__almacenamiento__.cargar_turnos_medico(matricula))
+        return agenda
+
+    def _agenda_paciente(self, dni: str):
+        if self.__columnar__ is not None:
+            return self.__columnar__.agenda_paciente(self.__pacientes__.get(dni))
+        agenda = self.__agendas_pacientes__.get(dni)
+        if agenda is None and self.__almacenamiento__ is not None:
+            agenda = self.__agendas_pacientes__[dni] = self._agenda_desde_filas(self.__almacenamiento__.cargar_turnos_paciente(dni))
+        return agenda
+
+    def _nueva_historia(self, paciente: Paciente) -> HistoriaClinica:
+        if self.__columnar__ is not None:
+            return HistoriaColumnar(paciente, self.__columnar__)
+        return HistoriaClinica(paciente)
+
+    def _agenda_desde_filas(self, filas) -> AgendaTurnos:
+        agenda = AgendaTurnos()
+        for turno in self._turnos_desde_filas(filas):
+            agenda.agregar(turno)
+        return agenda
+
+    def _turnos_desde_filas(self, filas):
+        # Los pacientes que no están en caché se leen sin cachearlos; durante el recorrido se
+        # recuerdan en una caché propia, acotada como __pacientes__, que se descarta al terminar
+        leidos = CacheLRU(self.__pacientes__.__limite__)
+        for fila in filas:
+            dni = fila[0]
+            paciente = leidos.get(dni)
+            if paciente is None:
+                paciente = leidos[dni] = self._paciente(dni, cachear=False)
+            yield self._turno_desde_fila(fila, paciente)
+
+    def _turno_desde_fila(self, fila, paciente: Paciente = None) -> Turno:
+        dni, matricula, fecha_hora, duracion, tipo = fila
+        nombre = tipo.strip().lower()
+        especialidad = (self.__indice_medicos__.get(matricula, ({},))[0].get(nombre)
+                        or self.__especialidades_por_nombre__.get(nombre)
+                        or Especialidad(tipo))
+        if paciente is None:
+            paciente = self._paciente(dni)
+        return Turno._restaurar(paciente, self.__medicos__.get(matricula), fecha_hora, especialidad, duracion)
+
+    def cerrar(self):
+        if self.__almacenamiento__ is not None:
+            self.__almacenamiento__.cerrar()
+        if self.__diario__ is not None:
+            self.__diario__.cerrar()
 
     #Registro y acceso
     def agregar_paciente(self, pacienteC: Paciente):
         dni = pacienteC.__dni__
-        if dni in self.__pacientes__:
+        if self._paciente(dni) is not None:
             raise PacienteYaExisteError(f'Ya existe un paciente con el DNI: {dni}')
+        # Primero el backend: si la escritura falla la clínica queda como estaba
+        if self.__almacenamiento__ is not None:
+            self.__almacenamiento__.guardar_paciente(pacienteC)
         self.__pacientes__[dni] = pacienteC
-        self.__historias_clinicas__[dni] = HistoriaClinica(pacienteC)
+        # Con un backend la historia se arma recién cuando se la consulta
+        if self.__almacenamiento__ is None:
+            self.__historias_clinicas__[dni] = self._nueva_historia(pacienteC)
+        self._registrar_evento(["P", dni, pacienteC.__nombre__, pacienteC.__fecha_nacimiento__])
+
+    #Importación masiva
+    def importar_pacientes(self, ruta: str, tamanio_bloque: int = 10_000):
+        # CSV con encabezado dni,nombre,fecha_nacimiento o JSONL con esas claves. Se lee por
+        # bloques; las filas inválidas se informan en errores [(línea, mensaje)] sin cortar la carga.
+        return self._importar(ruta, tamanio_bloque, self._preparar_paciente, self._confirmar_pacientes,
+                              self._fechas_importacion)
+
+    def importar_medicos(self, ruta: str, tamanio_bloque: int = 10_000):
+        # CSV con encabezado matricula,nombre,especialidades (nombres separados por ";") o JSONL
+        # con una lista de nombres; las especialidades no registradas quedan cargadas por nombre.
+        return self._importar(ruta, tamanio_bloque, self._preparar_medico, self._confirmar_medicos)
+
+    def _importar(self, ruta: str, tamanio_bloque: int, preparar, confirmar, precalcular=None):
+        # precalcular, si se indica, recibe las filas de cada tramo leído y devuelve un valor por
+        # fila que se pasa a preparar (p. ej. las fechas validadas de toda la columna de una vez)
+        importados, errores = 0, []
+        bloque = {}
+        filas = self._filas_importacion(ruta)
+        while True:
+            tramo = list(islice(filas, tamanio_bloque))
+            if not tramo:
+                break
+            extras = precalcular([fila for _, fila in tramo]) if precalcular is not None else None
+            for posicion, (numero, fila) in enumerate(tramo):
+                try:
+                    if not isinstance(fila, dict):
+                        raise ValueError("La fila no tiene un formato válido.")
+                    if extras is None:
+                        clave, entidad = preparar(fila, bloque)
+                    else:
+                        clave, entidad = preparar(fila, bloque, extras[posicion])
+                except (ValueError, PacienteYaExisteError, MedicoYaExisteError) as error:
+                    errores.append((numero, str(error)))
+                    continue
+                bloque[clave] = entidad
+                if len(bloque) >= tamanio_bloque:
+                    confirmar(bloque)
+                    importados += len(bloque)
+                    bloque = {}
+        if bloque:
+            confirmar(bloque)
+            importados += len(bloque)
+        return importados, errores
+
+    def _filas_importacion(self, ruta: str):
+        extension = ruta.rsplit(".", 1)[-1].lower()
+        if extension not in ("csv", "jsonl"):
+            raise ValueError(f"Formato de importación no soportado: {ruta}. Debe ser .csv o .jsonl.")
+        with open(ruta, newline="", encoding="utf-8") as archivo:
+            if extension == "csv":
+                # csv.reader y un dict por fila: lo mismo que DictReader sin su costo por fila
+                lector = csv.reader(archivo)
+                encabezado = next(lector, None)
+                if encabezado is None:
+                    return
+                for fila in lector:
+                    if fila:
+                        yield lector.line_num, dict(zip(encabezado, fila))
+                return
+            for numero, linea in enumerate(archivo, 1):
+                if not linea.strip():
+                    continue
+                try:
+                    yield numero, json.loads(linea)
+                except ValueError:
+                    yield numero, None
+
+    @staticmethod
+    def _fecha_de_fila(fila) -> str:
+        return str(fila.get("fecha_nacimiento") or "").strip() if isinstance(fila, dict) else ""
+
+    def _fechas_importacion(self, filas: list) -> list:
+        # (texto, ordinal) de cada fila: preparar no vuelve a extraer el texto
+        textos = [self._fecha_de_fila(fila) for fila in filas]
+        return list(zip(textos, Paciente._ordinales_fechas(textos)))
+
+    def _preparar_paciente(self, fila: dict, bloque: dict, fecha: Tuple[str, int] = None):
+        dni = str(fila.get("dni") or "").strip()
+        nombre = str(fila.get("nombre") or "").strip()
+        if fecha is None:
+            fecha_nacimiento, fecha_ordinal = self._fecha_de_fila(fila), None
+        else:
+            fecha_nacimiento, fecha_ordinal = fecha
+        if not (7 <= len(dni) <= 8 and dni.isascii() and dni.isdigit()):
+            raise ValueError(f"DNI inválido: '{dni}'. Debe tener 7 u 8 dígitos.")
+        if not nombre:
+            raise ValueError("El nombre del paciente no puede estar vacío.")
+        if fecha_ordinal is None:
+            fecha_ordinal = Paciente._ordinal_fecha(fecha_nacimiento)
+        if not fecha_ordinal:
+            raise ValueError(f"Formato de fecha inválido: {fecha_nacimiento}. Debe ser dd/mm/aaaa.")
+        if dni in bloque or self._paciente(dni) is not None:
+            raise PacienteYaExisteError(f'Ya existe un paciente con el DNI: {dni}')
+        return dni, Paciente._restaurar(dni, nombre, fecha_nacimiento, fecha_ordinal)
+
+    def _confirmar_pacientes(self, pacientes: Dict[str, Paciente]):
+        if self.__almacenamiento__ is not None:
+            self.__almacenamiento__.guardar_pacientes(list(pacientes.values()))
+        # Cada evento se registra apenas su paciente queda cargado: un snapshot a mitad del
+        # bloque no debe incluir pacientes cuyo evento todavía está por escribirse
+        for dni, paciente in pacientes.items():
+            # Con un backend persistente pacientes e historias se leen al consultarlos
+            if self.__almacenamiento__ is None:
+                self.__pacientes__[dni] = paciente
+                self.__historias_clinicas__[dni] = self._nueva_historia(paciente)
+            if self.__diario__ is not None:
+                self._registrar_evento(["P", dni, paciente.__nombre__, paciente.__fecha_nacimiento__])
+
+    def _preparar_medico(self, fila: dict, bloque: dict):
+        matricula = str(fila.get("matricula") or "").strip()
+        nombre = str(fila.get("nombre") or "").strip()
+        nombres = fila.get("especialidades") or []
+        if isinstance(nombres, str):
+            nombres = nombres.split(";")
+        nombres = [str(nombre_especialidad).strip() for nombre_especialidad in nombres if str(nombre_especialidad).strip()]
+        if matricula in bloque or matricula in self.__medicos__:
+            raise MedicoYaExisteError(f"Ya existe un médico con matrícula {matricula}")
+        especialidades = [self.obtener_especialidad(nombre_especialidad) or nombre_especialidad for nombre_especialidad in nombres]
+        return matricula, Medico(matricula, nombre, especialidades)
+
+    def _confirmar_medicos(self, medicos: Dict[str, Medico]):
+        for medico in medicos.values():
+            self.agregar_medico(medico)
     
     def agregar_medico(self, medico : Medico):
         matricula = medico.__matricula__
         if matricula in self.__medicos__:
             raise MedicoYaExisteError(f"Ya existe un médico con matrícula {matricula}")
+        if self.__almacenamiento__ is not None:
+            self.__almacenamiento__.guardar_medico(medico)
         self.__medicos__[matricula] = medico
+        medico.suscribir(self)
+        self._indexar_medico(matricula)
+        if self.__diario__ is not None:
+            especialidades = medico.__especialidades__ if isinstance(medico.__especialidades__, list) else [medico.__especialidades__]
+            self._registrar_evento(["M", matricula, medico.__nombre__,
+                                    [[esp, None] if isinstance(esp, str) else [esp.__tipo__, list(esp.__dias__ or [])] for esp in especialidades]])
 
     def agregar_especialidad(self, especialidad: Especialidad):
         especialidad_normalizada = especialidad.__tipo__.strip().lower()
 
-        if any(esp.__tipo__.strip().lower() == especialidad_normalizada for esp in self.__especialidades__):
+        if especialidad_normalizada in self.__especialidades_por_nombre__:
             raise ValueError(f"La especialidad '{especialidad.__tipo__}' ya está registrada en la clínica.")
 
+        if self.__almacenamiento__ is not None:
+            self.__almacenamiento__.guardar_especialidad(especialidad)
         self.__especialidades__.append(especialidad)
+        self.__especialidades_por_nombre__[especialidad_normalizada] = especialidad
+        self.__nombres_especialidades__[especialidad] = especialidad_normalizada
+        especialidad.suscribir(self)
+        # Médicos que tenían esta especialidad cargada sólo por nombre
+        for matricula in list(self.__medicos_por_nombre__.get(especialidad_normalizada, ())):
+            self._indexar_medico(matricula)
+        self._registrar_evento(["E", especialidad.__tipo__, list(especialidad.__dias__ or [])])
+
+    #Índice de especialidades por día
+    def _indexar_medico(self, matricula: str):
+        self._desindexar_medico(matricula)
+        medico = self.__medicos__[matricula]
+        especialidades = medico.__especialidades__ if isinstance(medico.__especialidades__, list) else [medico.__especialidades__]
+
+        por_nombre: Dict[str, Especialidad] = {}
+        claves: Set[Tuple[str, int]] = set()
+        for esp in especialidades:
+            if isinstance(esp, str):
+                nombre = esp.strip().lower()
+                self.__medicos_por_nombre__.setdefault(nombre, set()).add(matricula)
+                esp = self.__especialidades_por_nombre__.get(nombre)
+                if esp is None:
+                    continue
+            elif not isinstance(esp, Especialidad):
+                continue
+            nombre = esp.__tipo__.strip().lower()
+            por_nombre.setdefault(nombre, esp)
+            esp.suscribir(self)
+            self.__medicos_por_especialidad__.setdefault(esp, set()).add(matricula)
+            for dia in range(7):
+                if esp.atiende_dia_semana(dia):
+                    claves.add((nombre, dia))
+
+        for clave in claves:
+            self.__medicos_por_especialidad_dia__.setdefault(clave, set()).add(matricula)
+        self.__indice_medicos__[matricula] = (por_nombre, claves)
+
+    def _desindexar_medico(self, matricula: str):
+        anterior = self.__indice_medicos__.pop(matricula, None)
+        if anterior is None:
+            return
+        por_nombre, claves = anterior
+        for clave in claves:
+            matriculas = self.__medicos_por_especialidad_dia__[clave]
+            matriculas.discard(matricula)
+            if not matriculas:
+                del self.__medicos_por_especialidad_dia__[clave]
+        for esp in por_nombre.values():
+            self.__medicos_por_especialidad__.get(esp, set()).discard(matricula)
+        for matriculas in self.__medicos_por_nombre__.values():
+            matriculas.discard(matricula)
+
+    def obtener_especialidad(self, nombre: str):
+        return self.__especialidades_por_nombre__.get(nombre.strip().lower())
+
+    def medico_modificado(self, medico: Medico):
+        matricula = medico.__matricula__
+        if self.__medicos__.get(matricula) is medico:
+            self._indexar_medico(matricula)
+            if self.__almacenamiento__ is not None:
+                self.__almacenamiento__.guardar_medico(medico)
+
+    def especialidad_modificada(self, especialidad: Especialidad):
+        # Si cambió el nombre de una especialidad registrada, se actualiza la clave normalizada.
+        # Si el nombre nuevo ya es de otra especialidad, ésa conserva la clave y la renombrada
+        # queda fuera del índice por nombre hasta que se libere o vuelva a renombrarse.
+        nombre_anterior = self.__nombres_especialidades__.get(especialidad)
+        nombre = especialidad.__tipo__.strip().lower()
+        if nombre_anterior is not None and nombre_anterior != nombre:
+            por_nombre = self.__especialidades_por_nombre__
+            if por_nombre.get(nombre_anterior) is especialidad:
+                del por_nombre[nombre_anterior]
+                # Otra especialidad que había quedado afuera con ese nombre recupera la clave
+                for otra, nombre_otra in self.__nombres_especialidades__.items():
+                    if nombre_otra == nombre_anterior and otra is not especialidad:
+                        por_nombre[nombre_anterior] = otra
+                        break
+            por_nombre.setdefault(nombre, especialidad)
+            self.__nombres_especialidades__[especialidad] = nombre
+        if self.__almacenamiento__ is not None and especialidad in self.__nombres_especialidades__:
+            self.__almacenamiento__.guardar_especialidad(especialidad)
+        for matricula in list(self.__medicos_por_especialidad__.get(especialidad, ())):
+            self._indexar_medico(matricula)
+            if self.__almacenamiento__ is not None:
+                self.__almacenamiento__.guardar_medico(self.__medicos__[matricula])
+
+    def obtener_medicos_por_especialidad_y_dia(self, especialidad, dia) -> List[Medico]:
+        # 'especialidad' puede ser un objeto Especialidad o su nombre; 'dia' un nombre de día o datetime.weekday()
+        nombre = especialidad.__tipo__ if isinstance(especialidad, Especialidad) else especialidad
+        numero_dia = dia if isinstance(dia, int) else Especialidad.NUMERO_DIA.get(dia.strip().lower())
+        matriculas = self.__medicos_por_especialidad_dia__.get((nombre.strip().lower(), numero_dia), ())
+        return [self.__medicos__[matricula] for matricula in sorted(matriculas)]
  
     def obtener_medico_por_matricula(self, matricula: str) -> "Medico":
         if matricula in self.__medicos__:
@@ -291,57 +1484,327 @@ class Clinica():
             raise MedicoNoExisteError(f"No existe médico con matrícula {matricula}")
     
     def obtener_pacientes(self) -> List[Paciente]:
-        return list(self.__pacientes__.values())
+        if self.__almacenamiento__ is None:
+            return list(self.__pacientes__.values())
+        pacientes = []
+        for dni, nombre, fecha_nacimiento in self.__almacenamiento__.cargar_pacientes():
+            pacientes.append(self.__pacientes__.get(dni) or Paciente(dni, nombre, fecha_nacimiento))
+        return pacientes
 
     def obtener_medicos(self) -> List[Medico]:
         return list(self.__medicos__.values())
 
     #Turnos
-    def agendar_turno(self, fecha_hora: datetime, dni: str, matricula: str, especialidad: Especialidad):
-    
-        if dni not in self.__pacientes__:
+    def agendar_turno(self, fecha_hora: datetime, dni: str, matricula: str, especialidad: Especialidad, duracion: int = Turno.DURACION_PREDETERMINADA):
+        turno = self._preparar_turno(fecha_hora, dni, matricula, especialidad, duracion, datetime.now().date())
+        self._registrar_turnos([(turno, dni, matricula)])
+        return f'Turno para {turno.__paciente__} con {turno.__medico__} agregado.'
+
+    def agendar_turnos_lote(self, turnos, todo_o_nada: bool = True) -> list:
+        # Cada elemento es (fecha_hora, dni, matricula, especialidad[, duracion]).
+        # Se valida todo el lote en una sola pasada, contra el estado actual y contra
+        # los turnos anteriores del mismo lote, antes de registrar nada.
+        resultados, registros, errores = self._validar_turnos_lote(turnos)
+        if errores and todo_o_nada:
+            raise LoteInvalidoError(errores)
+        self._registrar_turnos(registros)
+        return resultados
+
+    def _validar_turnos_lote(self, turnos):
+        # Devuelve (resultados, registros, errores) sin registrar nada: resultados tiene el
+        # Turno o la excepción de cada elemento, registros los (turno, dni, matricula) válidos
+        hoy = datetime.now().date()
+        pendientes = ({}, {})
+        resultados = []
+        registros = []
+        errores = []
+        for indice, elemento in enumerate(turnos):
+            try:
+                fecha_hora, dni, matricula, especialidad, *resto = elemento
+                duracion = resto[0] if resto else Turno.DURACION_PREDETERMINADA
+                turno = self._preparar_turno(fecha_hora, dni, matricula, especialidad, duracion, hoy, pendientes)
+            except (PacienteNoExisteError, MedicoNoExisteError, TurnoDuplicadoError, ValueError, TypeError) as e:
+                resultados.append(e)
+                errores.append((indice, e))
+                continue
+            for agendas, clave in ((pendientes[0], matricula), (pendientes[1], dni)):
+                agenda = agendas.get(clave)
+                if agenda is None:
+                    agenda = agendas[clave] = AgendaTurnos()
+                agenda.agregar(turno)
+            resultados.append(turno)
+            registros.append((turno, dni, matricula))
+        return resultados, registros, errores
+
+    def _preparar_turno(self, fecha_hora: datetime, dni: str, matricula: str, especialidad: Especialidad, duracion: int, hoy, pendientes=None) -> Turno:
+        paciente = self._paciente(dni)
+        if paciente is None:
             raise PacienteNoExisteError(f"No existe paciente con DNI {dni}")
     
-        if matricula not in self.__medicos__:
+        medico = self.__medicos__.get(matricula)
+        if medico is None:
             raise MedicoNoExisteError(f"No existe médico con matrícula {matricula}")
+
+        agendas_medico = [self._agenda_medico(matricula)]
+        agendas_paciente = [self._agenda_paciente(dni)]
+        if pendientes is not None:
+            agendas_medico.append(pendientes[0].get(matricula))
+            agendas_paciente.append(pendientes[1].get(dni))
     
-        paciente = self.__pacientes__[dni]
-        medico = self.__medicos__[matricula]
-    
-        # Verificar turno duplicado ANTES de validar la fecha
-        for turno in self.__turnos__:
-            # Verificar si es exactamente el mismo turno
-            if (turno.__fecha_hora__ == fecha_hora and 
-                turno.__paciente__ == paciente and 
-                turno.__medico__ == medico):
-                raise TurnoDuplicadoError(f"Ya existe un turno para {medico.get_nombre()} el {fecha_hora.strftime('%d/%m/%Y %H:%M')}")
+        # Verificar turno duplicado ANTES de validar la fecha (búsqueda binaria en la agenda del médico)
+        for agenda in agendas_medico:
+            if agenda is not None:
+                for turno in agenda.turnos_en(fecha_hora):
+                    # Por DNI: con un backend el paciente puede haberse releído de la base
+                    if turno.__paciente__.__dni__ == dni:
+                        raise TurnoDuplicadoError(f"Ya existe un turno para {medico.get_nombre()} el {fecha_hora.strftime('%d/%m/%Y %H:%M')}")
     
         # Validación de fecha
-        ahora = datetime.now()
-        if fecha_hora.date() < ahora.date():
+        if fecha_hora.date() < hoy:
             raise ValueError("No se pueden agendar turnos en el pasado")
 
-        # Crear y agregar el turno
-        turno = Turno(paciente, medico, fecha_hora, especialidad)
-        self.__turnos__.append(turno)
-    
-        # Agregar a historia clínica si existe
-        if dni in self.__historias_clinicas__:
-            self.__historias_clinicas__[dni].agregar_turno_a_lista(turno)
+        turno = Turno(paciente, medico, fecha_hora, especialidad, duracion)
+
+        # Superposición de intervalos en la agenda del médico y en la del paciente
+        for agenda in agendas_medico:
+            if agenda is not None and agenda.hay_superposicion(fecha_hora, turno.__fin__):
+                raise TurnoSuperpuestoError(f"El turno se superpone con otro turno de {medico.get_nombre()} el {fecha_hora.strftime('%d/%m/%Y %H:%M')}")
+        for agenda in agendas_paciente:
+            if agenda is not None and agenda.hay_superposicion(fecha_hora, turno.__fin__):
+                raise TurnoSuperpuestoError(f"El paciente {paciente.__nombre__} ya tiene un turno que se superpone con el {fecha_hora.strftime('%d/%m/%Y %H:%M')}")
+        return turno
 
-        return f'Turno para {paciente} con {medico} agregado.'
+    def _registrar_turnos(self, registros):
+        # registros: lista de (turno, dni, matricula) ya validados. Primero se escriben en el
+        # backend: si falla, ni las agendas ni las historias quedan con turnos sin guardar.
+        if self.__almacenamiento__ is not None and registros:
+            self.__almacenamiento__.guardar_turnos(registros)
+        por_historia: Dict[str, List[Turno]] = {}
+        for turno, dni, matricula in registros:
+            if self.__ocupacion__ is not None:
+                self.__ocupacion__.contar(matricula, turno.__especialidad__.__tipo__, turno.__fecha_hora__)
+            # Con un almacén columnar las agendas y las historias se leen de él
+            if self.__columnar__ is not None:
+                continue
+            # Con un backend sólo se actualizan las agendas en memoria; las demás ya incluyen
+            # el turno cuando se lean
+            for agendas, clave in ((self.__agendas_medicos__, matricula), (self.__agendas_pacientes__, dni)):
+                agenda = agendas.get(clave)
+                if agenda is None and self.__almacenamiento__ is None:
+                    agenda = agendas[clave] = AgendaTurnos()
+                if agenda is not None:
+                    agenda.agregar(turno)
+            por_historia.setdefault(dni, []).append(turno)
+        if self.__almacenamiento__ is None:
+            self.__turnos__.extend(turno for turno, _, _ in registros)
+
+        # Agregar a las historias clínicas en bloque
+        for dni, turnos in por_historia.items():
+            if dni in self.__historias_clinicas__:
+                self.__historias_clinicas__[dni].agregar_turnos(turnos)
+
+        # El evento va al final: registrarlo puede disparar un snapshot, que tiene que ver
+        # la operación completa
+        if self.__diario__ is not None and registros:
+            self._registrar_evento(["T", [[dni, matricula, turno.__fecha_hora__.isoformat(), turno.__duracion__, turno.__especialidad__.__tipo__]
+                                          for turno, dni, matricula in registros]])
     
+    def iter_turnos(self, desde: datetime = None, hasta: datetime = None, offset: int = 0, limit: int = None):
+        # Recorre los turnos en orden de registro sin construir listas intermedias
+        if self.__almacenamiento__ is not None:
+            return self._turnos_desde_filas(self.__almacenamiento__.iterar_turnos(desde, hasta, offset, limit))
+        if isinstance(self.__turnos__, AlmacenTurnosColumnar):
+            turnos = self.__turnos__.turnos_en_rango(desde, hasta)
+        elif desde is not None or hasta is not None:
+            turnos = (turno for turno in self.__turnos__
+                      if (desde is None or turno.__fecha_hora__ >= desde)
+                      and (hasta is None or turno.__fecha_hora__ < hasta))
+        else:
+            turnos = self.__turnos__
+        return islice(turnos, offset, None if limit is None else offset + limit)
+
     def obtener_turnos(self):
-        return f'Turnos programados: {self.__turnos__}'
+        return f'Turnos programados: {list(self.iter_turnos())}'
+
+    def obtener_turnos_medico(self, matricula: str) -> List[Turno]:
+        if matricula not in self.__medicos__:
+            raise MedicoNoExisteError(f"No existe médico con matrícula {matricula}")
+        agenda = self._agenda_medico(matricula)
+        return list(agenda) if agenda is not None else []
+
+    def consultar_turnos(self, matricula: str = None, dni: str = None, desde: datetime = None, hasta: datetime = None,
+                         descendente: bool = False, limite: int = None) -> List[Turno]:
+        # Turnos de un médico y/o de un paciente con desde <= fecha_hora < hasta, en orden
+        # cronológico (o inverso) y hasta 'limite' resultados. Usa las agendas ordenadas por
+        # fecha de cada médico y de cada paciente, así que no recorre el resto de los turnos.
+        if matricula is None and dni is None:
+            raise ValueError("Debe indicarse la matrícula del médico o el DNI del paciente.")
+        if matricula is not None and matricula not in self.__medicos__:
+            raise MedicoNoExisteError(f"No existe médico con matrícula {matricula}")
+        if dni is not None and self._paciente(dni) is None:
+            raise PacienteNoExisteError(f"No existe paciente con DNI {dni}")
+
+        agenda = self._agenda_paciente(dni) if dni is not None else self._agenda_medico(matricula)
+        if agenda is None:
+            return []
+        if dni is None or matricula is None:
+            return agenda.consultar(desde, hasta, descendente, limite)
+        # Con ambos se recorre la agenda del paciente, que suele ser la más corta
+        turnos = (turno for turno in agenda.consultar(desde, hasta, descendente)
+                  if turno.__medico__ is not None and turno.__medico__.__matricula__ == matricula)
+        return list(islice(turnos, limite))
+
+    #Ocupación
+    def _contadores_ocupacion(self) -> ContadoresOcupacion:
+        if self.__ocupacion__ is None:
+            self.__ocupacion__ = self._recalcular_ocupacion()
+        return self.__ocupacion__
+
+    def _recalcular_ocupacion(self) -> ContadoresOcupacion:
+        contadores = ContadoresOcupacion()
+        if self.__almacenamiento__ is not None:
+            # Alcanzan las filas: no hace falta armar turnos ni leer pacientes
+            for _, matricula, fecha_hora, _, tipo in self.__almacenamiento__.iterar_turnos():
+                if matricula in self.__medicos__:
+                    contadores.contar(matricula, tipo, fecha_hora)
+            return contadores
+        for turno in self.iter_turnos():
+            if turno.__medico__ is not None:
+                contadores.contar(turno.__medico__.__matricula__, turno.__especialidad__.__tipo__, turno.__fecha_hora__)
+        return contadores
+
+    def ocupacion(self, matricula: str, dia=None) -> int:
+        # Turnos del médico en total, en un día de la semana ("lunes" o 0-6) o en una fecha
+        if matricula not in self.__medicos__:
+            raise MedicoNoExisteError(f"No existe médico con matrícula {matricula}")
+        contadores = self._contadores_ocupacion()
+        if dia is None:
+            return contadores.obtener("medicos", matricula)
+        if isinstance(dia, datetime):
+            dia = dia.date()
+        if isinstance(dia, date):
+            return contadores.obtener("medico_fecha", (matricula, dia))
+        if isinstance(dia, str):
+            nombre = dia.strip().lower()
+            if nombre not in Especialidad.DIAS_VALIDOS:
+                raise ValueError(f"Día inválido: {dia}")
+            dia = Especialidad.DIAS_SEMANA.index(nombre)
+        if not 0 <= dia <= 6:
+            raise ValueError(f"Día inválido: {dia}")
+        return contadores.obtener("medico_dia_semana", (matricula, dia))
+
+    def ocupacion_especialidad(self, especialidad) -> int:
+        nombre = especialidad.__tipo__ if isinstance(especialidad, Especialidad) else especialidad
+        return self._contadores_ocupacion().obtener("especialidades", nombre.strip().lower())
+
+    def ocupacion_por_dia_semana(self) -> Dict[str, int]:
+        contadores = self._contadores_ocupacion()
+        return {nombre: contadores.obtener("dias_semana", dia) for dia, nombre in enumerate(Especialidad.DIAS_SEMANA)}
+
+    def ocupacion_por_hora(self) -> List[int]:
+        contadores = self._contadores_ocupacion()
+        return [contadores.obtener("horas", hora) for hora in range(24)]
+
+    def verificar_ocupacion(self) -> List[tuple]:
+        # Compara los contadores mantenidos con un recálculo sobre todos los turnos; devuelve
+        # las diferencias como (dimensión, clave, mantenido, recalculado), vacía si coinciden
+        return self._contadores_ocupacion().diferencias(self._recalcular_ocupacion())
+
+    def buscar_turnos_libres(self, especialidad, desde: datetime, hasta: datetime, limite: int = 10, duracion: int = Turno.DURACION_PREDETERMINADA):
+        # Une los huecos libres de cada médico de la especialidad en orden cronológico (heap)
+        # y se detiene apenas se obtienen 'limite' turnos
+        nombre = especialidad.__tipo__ if isinstance(especialidad, Especialidad) else especialidad
+        nombre = nombre.strip().lower()
+        matriculas = set()
+        for dia in range(7):
+            matriculas.update(self.__medicos_por_especialidad_dia__.get((nombre, dia), ()))
+        generadores = []
+        for matricula in matriculas:
+            especialidad_medico = self.__indice_medicos__[matricula][0][nombre]
+            generadores.append(self._huecos_libres(matricula, especialidad_medico, desde, hasta, duracion))
+        return islice(heapq.merge(*generadores), limite)
+
+    def _huecos_libres(self, matricula: str, especialidad: Especialidad, desde: datetime, hasta: datetime, duracion: int):
+        paso = timedelta(minutes=duracion)
+        agenda = self._agenda_medico(matricula)
+        dia = desde.replace(hour=0, minute=0, second=0, microsecond=0)
+        while dia < hasta:
+            if especialidad.atiende_dia_semana(dia.weekday()):
+                inicio = max(dia.replace(hour=self.HORA_APERTURA), desde)
+                cierre = min(dia.replace(hour=self.HORA_CIERRE), hasta)
+                while inicio + paso <= cierre:
+                    ocupados = agenda.superpuestos(inicio, inicio + paso) if agenda is not None else None
+                    if ocupados:
+                        # Saltar directamente al final del último turno que ocupa el hueco
+                        inicio = ocupados[-1].__fin__
+                        continue
+                    yield inicio, matricula
+                    inicio += paso
+            dia += timedelta(days=1)
+
+    def obtener_turnos_superpuestos(self, inicio: datetime, fin: datetime, matricula: str = None, dni: str = None) -> List[Turno]:
+        if matricula is not None:
+            agenda = self._agenda_medico(matricula)
+        elif dni is not None:
+            agenda = self._agenda_paciente(dni)
+        else:
+            raise ValueError("Debe indicarse la matrícula del médico o el DNI del paciente.")
+        return agenda.superpuestos(inicio, fin) if agenda is not None else []
 
     #Recetas e Historias Clínicas
     def emitir_receta(self, dni: str, matricula: str, medicamentos: List[str]):
-        # Validar que el paciente existe
-        if dni not in self.__pacientes__:
+        paciente, medico, _ = self._preparar_receta(dni, matricula, medicamentos)
+        # Recién validada se crea la receta, que interna sus nombres en Receta.CATALOGO
+        receta = Receta(paciente, medico, medicamentos)
+        self._registrar_recetas([(receta, dni, matricula)])
+        return f'Receta emitida para {receta.__paciente__} por {receta.__medico__}.'
+
+    def emitir_recetas_lote(self, recetas, todo_o_nada: bool = True) -> list:
+        # Cada elemento es (dni, matricula, medicamentos). Devuelve la Receta o la excepción de
+        # cada elemento, sin armar mensajes; las interacciones se verifican también contra las
+        # recetas anteriores del mismo lote. Con todo_o_nada, un error cancela el lote entero.
+        previos: Dict[str, Set[int]] = {}
+        resultados = []
+        validas = []
+        errores = []
+        for indice, elemento in enumerate(recetas):
+            try:
+                dni, matricula, medicamentos = elemento
+                paciente = self._paciente(dni)
+                if paciente is not None and dni not in previos:
+                    previos[dni] = self._canonicos_recientes(dni)
+                paciente, medico, canonicos = self._preparar_receta(dni, matricula, medicamentos, previos.get(dni), paciente)
+            except (PacienteNoExisteError, MedicoNoExisteError, RecetaInvalidaError, ValueError, TypeError) as e:
+                resultados.append(e)
+                errores.append((indice, e))
+                continue
+            previos[dni].update(canonicos)
+            resultados.append(None)
+            validas.append((indice, paciente, medico, medicamentos, dni, matricula))
+
+        if errores and todo_o_nada:
+            raise LoteInvalidoError(errores)
+        # Las recetas (y sus nombres en Receta.CATALOGO) se crean sólo para lo que se registra
+        registros = []
+        for indice, paciente, medico, medicamentos, dni, matricula in validas:
+            receta = resultados[indice] = Receta(paciente, medico, medicamentos)
+            registros.append((receta, dni, matricula))
+        self._registrar_recetas(registros)
+        return resultados
+
+    def _preparar_receta(self, dni: str, matricula: str, medicamentos: List[str], previos: Set[int] = None, paciente: Paciente = None):
+        # Valida la receta sin crearla ni internar sus nombres en Receta.CATALOGO: una receta
+        # rechazada no agranda el catálogo. Devuelve (paciente, médico, códigos canónicos de
+        # los nombres ya conocidos); los nuevos no pueden figurar en ninguna interacción.
+        # Validar que el paciente existe ('paciente' evita buscarlo si ya se resolvió)
+        if paciente is None:
+            paciente = self._paciente(dni)
+        if paciente is None:
             raise PacienteNoExisteError(f"No existe paciente con DNI {dni}")
     
         # Validar que el médico existe
-        if matricula not in self.__medicos__:
+        medico = self.__medicos__.get(matricula)
+        if medico is None:
             raise MedicoNoExisteError(f"No existe médico con matrícula {matricula}")
     
         # Validaciones para receta inválida
@@ -359,52 +1822,168 @@ class Clinica():
             if len(medicamento.strip()) < 2:
                 raise RecetaInvalidaError("Los nombres de medicamentos deben tener al menos 2 caracteres")
     
-        # Validar que no haya medicamentos duplicados
-        medicamentos_normalizados = [med.strip().lower() for med in medicamentos]
-        if len(medicamentos_normalizados) != len(set(medicamentos_normalizados)):
+        # Validar que no haya medicamentos duplicados (mismo nombre normalizado)
+        normalizados = {CatalogoMedicamentos.normalizar(medicamento) for medicamento in medicamentos}
+        if len(normalizados) != len(medicamentos):
             raise RecetaInvalidaError("La receta no puede contener medicamentos duplicados")
+
+        canonicos = Receta.CATALOGO.buscar_normalizados(normalizados)
+        self.validar_interacciones(dni, canonicos, previos=previos)
+        return paciente, medico, canonicos
+
+    def _registrar_recetas(self, registros):
+        # registros: lista de (receta, dni, matricula) ya validados
+        if self.__almacenamiento__ is not None and registros:
+            self.__almacenamiento__.guardar_recetas(registros)
+        por_historia: Dict[str, List[Receta]] = {}
+        eventos = []
+        for receta, dni, matricula in registros:
+            medicamentos = receta.__medicamentos__
+            self.__indice_medicamentos__.registrar(medicamentos)
+            por_historia.setdefault(dni, []).append(receta)
+            if self.__diario__ is not None:
+                eventos.append(["R", dni, matricula, receta.__fecha__.isoformat(), medicamentos])
+
+        # Agregar a las historias clínicas en bloque
+        for dni, recetas in por_historia.items():
+            historia = self.__historias_clinicas__.get(dni)
+            if historia is not None:
+                historia.agregar_recetas(recetas)
+
+        # Los eventos van al final, como en _registrar_turnos
+        for evento in eventos:
+            self._registrar_evento(evento)
     
-        # Si todas las validaciones pasan, crear la receta
-        paciente = self.__pacientes__[dni]
-        medico = self.__medicos__[matricula]
-        receta = Receta(paciente, medico, medicamentos)
-    
-        self.__historias_clinicas__[dni].agregar_receta_hist(receta)
-        return f'Receta emitida para {self.__pacientes__[dni]} por {self.__medicos__[matricula]}.'
-    
+    #Interacciones medicamentosas
+    def agregar_interaccion(self, medicamento_a: str, medicamento_b: str):
+        self.__reglas_interaccion__.agregar(medicamento_a, medicamento_b)
+
+    def cargar_interacciones(self, ruta: str) -> int:
+        return self.__reglas_interaccion__.cargar_csv(ruta)
+
+    def validar_interacciones(self, dni: str, canonicos: Set[int], fecha: datetime = None, previos: Set[int] = None):
+        # Compara los códigos canónicos nuevos entre sí y con los de las recetas del paciente
+        # de los últimos DIAS_VENTANA_INTERACCIONES días (o con 'previos' si ya se calcularon)
+        if not self.__reglas_interaccion__:
+            return
+        if previos is None:
+            previos = self._canonicos_recientes(dni, fecha)
+        par = self.__reglas_interaccion__.buscar(canonicos, previos)
+        if par is not None:
+            nombre_a, nombre_b = (Receta.CATALOGO.nombre(codigo) for codigo in par)
+            raise InteraccionMedicamentosaError(f"{nombre_a} no puede indicarse junto con {nombre_b} (interacción medicamentosa)")
+
+    def _canonicos_recientes(self, dni: str, fecha: datetime = None) -> Set[int]:
+        previos = set()
+        if not self.__reglas_interaccion__:
+            return previos
+        desde = (fecha or datetime.now()) - timedelta(days=self.DIAS_VENTANA_INTERACCIONES)
+        # Las recetas se agregan en orden cronológico: se recorren desde la más reciente
+        for receta in reversed(self.obtener_historia_clinica(dni).__recetas__):
+            if receta.__fecha__ < desde:
+                break
+            previos.update(Receta.CATALOGO.canonico(codigo) for codigo in receta.__codigos__)
+        return previos
+
+    def sugerir_medicamentos(self, prefijo: str, n: int = 5) -> List[str]:
+        return self.__indice_medicamentos__.sugerir(prefijo, n)
+
+    def frecuencia_medicamento(self, nombre: str) -> int:
+        return self.__indice_medicamentos__.frecuencia(nombre)
+
     def obtener_historia_clinica(self, dni: str) -> HistoriaClinica:
-        if dni not in self.__pacientes__:
-            raise PacienteNoExisteError(f"No existe paciente con DNI {dni}")
-        else:
-            return self.__historias_clinicas__[dni]
+        historia = self.__historias_clinicas__.get(dni)
+        if historia is None:
+            # La historia ya guarda a su paciente: no hace falta cachearlo también en __pacientes__
+            paciente = self._paciente(dni, cachear=False)
+            if paciente is None:
+                raise PacienteNoExisteError(f"No existe paciente con DNI {dni}")
+            # Con un backend la caché descarta la menos usada; sus datos siguen en el backend
+            historia = self.__historias_clinicas__[dni] = self._cargar_historia(paciente)
+        return historia
+
+    def _cargar_historia(self, paciente: Paciente) -> HistoriaClinica:
+        historia = HistoriaClinica(paciente)
+        if self.__almacenamiento__ is not None:
+            dni = paciente.__dni__
+            historia.agregar_turnos([self._turno_desde_fila(fila, paciente) for fila in self.__almacenamiento__.cargar_turnos_paciente(dni)])
+            for _, matricula, fecha, medicamentos in self.__almacenamiento__.cargar_recetas_paciente(dni):
+                historia.agregar_receta_hist(Receta(paciente, self.__medicos__.get(matricula), medicamentos, fecha))
+        return historia
     
+    #Exportación
+    def iter_registros_historias(self, dnis: Set[str] = None, desde: datetime = None, hasta: datetime = None, por_evento: bool = False):
+        # Genera un dict por paciente (o por turno/receta si por_evento) sin retener las historias
+        # ya recorridas: las que no estaban cargadas se arman sólo para exportarlas.
+        # El rango de fechas es [desde, hasta) sobre la fecha del turno o de la receta.
+        filtra_fechas = desde is not None or hasta is not None
+        for paciente in self._pacientes_para_exportar(dnis):
+            historia = self.__historias_clinicas__.get(paciente.__dni__) or self._cargar_historia(paciente)
+            turnos = (self._registro_turno(turno) for turno in historia.iter_turnos(desde, hasta) if turno is not None)
+            recetas = (self._registro_receta(receta) for receta in historia.iter_recetas(desde, hasta))
+            if por_evento:
+                for tipo, eventos in (("turno", turnos), ("receta", recetas)):
+                    for evento in eventos:
+                        yield {"tipo": tipo, "dni": paciente.__dni__, **evento}
+                continue
+            registro = {"dni": paciente.__dni__, "nombre": paciente.__nombre__,
+                        "fecha_nacimiento": paciente.__fecha_nacimiento__,
+                        "turnos": list(turnos), "recetas": list(recetas)}
+            if filtra_fechas and not registro["turnos"] and not registro["recetas"]:
+                continue
+            yield registro
+
+    def exportar_historias(self, destino, dnis: Set[str] = None, desde: datetime = None, hasta: datetime = None, por_evento: bool = False) -> int:
+        # destino: ruta de archivo o cualquier objeto con write(); devuelve la cantidad de líneas escritas
+        if isinstance(destino, str):
+            with open(destino, "w", encoding="utf-8") as archivo:
+                return self.exportar_historias(archivo, dnis, desde, hasta, por_evento)
+        lineas = 0
+        for registro in self.iter_registros_historias(dnis, desde, hasta, por_evento):
+            destino.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            lineas += 1
+        return lineas
+
+    def _pacientes_para_exportar(self, dnis: Set[str] = None):
+        if dnis is not None:
+            for dni in sorted(dnis):
+                paciente = self.__pacientes__.get(dni)
+                if paciente is None and self.__almacenamiento__ is not None:
+                    fila = self.__almacenamiento__.cargar_paciente(dni)
+                    paciente = Paciente._restaurar(*fila) if fila is not None else None
+                if paciente is not None:
+                    yield paciente
+        elif self.__almacenamiento__ is not None:
+            for fila in self.__almacenamiento__.cargar_pacientes():
+                yield self.__pacientes__.get(fila[0]) or Paciente._restaurar(*fila)
+        else:
+            yield from self.__pacientes__.values()
+
+    def _registro_turno(self, turno: Turno) -> dict:
+        medico = turno.__medico__
+        return {"fecha_hora": turno.__fecha_hora__.isoformat(), "duracion": turno.__duracion__,
+                "matricula": medico.__matricula__, "medico": medico.__nombre__,
+                "especialidad": turno.__especialidad__.__tipo__}
+
+    def _registro_receta(self, receta: Receta) -> dict:
+        medico = receta.__medico__
+        return {"fecha": receta.__fecha__.isoformat(), "matricula": medico.__matricula__,
+                "medico": medico.__nombre__, "medicamentos": list(receta.__medicamentos__)}
+
     #Validaciones y Utilidades
     def validar_existencia_paciente(self, dni: str) -> bool:
-        return dni in self.__pacientes__
+        return self._paciente(dni) is not None
     
     def validar_existencia_medico(self, matricula: str) -> bool:
         return matricula in self.__medicos__
     
     def validar_turno_no_duplicado(self, matricula: str, fecha_hora: datetime) -> bool:
-        for turno in self.__turnos__:
-            if (turno.__medico__.obtener_matricula() == matricula and 
-                turno.__fecha_hora__ == fecha_hora):
-                return False
-        return True
+        agenda = self._agenda_medico(matricula)
+        return agenda is None or not agenda.existe(fecha_hora)
     
     @staticmethod
     def obtener_dia_semana_en_espanol(fecha_hora: datetime) -> str:
-        dias_espanol = {
-        'monday': 'Lunes',
-        'tuesday': 'Martes', 
-        'wednesday': 'Miércoles',
-        'thursday': 'Jueves',
-        'friday': 'Viernes',
-        'saturday': 'Sábado',
-        'sunday': 'Domingo'
-    }
-        dia_ingles = fecha_hora.strftime('%A').lower()
-        return dias_espanol.get(dia_ingles, dia_ingles)
+        return Especialidad.DIAS_SEMANA[fecha_hora.weekday()].capitalize()
 
     def obtener_especialidad_disponible(self, matricula_medico: str, dia_semana: str, especialidad: Especialidad) -> str:
         # Buscar el médico por matrícula
@@ -412,6 +1991,11 @@ class Clinica():
         if not medico:
             return f"El médico con matrícula {matricula_medico} no está registrado."
 
+        # Camino rápido: consulta directa al índice (especialidad, día)
+        clave = (especialidad.__tipo__.strip().lower(), Especialidad.NUMERO_DIA.get(dia_semana.strip().lower()))
+        if matricula_medico in self.__medicos_por_especialidad_dia__.get(clave, ()):
+            return f"La especialidad '{especialidad.__tipo__}' del Dr. {medico.__nombre__} está disponible el día {dia_semana.capitalize()}."
+
         # Verificar si la especialidad está entre las especialidades del médico
         especialidades_medico = medico.__especialidades__  # lista de objetos Especialidad
         
@@ -423,7 +2007,7 @@ class Clinica():
                 break
 
         if not especialidad_encontrada:
-            return f"El Dr. {medico.__nombre__} no tiene la especialidad '{especialidad.nombre}' registrada."
+            return f"El Dr. {medico.__nombre__} no tiene la especialidad '{especialidad.__tipo__}' registrada."
 
         # Verificar si la especialidad está disponible en el día pedido
         if especialidad_encontrada.verificar_dia(dia_semana):
@@ -436,6 +2020,12 @@ class Clinica():
         # Verificar si el médico tiene la especialidad solicitada
         if not hasattr(medico, '__especialidades__'):
             return False
+
+        # Médico registrado: respuesta directa desde el índice (especialidad, día)
+        matricula = getattr(medico, '__matricula__', None)
+        if self.__medicos__.get(matricula) is medico:
+            clave = (especialidad_solicitada.strip().lower(), Especialidad.NUMERO_DIA.get(dia_semana.strip().lower()))
+            return matricula in self.__medicos_por_especialidad_dia__.get(clave, ())
             
         # Si el médico tiene múltiples especialidades (lista)
         if isinstance(medico.__especialidades__, list):
@@ -450,10 +2040,7 @@ class Clinica():
             if isinstance(esp, str):
                 if esp == especialidad_solicitada:
                     # Buscar el objeto especialidad en el sistema
-                    for esp_obj in self.__especialidades__:
-                        if esp_obj.__tipo__ == especialidad_solicitada:
-                            especialidad_encontrada = esp_obj
-                            break
+                    especialidad_encontrada = self.obtener_especialidad(especialidad_solicitada)
             elif hasattr(esp, '__tipo__'):
                 if esp.__tipo__ == especialidad_solicitada:
                     especialidad_encontrada = esp
@@ -470,6 +2057,7 @@ class Clinica():
         return f'Pacientes: {self.__pacientes__}\n Medicos: {self.__medicos__}\n Turnos: {self.__turnos__}'
     
 class CLI:
+    TAMANIO_PAGINA = 20
     
     def __init__(self):
         self.clinica = Clinica()
@@ -542,6 +2130,7 @@ class CLI:
             medicamentos_str = str(input("Medicamentos (separados por coma): "))
         
             medicamentos = [med.strip() for med in medicamentos_str.split(",")]
+            medicamentos = self.confirmar_medicamentos(medicamentos)
             resultado = self.clinica.emitir_receta(dni, matricula, medicamentos)
             print("Receta emitida exitosamente")
             print(resultado)
@@ -555,6 +2144,33 @@ class CLI:
         except RecetaInvalidaError as e:
             print(f"Error - Receta inválida: {e}")
     
+    def confirmar_medicamentos(self, medicamentos: List[str]) -> List[str]:
+        # Para nombres nunca prescriptos se sugieren los más usados que comparten el prefijo
+        # más largo posible (al menos 3 letras), para detectar errores de tipeo. El médico
+        # confirma el nombre (Enter), elige una sugerencia por número o escribe otro.
+        confirmados = []
+        for medicamento in medicamentos:
+            sugerencias = []
+            if self.clinica.frecuencia_medicamento(medicamento) == 0:
+                sugerencias = self.clinica.sugerir_medicamentos(medicamento, 3)
+                longitud = len(medicamento) - 1
+                while not sugerencias and longitud >= 3:
+                    sugerencias = self.clinica.sugerir_medicamentos(medicamento[:longitud], 3)
+                    longitud -= 1
+            if not sugerencias:
+                confirmados.append(medicamento)
+                continue
+            opciones = ", ".join(f"{numero}) {sugerencia}" for numero, sugerencia in enumerate(sugerencias, 1))
+            print(f"'{medicamento}' no fue prescripto antes. Sugerencias: {opciones}")
+            respuesta = input(f"Enter para mantener '{medicamento}', número de sugerencia u otro nombre: ").strip()
+            if not respuesta:
+                confirmados.append(medicamento)
+            elif respuesta.isdigit() and 1 <= int(respuesta) <= len(sugerencias):
+                confirmados.append(sugerencias[int(respuesta) - 1])
+            else:
+                confirmados.append(respuesta)
+        return confirmados
+
     def ver_historia_clinica(self):
         try:
             print("\n--- VER HISTORIA CLÍNICA ---")
@@ -568,13 +2184,20 @@ class CLI:
 
     def ver_todos_los_turnos(self):
         print("\n--- TODOS LOS TURNOS ---")
-        turnos = self.clinica.obtener_turnos()
-        
-        if turnos:
-            for i, turno in enumerate(turnos, 1):
+        offset = 0
+        while True:
+            # Se pide un turno de más para saber si hay otra página
+            pagina = list(self.clinica.iter_turnos(offset=offset, limit=self.TAMANIO_PAGINA + 1))
+            if not pagina and offset == 0:
+                print("No hay turnos registrados")
+                return
+            for i, turno in enumerate(pagina[:self.TAMANIO_PAGINA], offset + 1):
                 print(f"{i}. {turno}")
-        else:
-            print("No hay turnos registrados")
+            if len(pagina) <= self.TAMANIO_PAGINA:
+                return
+            offset += self.TAMANIO_PAGINA
+            if str(input("Presione Enter para ver más turnos o 'q' para volver: ")).strip().lower() == "q":
+                return
     
     def ver_todos_los_pacientes(self):
         print("\n--- TODOS LOS PACIENTES ---")
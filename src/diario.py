@@ -0,0 +1,101 @@
+import json
+import os
+import pickle
+
+class DiarioEventos:
+    #Diario de eventos de solo agregado para Clinica. Cada operación que modifica la
+    #clínica se escribe como un arreglo JSON compacto por línea ([secuencia, tipo, ...]).
+    #Las escrituras se agrupan: se hace fsync cada "eventos_por_sync" eventos o al llamar
+    #a sincronizar(). Cada "eventos_por_snapshot" eventos la clínica completa se guarda en
+    #un snapshot y el diario se vacía, así el arranque sólo repite la cola posterior.
+
+    ARCHIVO_EVENTOS = "eventos.jsonl"
+    ARCHIVO_SNAPSHOT = "snapshot.pickle"
+
+    def __init__(self, directorio: str, eventos_por_sync: int = 64, eventos_por_snapshot: int = 10_000):
+        if eventos_por_sync <= 0 or eventos_por_snapshot <= 0:
+            raise ValueError("Los intervalos de sincronización y snapshot deben ser positivos")
+        os.makedirs(directorio, exist_ok=True)
+        self.__ruta_eventos__ = os.path.join(directorio, self.ARCHIVO_EVENTOS)
+        self.__ruta_snapshot__ = os.path.join(directorio, self.ARCHIVO_SNAPSHOT)
+        self.__eventos_por_sync__ = eventos_por_sync
+        self.__eventos_por_snapshot__ = eventos_por_snapshot
+        self.__secuencia__ = 0
+        self.__pendientes__ = 0
+        self.__desde_snapshot__ = 0
+        self.__archivo__ = None
+
+    #Escritura
+    def registrar(self, evento: list) -> bool:
+        # Devuelve True cuando corresponde tomar un snapshot
+        self.__secuencia__ += 1
+        self.__archivo__.write(json.dumps([self.__secuencia__, *evento], ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.__pendientes__ += 1
+        self.__desde_snapshot__ += 1
+        if self.__pendientes__ >= self.__eventos_por_sync__:
+            self.sincronizar()
+        return self.__desde_snapshot__ >= self.__eventos_por_snapshot__
+
+    def sincronizar(self):
+        if self.__archivo__ is not None and self.__pendientes__:
+            self.__archivo__.flush()
+            os.fsync(self.__archivo__.fileno())
+            self.__pendientes__ = 0
+
+    def guardar_snapshot(self, clinica):
+        # Se escribe en un temporal y se reemplaza de forma atómica; recién después se vacía
+        # el diario. Si el proceso se corta en el medio, la secuencia guardada en el snapshot
+        # evita repetir eventos que ya estaban incluidos.
+        self.sincronizar()
+        temporal = self.__ruta_snapshot__ + ".tmp"
+        with open(temporal, "wb") as archivo:
+            pickle.dump((self.__secuencia__, clinica), archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self.__ruta_snapshot__)
+        self.__archivo__.close()
+        self.__archivo__ = open(self.__ruta_eventos__, "w", encoding="utf-8")
+        os.fsync(self.__archivo__.fileno())
+        self.__desde_snapshot__ = 0
+
+    #Lectura
+    def cargar_snapshot(self):
+        # Devuelve (secuencia, clinica) o (0, None) si todavía no hay snapshot
+        if not os.path.exists(self.__ruta_snapshot__):
+            return 0, None
+        with open(self.__ruta_snapshot__, "rb") as archivo:
+            return pickle.load(archivo)
+
+    def eventos(self, desde_secuencia: int = 0):
+        # Recorre los eventos posteriores a la secuencia indicada. Una última línea
+        # incompleta (corte durante la escritura) se descarta y se recorta del archivo.
+        self.__secuencia__ = desde_secuencia
+        if not os.path.exists(self.__ruta_eventos__):
+            return
+        valido = 0
+        with open(self.__ruta_eventos__, "rb") as archivo:
+            for linea in archivo:
+                try:
+                    evento = json.loads(linea)
+                except ValueError:
+                    break
+                if not linea.endswith(b"\n"):
+                    break
+                valido += len(linea)
+                if evento[0] <= desde_secuencia:
+                    continue
+                self.__secuencia__ = evento[0]
+                self.__desde_snapshot__ += 1
+                yield evento[1:]
+        if valido < os.path.getsize(self.__ruta_eventos__):
+            os.truncate(self.__ruta_eventos__, valido)
+
+    def abrir(self):
+        if self.__archivo__ is None:
+            self.__archivo__ = open(self.__ruta_eventos__, "a", encoding="utf-8")
+
+    def cerrar(self):
+        if self.__archivo__ is not None:
+            self.sincronizar()
+            self.__archivo__.close()
+            self.__archivo__ = None
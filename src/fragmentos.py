@@ -0,0 +1,268 @@
+import heapq
+import multiprocessing
+import os
+import zlib
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, List
+
+from src.clinica import (Clinica, Especialidad, AgendaTurnos, Turno, TurnoDuplicadoError, TurnoSuperpuestoError)
+
+class _Reserva:
+    __slots__ = ("__dni__", "__fecha_hora__", "__fin__")
+
+    def __init__(self, dni: str, fecha_hora: datetime, duracion: int):
+        self.__dni__ = dni
+        self.__fecha_hora__ = fecha_hora
+        self.__fin__ = fecha_hora + timedelta(minutes=duracion)
+
+class _ReservasMedicos:
+    #Agenda completa de los médicos cuyo fragmento dueño es este proceso. Cada turno se
+    #reserva acá antes de agendarse en el fragmento del paciente, así dos fragmentos no
+    #pueden dar el mismo horario de un médico a pacientes distintos.
+    def __init__(self):
+        self.__agendas__: Dict[str, AgendaTurnos] = {}
+
+    def reservar(self, matricula: str, fecha_hora: datetime, duracion: int, dni: str):
+        agenda = self.__agendas__.setdefault(matricula, AgendaTurnos())
+        reserva = _Reserva(dni, fecha_hora, duracion)
+        superpuestas = agenda.superpuestos(fecha_hora, reserva.__fin__)
+        if any(otra.__fecha_hora__ == fecha_hora and otra.__dni__ == dni for otra in superpuestas):
+            raise TurnoDuplicadoError(f"Ya existe un turno para el médico {matricula} el {fecha_hora.strftime('%d/%m/%Y %H:%M')}")
+        if superpuestas:
+            raise TurnoSuperpuestoError(f"El turno se superpone con otro turno del médico {matricula} el {fecha_hora.strftime('%d/%m/%Y %H:%M')}")
+        agenda.agregar(reserva)
+
+    def liberar(self, matricula: str, fecha_hora: datetime, dni: str):
+        agenda = self.__agendas__.get(matricula)
+        if agenda is None:
+            return
+        for reserva in agenda.turnos_en(fecha_hora):
+            if reserva.__dni__ == dni:
+                agenda.quitar(reserva)
+                return
+
+def _especialidad_local(clinica: Clinica, especialidad):
+    # La especialidad llega copiada desde el proceso principal; se usa la registrada en el fragmento
+    if isinstance(especialidad, Especialidad):
+        return clinica.obtener_especialidad(especialidad.__tipo__) or especialidad
+    return especialidad
+
+def _ejecutar(clinica: Clinica, reservas: _ReservasMedicos, operacion: str, argumentos: tuple):
+    if operacion == "reservar":
+        return reservas.reservar(*argumentos)
+    if operacion == "liberar":
+        return reservas.liberar(*argumentos)
+    if operacion == "agendar_turno":
+        fecha_hora, dni, matricula, especialidad, duracion = argumentos
+        return clinica.agendar_turno(fecha_hora, dni, matricula, _especialidad_local(clinica, especialidad), duracion)
+    if operacion in ("validar_turnos_lote", "agendar_turnos_lote"):
+        turnos = [(fecha_hora, dni, matricula, _especialidad_local(clinica, especialidad), duracion)
+                  for fecha_hora, dni, matricula, especialidad, duracion in argumentos[0]]
+        if operacion == "validar_turnos_lote":
+            resultados = clinica._validar_turnos_lote(turnos)[0]
+        else:
+            resultados = clinica.agendar_turnos_lote(turnos, todo_o_nada=False)
+        # Sólo viajan de vuelta las excepciones; devolver cada Turno serializaría su paciente y médico
+        return [resultado if isinstance(resultado, Exception) else None for resultado in resultados]
+    if operacion not in ClinicaFragmentada.OPERACIONES:
+        raise ValueError(f"Operación no permitida en un fragmento: {operacion}")
+    return getattr(clinica, operacion)(*argumentos)
+
+def _trabajador(conexion):
+    # Cada mensaje es una lista de (operación, argumentos); se responde con la lista de
+    # resultados en el mismo orden, con la excepción en lugar del resultado si falló
+    clinica = Clinica()
+    reservas = _ReservasMedicos()
+    while True:
+        lote = conexion.recv()
+        if lote is None:
+            break
+        resultados = []
+        for operacion, argumentos in lote:
+            try:
+                resultados.append(_ejecutar(clinica, reservas, operacion, argumentos))
+            except Exception as error:
+                resultados.append(error)
+        conexion.send(resultados)
+    conexion.close()
+
+class ClinicaFragmentada:
+    #Frente de una clínica repartida en varios procesos. Los pacientes (con sus turnos,
+    #recetas e historias) viven en el fragmento crc32(dni) % N; médicos y especialidades se
+    #replican en todos. Cada médico tiene además un fragmento dueño, crc32(matrícula) % N,
+    #que guarda las reservas de su agenda completa y rechaza superposiciones entre fragmentos.
+
+    OPERACIONES = {"agregar_paciente", "agregar_medico", "agregar_especialidad", "emitir_receta",
+                   "obtener_historia_clinica", "validar_existencia_paciente", "obtener_turnos_medico",
+                   "consultar_turnos"}
+
+    def __init__(self, fragmentos: int = None):
+        cantidad = fragmentos or os.cpu_count() or 1
+        if cantidad <= 0:
+            raise ValueError("La cantidad de fragmentos debe ser positiva")
+        self.__conexiones__ = []
+        self.__procesos__ = []
+        for _ in range(cantidad):
+            propia, remota = multiprocessing.Pipe()
+            proceso = multiprocessing.Process(target=_trabajador, args=(remota,), daemon=True)
+            proceso.start()
+            remota.close()
+            self.__conexiones__.append(propia)
+            self.__procesos__.append(proceso)
+
+    def fragmento_de(self, clave: str) -> int:
+        return zlib.crc32(clave.encode("utf-8")) % len(self.__conexiones__)
+
+    #Comunicación con los fragmentos
+    def _enviar(self, por_fragmento: Dict[int, list]) -> Dict[int, list]:
+        # Se envía a todos antes de esperar respuestas, así los fragmentos trabajan en paralelo
+        for fragmento, lote in por_fragmento.items():
+            self.__conexiones__[fragmento].send(lote)
+        return {fragmento: self.__conexiones__[fragmento].recv() for fragmento in por_fragmento}
+
+    def _llamar(self, fragmento: int, operacion: str, *argumentos):
+        resultado = self._enviar({fragmento: [(operacion, argumentos)]})[fragmento][0]
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+    def _difundir(self, operacion: str, *argumentos):
+        respuestas = self._enviar({fragmento: [(operacion, argumentos)] for fragmento in range(len(self.__conexiones__))})
+        for resultados in respuestas.values():
+            if isinstance(resultados[0], Exception):
+                raise resultados[0]
+
+    def _repartir(self, operaciones: List[tuple], claves: List[str]) -> list:
+        # Agrupa las operaciones por fragmento en un único mensaje cada uno y devuelve los
+        # resultados en el orden original
+        por_fragmento: Dict[int, list] = {}
+        posiciones: Dict[int, List[int]] = {}
+        for posicion, (operacion, clave) in enumerate(zip(operaciones, claves)):
+            fragmento = self.fragmento_de(clave)
+            por_fragmento.setdefault(fragmento, []).append(operacion)
+            posiciones.setdefault(fragmento, []).append(posicion)
+        resultados = [None] * len(operaciones)
+        for fragmento, respuestas in self._enviar(por_fragmento).items():
+            for posicion, resultado in zip(posiciones[fragmento], respuestas):
+                resultados[posicion] = resultado
+        return resultados
+
+    #Registro
+    def agregar_especialidad(self, especialidad: Especialidad):
+        self._difundir("agregar_especialidad", especialidad)
+
+    def agregar_medico(self, medico):
+        self._difundir("agregar_medico", medico)
+
+    def agregar_paciente(self, paciente):
+        self._llamar(self.fragmento_de(paciente.__dni__), "agregar_paciente", paciente)
+
+    def agregar_pacientes(self, pacientes) -> list:
+        # Devuelve None o la excepción de cada paciente, en orden
+        pacientes = list(pacientes)
+        return self._repartir([("agregar_paciente", (paciente,)) for paciente in pacientes],
+                              [paciente.__dni__ for paciente in pacientes])
+
+    #Turnos
+    def agendar_turno(self, fecha_hora: datetime, dni: str, matricula: str, especialidad: Especialidad, duracion: int = Turno.DURACION_PREDETERMINADA):
+        # Primero se valida en el fragmento del paciente, así un turno inválido no llega a
+        # ocupar el horario del médico
+        elemento = (fecha_hora, dni, matricula, especialidad, duracion)
+        error = self._llamar(self.fragmento_de(dni), "validar_turnos_lote", [elemento])[0]
+        if error is not None:
+            raise error
+        dueno_medico = self.fragmento_de(matricula)
+        self._llamar(dueno_medico, "reservar", matricula, fecha_hora, duracion, dni)
+        try:
+            return self._llamar(self.fragmento_de(dni), "agendar_turno", fecha_hora, dni, matricula, especialidad, duracion)
+        except Exception:
+            self._llamar(dueno_medico, "liberar", matricula, fecha_hora, dni)
+            raise
+
+    def agendar_turnos_lote(self, turnos) -> list:
+        # Como Clinica.agendar_turnos_lote(todo_o_nada=False), pero con None en lugar del Turno
+        # para los elementos agendados. Las cuatro fases (validar en el fragmento del paciente,
+        # reservar, agendar, liberar fallidos) viajan en un mensaje por fragmento.
+        elementos = []
+        for fecha_hora, dni, matricula, especialidad, *resto in turnos:
+            elementos.append((fecha_hora, dni, matricula, especialidad, resto[0] if resto else Turno.DURACION_PREDETERMINADA))
+
+        resultados = self._lote_por_paciente("validar_turnos_lote", elementos, range(len(elementos)), [None] * len(elementos))
+        validos = [posicion for posicion, resultado in enumerate(resultados) if resultado is None]
+
+        reservas = self._repartir([("reservar", (elementos[p][2], elementos[p][0], elementos[p][4], elementos[p][1])) for p in validos],
+                                  [elementos[p][2] for p in validos])
+        for posicion, resultado in zip(validos, reservas):
+            resultados[posicion] = resultado
+        reservados = [posicion for posicion in validos if not isinstance(resultados[posicion], Exception)]
+
+        self._lote_por_paciente("agendar_turnos_lote", elementos, reservados, resultados)
+
+        fallidos = [posicion for posicion in reservados if isinstance(resultados[posicion], Exception)]
+        if fallidos:
+            self._repartir([("liberar", (elementos[p][2], elementos[p][0], elementos[p][1])) for p in fallidos],
+                           [elementos[p][2] for p in fallidos])
+        return resultados
+
+    def _lote_por_paciente(self, operacion: str, elementos: list, posiciones, resultados: list) -> list:
+        # Envía los elementos indicados como un sub-lote por fragmento de paciente y guarda en
+        # 'resultados' la respuesta de cada uno
+        por_fragmento: Dict[int, List[int]] = {}
+        for posicion in posiciones:
+            por_fragmento.setdefault(self.fragmento_de(elementos[posicion][1]), []).append(posicion)
+        respuestas = self._enviar({fragmento: [(operacion, ([elementos[p] for p in posiciones],))]
+                                   for fragmento, posiciones in por_fragmento.items()})
+        for fragmento, posiciones in por_fragmento.items():
+            respuesta = respuestas[fragmento][0]
+            if isinstance(respuesta, Exception):
+                respuesta = [respuesta] * len(posiciones)
+            for posicion, resultado in zip(posiciones, respuesta):
+                resultados[posicion] = resultado
+        return resultados
+
+    #Recetas
+    def emitir_receta(self, dni: str, matricula: str, medicamentos: List[str]):
+        return self._llamar(self.fragmento_de(dni), "emitir_receta", dni, matricula, medicamentos)
+
+    def emitir_recetas(self, recetas) -> list:
+        # recetas: iterable de (dni, matricula, medicamentos); devuelve el mensaje o la excepción de cada una
+        recetas = list(recetas)
+        return self._repartir([("emitir_receta", receta) for receta in recetas], [receta[0] for receta in recetas])
+
+    #Consultas
+    def validar_existencia_paciente(self, dni: str) -> bool:
+        return self._llamar(self.fragmento_de(dni), "validar_existencia_paciente", dni)
+
+    def obtener_historia_clinica(self, dni: str):
+        return self._llamar(self.fragmento_de(dni), "obtener_historia_clinica", dni)
+
+    def obtener_turnos_medico(self, matricula: str) -> List[Turno]:
+        respuestas = self._enviar({fragmento: [("obtener_turnos_medico", (matricula,))] for fragmento in range(len(self.__conexiones__))})
+        turnos = [turno for resultados in respuestas.values() for turno in resultados[0]]
+        return sorted(turnos, key=lambda turno: turno.__fecha_hora__)
+
+    def consultar_turnos(self, matricula: str = None, dni: str = None, desde: datetime = None, hasta: datetime = None,
+                         descendente: bool = False, limite: int = None) -> List[Turno]:
+        argumentos = (matricula, dni, desde, hasta, descendente, limite)
+        if dni is not None:
+            return self._llamar(self.fragmento_de(dni), "consultar_turnos", *argumentos)
+        # Los turnos de un médico están repartidos: cada fragmento devuelve su parte ya ordenada
+        # y recortada a 'limite', y acá se intercalan
+        respuestas = self._enviar({fragmento: [("consultar_turnos", argumentos)] for fragmento in range(len(self.__conexiones__))})
+        partes = []
+        for resultados in respuestas.values():
+            if isinstance(resultados[0], Exception):
+                raise resultados[0]
+            partes.append(resultados[0])
+        turnos = heapq.merge(*partes, key=lambda turno: turno.__fecha_hora__, reverse=descendente)
+        return list(islice(turnos, limite))
+
+    def cerrar(self):
+        for conexion in self.__conexiones__:
+            conexion.send(None)
+            conexion.close()
+        for proceso in self.__procesos__:
+            proceso.join()
+        self.__conexiones__ = []
+        self.__procesos__ = []
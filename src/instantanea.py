@@ -0,0 +1,270 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+from src.almacenamiento import Almacenamiento
+
+class InstantaneaSoloLecturaError(Exception):
+    pass
+
+#Formato binario de la instantánea (versión 1)
+#  Encabezado: MAGIA, versión (uint32) y una tabla con (desplazamiento, cantidad) por sección.
+#  Cada sección es una columna de ancho fijo alineada a 8 bytes. Los textos se guardan una
+#  sola vez en una tabla de cadenas ordenada, de modo que el índice de una cadena respeta el
+#  orden alfabético y las columnas de DNI y matrícula se pueden buscar por bisección.
+MAGIA = b"CLINICA\0"
+VERSION = 1
+SECCIONES = (
+    ("cadenas_inicio", "Q"), ("cadenas_datos", "B"),
+    ("paciente_dni", "I"), ("paciente_nombre", "I"), ("paciente_nacimiento", "I"),
+    ("medico_matricula", "I"), ("medico_nombre", "I"), ("medico_especialidades", "I"),
+    ("especialidad_tipo", "I"), ("especialidad_dias", "I"),
+    ("turno_dni", "I"), ("turno_matricula", "I"), ("turno_inicio", "q"), ("turno_duracion", "I"), ("turno_especialidad", "I"),
+    ("turnos_por_medico", "I"), ("turnos_por_paciente", "I"),
+    ("receta_dni", "I"), ("receta_matricula", "I"), ("receta_fecha", "q"), ("receta_medicamentos", "I"),
+    ("recetas_por_paciente", "I"),
+)
+ENCABEZADO = struct.Struct(f"<8sI{len(SECCIONES) * 2}Q")
+EPOCA = datetime(1970, 1, 1)
+
+def _microsegundos(fecha: datetime) -> int:
+    return (fecha - EPOCA) // timedelta(microseconds=1)
+
+def escribir_instantanea(clinica, ruta: str):
+    # Vuelca la clínica completa a una instantánea; se escribe en un temporal y se reemplaza
+    pacientes = sorted(clinica.obtener_pacientes(), key=lambda paciente: paciente.__dni__)
+    medicos = clinica.obtener_medicos()
+    especialidades = list(clinica.__especialidades__)
+    turnos = list(clinica.iter_turnos())
+    recetas = [receta for paciente in pacientes
+               for receta in clinica.obtener_historia_clinica(paciente.__dni__).iter_recetas()]
+
+    filas_especialidades = []
+    for medico in medicos:
+        propias = medico.__especialidades__ if isinstance(medico.__especialidades__, list) else [medico.__especialidades__]
+        filas_especialidades.append(json.dumps([[esp, None] if isinstance(esp, str) else [esp.__tipo__, list(esp.__dias__ or [])]
+                                                for esp in propias], ensure_ascii=False))
+    dias_especialidades = [json.dumps(list(esp.__dias__ or []), ensure_ascii=False) for esp in especialidades]
+    medicamentos = [json.dumps(list(receta.__medicamentos__), ensure_ascii=False) for receta in recetas]
+
+    cadenas = set(filas_especialidades) | set(dias_especialidades) | set(medicamentos)
+    for paciente in pacientes:
+        cadenas.update((paciente.__dni__, paciente.__nombre__, paciente.__fecha_nacimiento__))
+    for medico in medicos:
+        cadenas.update((medico.__matricula__, medico.__nombre__))
+    cadenas.update(esp.__tipo__ for esp in especialidades)
+    cadenas.update(turno.__especialidad__.__tipo__ for turno in turnos)
+    cadenas.update(turno.__paciente__.__dni__ for turno in turnos)
+    cadenas.update(turno.__medico__.__matricula__ for turno in turnos)
+    cadenas.update(receta.__medico__.__matricula__ for receta in recetas)
+    cadenas = sorted(cadenas)
+    indice = {cadena: posicion for posicion, cadena in enumerate(cadenas)}
+
+    datos = bytearray()
+    inicios = array("Q", [0])
+    for cadena in cadenas:
+        datos += cadena.encode("utf-8")
+        inicios.append(len(datos))
+
+    columnas = {
+        "cadenas_inicio": inicios,
+        "cadenas_datos": array("B", datos),
+        "paciente_dni": array("I", (indice[p.__dni__] for p in pacientes)),
+        "paciente_nombre": array("I", (indice[p.__nombre__] for p in pacientes)),
+        "paciente_nacimiento": array("I", (indice[p.__fecha_nacimiento__] for p in pacientes)),
+        "medico_matricula": array("I", (indice[m.__matricula__] for m in medicos)),
+        "medico_nombre": array("I", (indice[m.__nombre__] for m in medicos)),
+        "medico_especialidades": array("I", (indice[fila] for fila in filas_especialidades)),
+        "especialidad_tipo": array("I", (indice[esp.__tipo__] for esp in especialidades)),
+        "especialidad_dias": array("I", (indice[dias] for dias in dias_especialidades)),
+        "turno_dni": array("I", (indice[t.__paciente__.__dni__] for t in turnos)),
+        "turno_matricula": array("I", (indice[t.__medico__.__matricula__] for t in turnos)),
+        "turno_inicio": array("q", (_microsegundos(t.__fecha_hora__) for t in turnos)),
+        "turno_duracion": array("I", (t.__duracion__ for t in turnos)),
+        "turno_especialidad": array("I", (indice[t.__especialidad__.__tipo__] for t in turnos)),
+        "receta_dni": array("I", (indice[r.__paciente__.__dni__] for r in recetas)),
+        "receta_matricula": array("I", (indice[r.__medico__.__matricula__] for r in recetas)),
+        "receta_fecha": array("q", (_microsegundos(r.__fecha__) for r in recetas)),
+        "receta_medicamentos": array("I", (indice[meds] for meds in medicamentos)),
+    }
+    # Permutaciones ordenadas por (clave, fecha) para buscar los turnos de un médico o paciente
+    for nombre, clave in (("turnos_por_medico", "turno_matricula"), ("turnos_por_paciente", "turno_dni")):
+        claves, inicio = columnas[clave], columnas["turno_inicio"]
+        columnas[nombre] = array("I", sorted(range(len(turnos)), key=lambda i: (claves[i], inicio[i])))
+    # Las recetas ya están agrupadas por paciente en orden de DNI
+    columnas["recetas_por_paciente"] = array("I", range(len(recetas)))
+
+    tabla, cuerpo = [], bytearray()
+    desplazamiento = ENCABEZADO.size
+    for nombre, _ in SECCIONES:
+        contenido = columnas[nombre].tobytes()
+        relleno = -len(contenido) % 8
+        tabla += [desplazamiento, len(columnas[nombre])]
+        cuerpo += contenido + b"\0" * relleno
+        desplazamiento += len(contenido) + relleno
+
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as archivo:
+        archivo.write(ENCABEZADO.pack(MAGIA, VERSION, *tabla))
+        archivo.write(cuerpo)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+
+class InstantaneaBinaria(Almacenamiento):
+    #Backend de solo lectura sobre una instantánea mapeada en memoria. Las columnas se leen
+    #sin copiar desde el mmap y cada fila se decodifica recién cuando la clínica la pide.
+
+    def __init__(self, ruta: str):
+        with open(ruta, "rb") as archivo:
+            self.__mapa__ = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, version, *tabla = ENCABEZADO.unpack_from(self.__mapa__)
+        if magia != MAGIA:
+            self.__mapa__.close()
+            raise ValueError(f"{ruta} no es una instantánea de la clínica")
+        if version != VERSION:
+            self.__mapa__.close()
+            raise ValueError(f"Versión de instantánea no soportada: {version}")
+        vista = memoryview(self.__mapa__)
+        self.__columnas__ = {}
+        for posicion, (nombre, tipo) in enumerate(SECCIONES):
+            desplazamiento, cantidad = tabla[2 * posicion], tabla[2 * posicion + 1]
+            tamanio = cantidad * struct.calcsize(tipo)
+            self.__columnas__[nombre] = vista[desplazamiento:desplazamiento + tamanio].cast(tipo)
+        self.__vista__ = vista
+
+    #Cadenas
+    def _cadena(self, indice: int) -> str:
+        inicios = self.__columnas__["cadenas_inicio"]
+        return str(self.__columnas__["cadenas_datos"][inicios[indice]:inicios[indice + 1]], "utf-8")
+
+    def _indice_cadena(self, cadena: str):
+        # Bisección sobre la tabla ordenada decodificando sólo las cadenas que se comparan
+        bajo, alto = 0, len(self.__columnas__["cadenas_inicio"]) - 1
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if self._cadena(medio) < cadena:
+                bajo = medio + 1
+            else:
+                alto = medio
+        if bajo < len(self.__columnas__["cadenas_inicio"]) - 1 and self._cadena(bajo) == cadena:
+            return bajo
+        return None
+
+    def _fecha(self, microsegundos: int) -> datetime:
+        return EPOCA + timedelta(microseconds=microsegundos)
+
+    #Pacientes
+    def cargar_paciente(self, dni: str):
+        indice = self._indice_cadena(dni)
+        if indice is None:
+            return None
+        columna = self.__columnas__["paciente_dni"]
+        posicion = bisect_left(columna, indice)
+        if posicion == len(columna) or columna[posicion] != indice:
+            return None
+        return self._fila_paciente(posicion)
+
+    def _fila_paciente(self, posicion: int):
+        return (self._cadena(self.__columnas__["paciente_dni"][posicion]),
+                self._cadena(self.__columnas__["paciente_nombre"][posicion]),
+                self._cadena(self.__columnas__["paciente_nacimiento"][posicion]))
+
+    def cargar_pacientes(self):
+        for posicion in range(len(self.__columnas__["paciente_dni"])):
+            yield self._fila_paciente(posicion)
+
+    #Médicos y especialidades
+    def cargar_medicos(self):
+        columnas = self.__columnas__
+        for posicion in range(len(columnas["medico_matricula"])):
+            yield (self._cadena(columnas["medico_matricula"][posicion]),
+                   self._cadena(columnas["medico_nombre"][posicion]),
+                   json.loads(self._cadena(columnas["medico_especialidades"][posicion])))
+
+    def cargar_especialidades(self):
+        columnas = self.__columnas__
+        for posicion in range(len(columnas["especialidad_tipo"])):
+            yield self._cadena(columnas["especialidad_tipo"][posicion]), json.loads(self._cadena(columnas["especialidad_dias"][posicion]))
+
+    #Turnos
+    def _fila_turno(self, posicion: int):
+        columnas = self.__columnas__
+        return (self._cadena(columnas["turno_dni"][posicion]),
+                self._cadena(columnas["turno_matricula"][posicion]),
+                self._fecha(columnas["turno_inicio"][posicion]),
+                columnas["turno_duracion"][posicion],
+                self._cadena(columnas["turno_especialidad"][posicion]))
+
+    def _turnos_de(self, permutacion: str, columna: str, clave: str):
+        indice = self._indice_cadena(clave)
+        if indice is None:
+            return
+        orden, claves = self.__columnas__[permutacion], self.__columnas__[columna]
+        inicio = bisect_left(orden, indice, key=claves.__getitem__)
+        fin = bisect_right(orden, indice, lo=inicio, key=claves.__getitem__)
+        for posicion in orden[inicio:fin]:
+            yield self._fila_turno(posicion)
+
+    def cargar_turnos_medico(self, matricula: str):
+        return self._turnos_de("turnos_por_medico", "turno_matricula", matricula)
+
+    def cargar_turnos_paciente(self, dni: str):
+        return self._turnos_de("turnos_por_paciente", "turno_dni", dni)
+
+    def iterar_turnos(self, desde: datetime = None, hasta: datetime = None, offset: int = 0, limit: int = None):
+        inicio = self.__columnas__["turno_inicio"]
+        minimo = _microsegundos(desde) if desde is not None else None
+        maximo = _microsegundos(hasta) if hasta is not None else None
+        salteados = entregados = 0
+        for posicion in range(len(inicio)):
+            if limit is not None and entregados >= limit:
+                return
+            valor = inicio[posicion]
+            if (minimo is not None and valor < minimo) or (maximo is not None and valor >= maximo):
+                continue
+            if salteados < offset:
+                salteados += 1
+                continue
+            entregados += 1
+            yield self._fila_turno(posicion)
+
+    #Recetas
+    def cargar_recetas_paciente(self, dni: str):
+        indice = self._indice_cadena(dni)
+        if indice is None:
+            return
+        columnas = self.__columnas__
+        orden, claves = columnas["recetas_por_paciente"], columnas["receta_dni"]
+        inicio = bisect_left(orden, indice, key=claves.__getitem__)
+        fin = bisect_right(orden, indice, lo=inicio, key=claves.__getitem__)
+        for posicion in orden[inicio:fin]:
+            yield (dni, self._cadena(columnas["receta_matricula"][posicion]),
+                   self._fecha(columnas["receta_fecha"][posicion]),
+                   json.loads(self._cadena(columnas["receta_medicamentos"][posicion])))
+
+    def iterar_medicamentos_recetas(self):
+        # Las listas repetidas comparten cadena: cada una se decodifica una sola vez
+        decodificadas = {}
+        for indice in self.__columnas__["receta_medicamentos"]:
+            medicamentos = decodificadas.get(indice)
+            if medicamentos is None:
+                medicamentos = decodificadas[indice] = json.loads(self._cadena(indice))
+            yield medicamentos
+
+    #Escritura
+    def _solo_lectura(self, *args):
+        raise InstantaneaSoloLecturaError("La instantánea binaria es de solo lectura; los cambios deben hacerse en la clínica de origen.")
+
+    guardar_paciente = guardar_pacientes = guardar_medico = guardar_especialidad = guardar_turnos = guardar_recetas = _solo_lectura
+
+    def cerrar(self):
+        # Las vistas deben liberarse antes de cerrar el mmap
+        for columna in self.__columnas__.values():
+            columna.release()
+        self.__vista__.release()
+        self.__mapa__.close()
@@ -1,7 +1,19 @@
 import unittest
-from datetime import datetime
-from src.clinica import (Clinica, Paciente, Medico, Turno, Receta, HistoriaClinica, Especialidad, CLI, PacienteNoExisteError, PacienteYaExisteError, MedicoNoExisteError, MedicoYaExisteError, TurnoDuplicadoError, RecetaInvalidaError)
+import gc
+import weakref
+from datetime import date, datetime, timedelta
+from src.clinica import (Clinica, Paciente, Medico, Turno, Receta, CatalogoMedicamentos, IndiceMedicamentos, HistoriaClinica, Especialidad, AgendaTurnos, AlmacenTurnosColumnar, ContadoresOcupacion, CacheLRU, CLI, PacienteNoExisteError, PacienteYaExisteError, MedicoNoExisteError, MedicoYaExisteError, TurnoDuplicadoError, TurnoSuperpuestoError, RecetaInvalidaError, InteraccionMedicamentosaError, LoteInvalidoError)
 from unittest.mock import patch
+import io
+import json
+import os
+import pickle
+import tempfile
+from src.almacenamiento import Almacenamiento, AlmacenamientoSQLite
+from src.diario import DiarioEventos
+from src.fragmentos import ClinicaFragmentada
+from src.instantanea import escribir_instantanea, InstantaneaBinaria, InstantaneaSoloLecturaError
+from src import analitica
 
 class TestPaciente(unittest.TestCase):
     def setUp(self):
@@ -363,6 +375,41 @@ class TestEspecialidad(unittest.TestCase):
         for dia in dias_a_agregar:
             self.assertTrue(especialidad.verificar_dia(dia))
 
+    def test_set_dias_rechaza_dias_invalidos_o_repetidos(self):
+        especialidad = Especialidad("Cardiología", ["Lunes"])
+        for dia in ("lunez", "martes ", "", "LUNES"):
+            with self.assertRaises(ValueError):
+                especialidad.set_dias(dia)
+        self.assertEqual(especialidad.__dias__, ["Lunes"])
+        self.assertFalse(especialidad.verificar_dia("martes "))
+
+class TestMascaraDias(unittest.TestCase):
+
+    def test_mascara_desde_constructor(self):
+        especialidad = Especialidad("Cardiología", ["Lunes", "miércoles", "DOMINGO"])
+        self.assertEqual(especialidad.__mascara_dias__, 0b1000101)
+        self.assertTrue(especialidad.atiende_dia_semana(0))
+        self.assertFalse(especialidad.atiende_dia_semana(1))
+        self.assertTrue(especialidad.atiende_dia_semana(6))
+
+    def test_set_dias_actualiza_mascara(self):
+        especialidad = Especialidad("Cardiología")
+        self.assertEqual(especialidad.__mascara_dias__, 0)
+        especialidad.set_dias("Viernes")
+        self.assertTrue(especialidad.atiende_dia_semana(4))
+        self.assertTrue(especialidad.verificar_dia("viernes"))
+
+    def test_set_dias_desde_none_reinicia_mascara(self):
+        especialidad = Especialidad("Cardiología", ["lunes"])
+        especialidad.__dias__ = None
+        especialidad.set_dias("martes")
+        self.assertFalse(especialidad.verificar_dia("lunes"))
+        self.assertTrue(especialidad.verificar_dia("martes"))
+
+    def test_dia_semana_en_espanol(self):
+        self.assertEqual(Clinica.obtener_dia_semana_en_espanol(datetime(2025, 6, 18)), "Miércoles")
+        self.assertEqual(Clinica.obtener_dia_semana_en_espanol(datetime(2025, 6, 21)), "Sábado")
+
 class TestMedico(unittest.TestCase):
     
     def test_creacion_instancia(self):
@@ -1208,6 +1255,1342 @@ class TestClinica(unittest.TestCase):
         respuesta = clinica.obtener_especialidad_disponible(medico.obtener_matricula(), dia_semana, especialidad)
         self.assertIn("está disponible el día Jueves", respuesta)
 
+TODOS_LOS_DIAS = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
+
+def fecha_futura(dias=7, hora=10, minuto=0):
+    return (datetime.now() + timedelta(days=dias)).replace(hour=hora, minute=minuto, second=0, microsecond=0)
+
+class TestAgendaTurnos(unittest.TestCase):
+
+    def setUp(self):
+        self.clinica = Clinica()
+        self.especialidad = Especialidad("Clínica Médica", TODOS_LOS_DIAS)
+        self.clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+        self.clinica.agregar_paciente(Paciente("22222222", "Luis Díaz", "01/01/1985"))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+
+    def test_agenda_mantiene_orden_cronologico(self):
+        paciente = self.clinica.__pacientes__["11111111"]
+        medico = self.clinica.__medicos__["100"]
+        agenda = AgendaTurnos()
+        for hora in [15, 9, 12]:
+            agenda.agregar(Turno(paciente, medico, fecha_futura(hora=hora), self.especialidad))
+
+        self.assertEqual([t.__fecha_hora__.hour for t in agenda], [9, 12, 15])
+        self.assertEqual(len(agenda.turnos_entre(fecha_futura(hora=10), fecha_futura(hora=15))), 1)
+
+    def test_agendar_turno_duplicado_usa_agenda(self):
+        fecha = fecha_futura()
+        self.clinica.agendar_turno(fecha, "11111111", "100", self.especialidad)
+
+        with self.assertRaises(TurnoDuplicadoError):
+            self.clinica.agendar_turno(fecha, "11111111", "100", self.especialidad)
+        self.assertEqual(len(self.clinica.__agendas_medicos__["100"]), 1)
+
+    def test_validar_turno_no_duplicado(self):
+        fecha = fecha_futura()
+        self.assertTrue(self.clinica.validar_turno_no_duplicado("100", fecha))
+        self.clinica.agendar_turno(fecha, "11111111", "100", self.especialidad)
+
+        self.assertFalse(self.clinica.validar_turno_no_duplicado("100", fecha))
+        self.assertTrue(self.clinica.validar_turno_no_duplicado("100", fecha + timedelta(hours=1)))
+        self.assertTrue(self.clinica.validar_turno_no_duplicado("999", fecha))
+
+    def test_obtener_turnos_medico_ordenados(self):
+        self.clinica.agendar_turno(fecha_futura(hora=16), "11111111", "100", self.especialidad)
+        self.clinica.agendar_turno(fecha_futura(hora=9), "22222222", "100", self.especialidad)
+
+        turnos = self.clinica.obtener_turnos_medico("100")
+        self.assertEqual([t.__fecha_hora__.hour for t in turnos], [9, 16])
+        with self.assertRaises(MedicoNoExisteError):
+            self.clinica.obtener_turnos_medico("999")
+
+class TestSuperposicionTurnos(unittest.TestCase):
+
+    def setUp(self):
+        self.clinica = Clinica()
+        self.especialidad = Especialidad("Clínica Médica", TODOS_LOS_DIAS)
+        self.clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+        self.clinica.agregar_paciente(Paciente("22222222", "Luis Díaz", "01/01/1985"))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+        self.clinica.agregar_medico(Medico("200", "Dra. Ruiz", [self.especialidad]))
+
+    def test_turno_con_duracion(self):
+        fecha = fecha_futura()
+        turno = Turno(Paciente("1", "Ana", "01/01/1980"), Medico("1", "Dr. X", self.especialidad), fecha, self.especialidad, 45)
+        self.assertEqual(turno.obtener_duracion(), 45)
+        self.assertEqual(turno.obtener_fin(), fecha + timedelta(minutes=45))
+        with self.assertRaises(ValueError):
+            Turno(Paciente("1", "Ana", "01/01/1980"), Medico("1", "Dr. X", self.especialidad), fecha, self.especialidad, 0)
+
+    def test_rechaza_superposicion_en_agenda_del_medico(self):
+        self.clinica.agendar_turno(fecha_futura(hora=10), "11111111", "100", self.especialidad, 30)
+
+        with self.assertRaises(TurnoSuperpuestoError):
+            self.clinica.agendar_turno(fecha_futura(hora=10, minuto=10), "22222222", "100", self.especialidad, 30)
+        # Un turno que empieza justo cuando termina el anterior no se superpone
+        self.clinica.agendar_turno(fecha_futura(hora=10, minuto=30), "22222222", "100", self.especialidad, 30)
+
+    def test_rechaza_superposicion_en_agenda_del_paciente(self):
+        self.clinica.agendar_turno(fecha_futura(hora=10), "11111111", "100", self.especialidad, 60)
+
+        with self.assertRaises(TurnoSuperpuestoError):
+            self.clinica.agendar_turno(fecha_futura(hora=10, minuto=30), "11111111", "200", self.especialidad)
+        self.assertEqual(len(self.clinica.__turnos__), 1)
+
+    def test_obtener_turnos_superpuestos(self):
+        for hora in [9, 11, 13]:
+            self.clinica.agendar_turno(fecha_futura(hora=hora), "11111111", "100", self.especialidad, 60)
+
+        superpuestos = self.clinica.obtener_turnos_superpuestos(fecha_futura(hora=9, minuto=30), fecha_futura(hora=11, minuto=1), matricula="100")
+        self.assertEqual([t.__fecha_hora__.hour for t in superpuestos], [9, 11])
+        por_paciente = self.clinica.obtener_turnos_superpuestos(fecha_futura(hora=10), fecha_futura(hora=11), dni="11111111")
+        self.assertEqual(por_paciente, [])
+        with self.assertRaises(ValueError):
+            self.clinica.obtener_turnos_superpuestos(fecha_futura(hora=9), fecha_futura(hora=10))
+
+class TestBuscarTurnosLibres(unittest.TestCase):
+
+    def setUp(self):
+        self.clinica = Clinica()
+        self.cardiologia = Especialidad("Cardiología", TODOS_LOS_DIAS)
+        self.clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.cardiologia]))
+        self.clinica.agregar_medico(Medico("200", "Dra. Ruiz", [Especialidad("cardiología", TODOS_LOS_DIAS)]))
+        self.clinica.agregar_medico(Medico("300", "Dr. Paz", [Especialidad("Pediatría", TODOS_LOS_DIAS)]))
+
+    def test_huecos_en_orden_y_con_limite(self):
+        self.clinica.agendar_turno(fecha_futura(hora=8), "11111111", "100", self.cardiologia)
+
+        libres = list(self.clinica.buscar_turnos_libres("Cardiología", fecha_futura(hora=0), fecha_futura(hora=23), 5))
+
+        self.assertEqual(libres, [
+            (fecha_futura(hora=8), "200"),
+            (fecha_futura(hora=8, minuto=30), "100"),
+            (fecha_futura(hora=8, minuto=30), "200"),
+            (fecha_futura(hora=9), "100"),
+            (fecha_futura(hora=9), "200"),
+        ])
+
+    def test_respeta_dias_de_atencion_y_horario(self):
+        clinica = Clinica()
+        clinica.agregar_medico(Medico("100", "Dr. Sosa", [Especialidad("Cardiología", ["lunes"])]))
+        desde = fecha_futura(hora=0)
+        libres = list(clinica.buscar_turnos_libres("Cardiología", desde, desde + timedelta(days=7), 100))
+
+        self.assertTrue(all(fecha.weekday() == 0 for fecha, _ in libres))
+        self.assertEqual(len(libres), (Clinica.HORA_CIERRE - Clinica.HORA_APERTURA) * 2)
+
+    def test_es_perezoso(self):
+        libres = self.clinica.buscar_turnos_libres("Pediatría", fecha_futura(hora=0), fecha_futura(dias=365), 3)
+        self.assertEqual(next(libres), (fecha_futura(hora=8), "300"))
+        self.assertEqual(len(list(libres)), 2)
+
+class TestAgendarTurnosLote(unittest.TestCase):
+
+    def setUp(self):
+        self.clinica = Clinica()
+        self.especialidad = Especialidad("Clínica Médica", TODOS_LOS_DIAS)
+        self.clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+        self.clinica.agregar_paciente(Paciente("22222222", "Luis Díaz", "01/01/1985"))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+
+    def test_lote_valido(self):
+        resultados = self.clinica.agendar_turnos_lote([
+            (fecha_futura(hora=9), "11111111", "100", self.especialidad),
+            (fecha_futura(hora=10), "22222222", "100", self.especialidad, 45),
+        ])
+
+        self.assertTrue(all(isinstance(r, Turno) for r in resultados))
+        self.assertEqual(len(self.clinica.__turnos__), 2)
+        self.assertEqual(resultados[1].obtener_duracion(), 45)
+        self.assertEqual(len(self.clinica.obtener_historia_clinica("22222222").__turnos__), 1)
+
+    def test_lote_todo_o_nada(self):
+        with self.assertRaises(LoteInvalidoError) as contexto:
+            self.clinica.agendar_turnos_lote([
+                (fecha_futura(hora=9), "11111111", "100", self.especialidad),
+                (fecha_futura(hora=9, minuto=15), "22222222", "100", self.especialidad),
+                (fecha_futura(hora=11), "99999999", "100", self.especialidad),
+            ])
+
+        indices = [indice for indice, _ in contexto.exception.errores]
+        self.assertEqual(indices, [1, 2])
+        self.assertIsInstance(contexto.exception.errores[0][1], TurnoSuperpuestoError)
+        self.assertIsInstance(contexto.exception.errores[1][1], PacienteNoExisteError)
+        self.assertEqual(self.clinica.__turnos__, [])
+
+    def test_lote_con_errores_por_elemento(self):
+        self.clinica.agendar_turno(fecha_futura(hora=9), "11111111", "100", self.especialidad)
+
+        resultados = self.clinica.agendar_turnos_lote([
+            (fecha_futura(hora=9), "11111111", "100", self.especialidad),
+            (fecha_futura(hora=12), "11111111", "100", self.especialidad),
+            (datetime(2020, 1, 1, 9, 0), "22222222", "100", self.especialidad),
+        ], todo_o_nada=False)
+
+        self.assertIsInstance(resultados[0], TurnoDuplicadoError)
+        self.assertIsInstance(resultados[1], Turno)
+        self.assertIsInstance(resultados[2], ValueError)
+        self.assertEqual(len(self.clinica.obtener_turnos_medico("100")), 2)
+
+    def test_elemento_malformado_se_informa_por_elemento(self):
+        with self.assertRaises(LoteInvalidoError) as contexto:
+            self.clinica.agendar_turnos_lote([
+                (fecha_futura(hora=9), "11111111", "100"),
+                None,
+                (fecha_futura(hora=10), "22222222", "100", self.especialidad),
+            ])
+
+        indices = [indice for indice, _ in contexto.exception.errores]
+        self.assertEqual(indices, [0, 1])
+        self.assertIsInstance(contexto.exception.errores[0][1], ValueError)
+        self.assertIsInstance(contexto.exception.errores[1][1], TypeError)
+        self.assertEqual(self.clinica.__turnos__, [])
+
+class TestIndiceEspecialidadDia(unittest.TestCase):
+
+    def setUp(self):
+        self.clinica = Clinica()
+        self.pediatria = Especialidad("Pediatría", ["martes", "jueves"])
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.pediatria]))
+        self.clinica.agregar_medico(Medico("200", "Dra. Ruiz", [Especialidad("pediatría ", ["Martes"])]))
+        self.clinica.agregar_medico(Medico("300", "Dr. Paz", [Especialidad("Cardiología", ["martes"])]))
+
+    def matriculas(self, especialidad, dia):
+        return [m.__matricula__ for m in self.clinica.obtener_medicos_por_especialidad_y_dia(especialidad, dia)]
+
+    def test_consulta_por_especialidad_y_dia(self):
+        self.assertEqual(self.matriculas("Pediatría", "Martes"), ["100", "200"])
+        self.assertEqual(self.matriculas(self.pediatria, 3), ["100"])
+        self.assertEqual(self.matriculas("Pediatría", "lunes"), [])
+
+    def test_agregar_especialidad_a_medico_actualiza_indice(self):
+        medico = self.clinica.obtener_medico_por_matricula("300")
+        medico.agregar_especialidad(Especialidad("Pediatría", ["lunes"]))
+        self.assertEqual(self.matriculas("Pediatría", "lunes"), ["300"])
+
+    def test_set_dias_actualiza_indice(self):
+        self.pediatria.set_dias("sábado")
+        self.assertEqual(self.matriculas("Pediatría", "sábado"), ["100"])
+
+    def test_especialidad_por_nombre_se_resuelve_al_registrarla(self):
+        self.clinica.agregar_medico(Medico("400", "Dr. Gil", "Neurología"))
+        self.assertEqual(self.matriculas("Neurología", "viernes"), [])
+        self.clinica.agregar_especialidad(Especialidad("Neurología", ["viernes"]))
+        self.assertEqual(self.matriculas("Neurología", "viernes"), ["400"])
+
+    def test_validar_especialidad_en_dia_con_indice(self):
+        medico = self.clinica.obtener_medico_por_matricula("100")
+        self.assertTrue(self.clinica.validar_especialidad_en_dia(medico, "Pediatría", "Jueves"))
+        self.assertFalse(self.clinica.validar_especialidad_en_dia(medico, "Pediatría", "Lunes"))
+        self.assertFalse(self.clinica.validar_especialidad_en_dia(medico, "Cardiología", "Martes"))
+
+class TestCatalogoEspecialidades(unittest.TestCase):
+
+    def test_obtener_especialidad_por_nombre_normalizado(self):
+        clinica = Clinica()
+        especialidad = Especialidad("Cardiología", ["lunes"])
+        clinica.agregar_especialidad(especialidad)
+
+        self.assertIs(clinica.obtener_especialidad("  CARDIOLOGÍA "), especialidad)
+        self.assertIsNone(clinica.obtener_especialidad("Neurología"))
+
+    def test_duplicado_detectado_por_indice(self):
+        clinica = Clinica()
+        for i in range(100):
+            clinica.agregar_especialidad(Especialidad(f"Especialidad {i}"))
+        with self.assertRaises(ValueError):
+            clinica.agregar_especialidad(Especialidad(" especialidad 42 "))
+        self.assertEqual(len(clinica.__especialidades__), 100)
+
+    def test_renombrar_especialidad_actualiza_indice(self):
+        clinica = Clinica()
+        especialidad = Especialidad("Pediatria", ["lunes"])
+        clinica.agregar_especialidad(especialidad)
+        especialidad.set_especialidad("Pediatría")
+
+        self.assertIsNone(clinica.obtener_especialidad("Pediatria"))
+        self.assertIs(clinica.obtener_especialidad("pediatría"), especialidad)
+
+    def test_renombrar_sobre_un_nombre_registrado_no_corrompe_el_indice(self):
+        clinica = Clinica()
+        pediatria, cardiologia = Especialidad("Pediatría"), Especialidad("Cardiología")
+        clinica.agregar_especialidad(pediatria)
+        clinica.agregar_especialidad(cardiologia)
+        pediatria.set_especialidad("Cardiología")
+        self.assertIs(clinica.obtener_especialidad("cardiología"), cardiologia)
+        self.assertIsNone(clinica.obtener_especialidad("pediatría"))
+        pediatria.set_especialidad("Neurología")
+        self.assertIs(clinica.obtener_especialidad("Cardiología"), cardiologia)
+        self.assertIs(clinica.obtener_especialidad("Neurología"), pediatria)
+        # Al liberarse el nombre lo recupera la especialidad que había quedado afuera
+        pediatria.set_especialidad("Cardiología")
+        cardiologia.set_especialidad("Clínica Médica")
+        self.assertIs(clinica.obtener_especialidad("Cardiología"), pediatria)
+
+class TestEntidadesCompactas(unittest.TestCase):
+
+    def test_entidades_sin_dict_por_instancia(self):
+        especialidad = Especialidad("Clínica Médica", TODOS_LOS_DIAS)
+        paciente = Paciente("12345678", "Juan Pérez", "01/01/1980")
+        medico = Medico("100", "Dr. Sosa", [especialidad])
+        turno = Turno(paciente, medico, fecha_futura(), especialidad)
+        receta = Receta(paciente, medico, ["Paracetamol"])
+
+        for entidad in (especialidad, paciente, medico, turno, receta):
+            self.assertFalse(hasattr(entidad, "__dict__"), type(entidad).__name__)
+
+    def test_atributos_no_declarados_rechazados(self):
+        paciente = Paciente("12345678", "Juan Pérez", "01/01/1980")
+        with self.assertRaises(AttributeError):
+            paciente.__telefono__ = "555-1234"
+
+class TestAlmacenTurnosColumnar(unittest.TestCase):
+
+    def setUp(self):
+        self.almacen = AlmacenTurnosColumnar()
+        self.clinica = Clinica(almacen_turnos=self.almacen)
+        self.especialidad = Especialidad("Clínica Médica", TODOS_LOS_DIAS)
+        self.clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+        self.clinica.agregar_medico(Medico("200", "Dra. Ruiz", [self.especialidad]))
+        for hora, matricula in [(9, "100"), (10, "200"), (11, "100")]:
+            self.clinica.agendar_turno(fecha_futura(hora=hora), "11111111", matricula, self.especialidad, 45)
+
+    def test_materializa_turnos_bajo_demanda(self):
+        self.assertEqual(len(self.clinica.__turnos__), 3)
+        turno = self.almacen[-1]
+        self.assertIsInstance(turno, Turno)
+        self.assertEqual(turno.obtener_fecha_hora(), fecha_futura(hora=11))
+        self.assertEqual(turno.obtener_duracion(), 45)
+        self.assertEqual(turno.obtener_medico().__matricula__, "100")
+        self.assertEqual([t.__fecha_hora__.hour for t in self.almacen[:2]], [9, 10])
+        self.assertIn("Turnos programados:", self.clinica.obtener_turnos())
+
+    def consultas(self):
+        medico = self.clinica.obtener_medico_por_matricula("100")
+        self.assertEqual(self.almacen.contar_en_rango(fecha_futura(hora=9), fecha_futura(hora=11)), 2)
+        self.assertEqual(self.almacen.contar_en_rango(medico=medico), 2)
+        self.assertEqual([t.__fecha_hora__.hour for t in self.almacen.turnos_en_rango(fecha_futura(hora=10), medico=medico)], [11])
+        self.assertTrue(self.almacen.existe(medico, fecha_futura(hora=9)))
+        self.assertFalse(self.almacen.existe(medico, fecha_futura(hora=10)))
+        self.assertTrue(self.almacen.hay_superposicion(medico, fecha_futura(hora=9, minuto=30), fecha_futura(hora=10)))
+        self.assertFalse(self.almacen.hay_superposicion(medico, fecha_futura(hora=9, minuto=45), fecha_futura(hora=11)))
+
+    def test_consultas_vectorizadas(self):
+        self.consultas()
+
+    def test_consultas_sin_numpy(self):
+        with patch("src.clinica.np", None):
+            self.consultas()
+
+    def test_turnos_materializados_conservan_identidad(self):
+        self.assertIs(self.clinica.__turnos__[0], self.clinica.__turnos__[0])
+        turno = self.almacen[1]
+        self.assertIs(self.clinica.consultar_turnos(matricula="200")[0], turno)
+        self.assertIs(self.clinica.obtener_historia_clinica("11111111").__turnos__[1], turno)
+        del turno
+        # Sólo se recuerdan mientras alguien los usa
+        self.assertEqual(len(self.almacen.__vivos__), 0)
+
+    def test_agendas_e_historias_leen_del_almacen(self):
+        self.assertEqual(self.clinica.__agendas_medicos__, {})
+        self.assertEqual(self.clinica.__agendas_pacientes__, {})
+        historia = self.clinica.obtener_historia_clinica("11111111")
+        self.assertNotIn("__turnos__", vars(historia))
+        self.assertEqual([t.__fecha_hora__.hour for t in historia.iter_turnos(desde=fecha_futura(hora=10))], [10, 11])
+        self.assertEqual([t.__fecha_hora__.hour for t in self.clinica.obtener_turnos_medico("100")], [9, 11])
+
+    def test_validaciones_sobre_las_columnas(self):
+        with self.assertRaises(TurnoSuperpuestoError):
+            self.clinica.agendar_turno(fecha_futura(hora=9, minuto=30), "11111111", "200", self.especialidad)
+        with self.assertRaises(TurnoDuplicadoError):
+            self.clinica.agendar_turno(fecha_futura(hora=9), "11111111", "100", self.especialidad)
+        self.assertFalse(self.clinica.validar_turno_no_duplicado("100", fecha_futura(hora=11)))
+        self.clinica.agendar_turno(fecha_futura(hora=8), "11111111", "200", self.especialidad, 45)
+        self.assertEqual([t.__fecha_hora__.hour for t in self.clinica.consultar_turnos(dni="11111111")], [8, 9, 10, 11])
+        self.assertEqual(len(self.almacen), 4)
+
+    def test_se_serializa_con_la_clinica(self):
+        copia = pickle.loads(pickle.dumps(self.clinica))
+        self.assertEqual([t.__fecha_hora__.hour for t in copia.obtener_historia_clinica("11111111").iter_turnos()], [9, 10, 11])
+        with self.assertRaises(TurnoSuperpuestoError):
+            copia.agendar_turno(fecha_futura(hora=11, minuto=30), "11111111", "100", copia.obtener_medico_por_matricula("100").__especialidades__[0])
+
+class TestAccesoPaginado(unittest.TestCase):
+
+    def setUp(self):
+        self.clinica = Clinica()
+        self.especialidad = Especialidad("Clínica Médica", TODOS_LOS_DIAS)
+        self.clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+        for hora in range(8, 18):
+            self.clinica.agendar_turno(fecha_futura(hora=hora), "11111111", "100", self.especialidad)
+
+    def test_iter_turnos_con_offset_y_limite(self):
+        pagina = list(self.clinica.iter_turnos(offset=3, limit=4))
+        self.assertEqual([t.__fecha_hora__.hour for t in pagina], [11, 12, 13, 14])
+
+    def test_iter_turnos_por_rango(self):
+        turnos = list(self.clinica.iter_turnos(desde=fecha_futura(hora=12), hasta=fecha_futura(hora=15), limit=2))
+        self.assertEqual([t.__fecha_hora__.hour for t in turnos], [12, 13])
+
+    def test_historia_iter_turnos_y_recetas(self):
+        historia = self.clinica.obtener_historia_clinica("11111111")
+        for i in range(5):
+            self.clinica.emitir_receta("11111111", "100", [f"Medicamento {i}"])
+
+        self.assertEqual(len(list(historia.iter_turnos(offset=8))), 2)
+        self.assertEqual([r.__medicamentos__ for r in historia.iter_recetas(offset=1, limit=2)], [["Medicamento 1"], ["Medicamento 2"]])
+        self.assertIn("Medicamento 4", historia.obtener_receta())
+
+    def test_envoltorios_de_texto_se_mantienen(self):
+        self.assertTrue(self.clinica.obtener_turnos().startswith("Turnos programados: ["))
+        historia = self.clinica.obtener_historia_clinica("11111111")
+        self.assertTrue(historia.obtener_turnos().startswith("Los Turnos son: ["))
+
+class TestAlmacenamientoSQLite(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.directorio.name, "clinica.db")
+        self.clinica = Clinica(almacenamiento=AlmacenamientoSQLite(self.ruta))
+        self.especialidad = Especialidad("Clínica Médica", TODOS_LOS_DIAS)
+        self.clinica.agregar_especialidad(self.especialidad)
+        self.clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+        self.clinica.agendar_turno(fecha_futura(hora=10), "11111111", "100", self.especialidad)
+        self.clinica.emitir_receta("11111111", "100", ["Ibuprofeno", "Omeprazol"])
+
+    def tearDown(self):
+        self.clinica.cerrar()
+        self.directorio.cleanup()
+
+    def reabrir(self):
+        self.clinica.cerrar()
+        self.clinica = Clinica(almacenamiento=AlmacenamientoSQLite(self.ruta))
+        return self.clinica
+
+    def test_datos_sobreviven_al_reinicio(self):
+        clinica = self.reabrir()
+        self.assertTrue(clinica.validar_existencia_paciente("11111111"))
+        self.assertEqual(clinica.obtener_medico_por_matricula("100").__nombre__, "Dr. Sosa")
+        self.assertIsNotNone(clinica.obtener_especialidad("clínica médica"))
+        self.assertEqual([t.__fecha_hora__ for t in clinica.iter_turnos()], [fecha_futura(hora=10)])
+
+    def test_historia_se_carga_desde_la_base(self):
+        historia = self.reabrir().obtener_historia_clinica("11111111")
+        self.assertEqual(len(list(historia.iter_turnos())), 1)
+        self.assertEqual([r.__medicamentos__ for r in historia.iter_recetas()], [["Ibuprofeno", "Omeprazol"]])
+
+    def test_validaciones_usan_turnos_persistidos(self):
+        clinica = self.reabrir()
+        especialidad = clinica.obtener_especialidad("Clínica Médica")
+        with self.assertRaises(TurnoDuplicadoError):
+            clinica.agendar_turno(fecha_futura(hora=10), "11111111", "100", especialidad)
+        with self.assertRaises(TurnoSuperpuestoError):
+            clinica.agendar_turno(fecha_futura(hora=10, minuto=15), "11111111", "100", especialidad)
+        with self.assertRaises(PacienteYaExisteError):
+            clinica.agregar_paciente(Paciente("11111111", "Otra", "01/01/1990"))
+
+    def test_sugerencias_se_reconstruyen_al_reabrir(self):
+        self.clinica.emitir_receta("11111111", "100", ["Omeprazol"])
+        clinica = self.reabrir()
+        self.assertEqual(clinica.sugerir_medicamentos("o"), ["Omeprazol"])
+        self.assertEqual(clinica.sugerir_medicamentos("i"), ["Ibuprofeno"])
+
+    def test_backends_implementan_toda_la_interfaz(self):
+        with self.assertRaises(TypeError):
+            Almacenamiento()
+        self.assertEqual(AlmacenamientoSQLite.__abstractmethods__, frozenset())
+        self.assertEqual(InstantaneaBinaria.__abstractmethods__, frozenset())
+
+    def test_historias_en_cache_lru_acotada(self):
+        self.clinica.cerrar()
+        self.clinica = Clinica(almacenamiento=AlmacenamientoSQLite(self.ruta), limite_historias=2)
+        for dni in ("22222222", "33333333"):
+            self.clinica.agregar_paciente(Paciente(dni, f"Paciente {dni}", "01/01/1990"))
+        self.assertEqual(len(self.clinica.__historias_clinicas__), 0)
+
+        primera = self.clinica.obtener_historia_clinica("11111111")
+        self.clinica.obtener_historia_clinica("22222222")
+        self.assertIs(self.clinica.obtener_historia_clinica("11111111"), primera)
+        self.clinica.obtener_historia_clinica("33333333")
+        self.assertEqual(list(self.clinica.__historias_clinicas__), ["11111111", "33333333"])
+
+        # Una historia descartada se vuelve a leer con los datos registrados mientras tanto
+        self.clinica.emitir_receta("22222222", "100", ["Paracetamol"])
+        historia = self.clinica.obtener_historia_clinica("22222222")
+        self.assertEqual([r.__medicamentos__ for r in historia.iter_recetas()], [["Paracetamol"]])
+
+    def test_caches_acotadas_con_muchos_turnos(self):
+        self.clinica.cerrar()
+        clinica = self.clinica = Clinica(almacenamiento=AlmacenamientoSQLite(self.ruta), limite_historias=10)
+        especialidad = clinica.obtener_especialidad("Clínica Médica")
+        for numero in range(200):
+            dni = str(20000000 + numero)
+            clinica.agregar_paciente(Paciente(dni, f"Paciente {numero}", "01/01/1990"))
+            clinica.agendar_turno(fecha_futura(dias=8 + numero // 20, hora=8 + numero % 20 // 2, minuto=numero % 2 * 30),
+                                  dni, "100", especialidad)
+        self.assertEqual(len(clinica.__turnos__), 0)
+        for cache in (clinica.__pacientes__, clinica.__agendas_medicos__, clinica.__agendas_pacientes__, clinica.__historias_clinicas__):
+            self.assertLessEqual(len(cache), 10)
+        self.assertEqual(sum(1 for _ in clinica.iter_turnos()), 201)
+        # Un paciente descartado de la caché sigue viendo su turno
+        with self.assertRaises(TurnoDuplicadoError):
+            clinica.agendar_turno(fecha_futura(dias=8, hora=8), "20000000", "100", especialidad)
+
+    def test_leer_historias_no_acumula_pacientes(self):
+        for numero in range(300):
+            self.clinica.agregar_paciente(Paciente(str(20000000 + numero), f"Paciente {numero}", "01/01/1990"))
+        self.clinica.cerrar()
+        clinica = self.clinica = Clinica(almacenamiento=AlmacenamientoSQLite(self.ruta), limite_historias=10)
+        for numero in range(300):
+            self.assertEqual(clinica.obtener_historia_clinica(str(20000000 + numero)).__paciente__.__nombre__, f"Paciente {numero}")
+        self.assertEqual(len(clinica.__pacientes__), 0)
+        clinica.consultar_turnos(dni="11111111")
+        self.assertEqual(len(clinica.__historias_clinicas__), 10)
+        self.assertLessEqual(len(clinica.__pacientes__), 10)
+        self.assertLessEqual(len(clinica.__agendas_pacientes__), 10)
+
+    def test_cache_lru_se_serializa_con_su_limite(self):
+        cache = CacheLRU(3)
+        for clave in "abcd":
+            cache[clave] = clave.upper()
+        cache.get("b")
+        copia = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(list(copia.items()), [("c", "C"), ("d", "D"), ("b", "B")])
+        copia["e"] = "E"
+        self.assertEqual(list(copia), ["d", "b", "e"])
+
+    def test_cambios_de_especialidad_se_persisten(self):
+        pediatria = Especialidad("Pediatría", ["lunes"])
+        self.clinica.agregar_especialidad(pediatria)
+        self.clinica.agregar_medico(Medico("200", "Dra. Paz", [pediatria]))
+        pediatria.set_dias("martes")
+        medico = self.reabrir().obtener_medico_por_matricula("200")
+        self.assertEqual(medico.__especialidades__[0].__dias__, ["lunes", "martes"])
+        self.assertIs(medico.__especialidades__[0], self.clinica.obtener_especialidad("pediatría"))
+
+class TestDiarioEventos(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.clinica = self.abrir()
+
+    def tearDown(self):
+        self.clinica.cerrar()
+        self.directorio.cleanup()
+
+    def abrir(self, eventos_por_snapshot=10_000):
+        return Clinica.restaurar(DiarioEventos(self.directorio.name, eventos_por_sync=4, eventos_por_snapshot=eventos_por_snapshot))
+
+    def reabrir(self, **kwargs):
+        self.clinica.cerrar()
+        self.clinica = self.abrir(**kwargs)
+        return self.clinica
+
+    def poblar(self, clinica):
+        especialidad = Especialidad("Clínica Médica", list(TODOS_LOS_DIAS))
+        clinica.agregar_especialidad(especialidad)
+        clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+        clinica.agregar_medico(Medico("100", "Dr. Sosa", [especialidad]))
+        for hora in (9, 10, 11):
+            clinica.agendar_turno(fecha_futura(hora=hora), "11111111", "100", especialidad)
+        clinica.emitir_receta("11111111", "100", ["Ibuprofeno"])
+
+    def verificar(self, clinica):
+        self.assertTrue(clinica.validar_existencia_paciente("11111111"))
+        self.assertEqual([t.__fecha_hora__.hour for t in clinica.iter_turnos()], [9, 10, 11])
+        historia = clinica.obtener_historia_clinica("11111111")
+        self.assertEqual([r.__medicamentos__ for r in historia.iter_recetas()], [["Ibuprofeno"]])
+        with self.assertRaises(TurnoSuperpuestoError):
+            clinica.agendar_turno(fecha_futura(hora=10, minuto=15), "11111111", "100", clinica.obtener_especialidad("Clínica Médica"))
+
+    def test_reconstruye_repitiendo_el_diario(self):
+        self.poblar(self.clinica)
+        self.verificar(self.reabrir())
+
+    def test_snapshot_vacia_el_diario(self):
+        self.clinica = self.reabrir(eventos_por_snapshot=3)
+        self.poblar(self.clinica)
+        self.assertTrue(os.path.exists(os.path.join(self.directorio.name, DiarioEventos.ARCHIVO_SNAPSHOT)))
+        with open(os.path.join(self.directorio.name, DiarioEventos.ARCHIVO_EVENTOS)) as archivo:
+            self.assertLess(len(archivo.readlines()), 3)
+        self.verificar(self.reabrir())
+
+    def test_snapshot_en_cada_evento_conserva_historias_e_indices(self):
+        # Con snapshots frecuentes alguno cae justo después de cada tipo de evento
+        for eventos_por_snapshot in range(1, 7):
+            with self.subTest(eventos_por_snapshot=eventos_por_snapshot):
+                self.clinica.cerrar()
+                self.directorio.cleanup()
+                self.directorio = tempfile.TemporaryDirectory()
+                clinica = self.clinica = self.abrir(eventos_por_snapshot=eventos_por_snapshot)
+                clinica.agregar_medico(Medico("200", "Dra. Paz", ["Pediatría"]))
+                clinica.agregar_especialidad(Especialidad("Pediatría", ["lunes"]))
+                self.poblar(clinica)
+                self.assertEqual(len(clinica.obtener_historia_clinica("11111111").__turnos__), 3)
+
+                restaurada = self.reabrir(eventos_por_snapshot=eventos_por_snapshot)
+                self.verificar(restaurada)
+                self.assertEqual([t.__fecha_hora__.hour for t in restaurada.obtener_historia_clinica("11111111").__turnos__], [9, 10, 11])
+                self.assertEqual([m.__matricula__ for m in restaurada.obtener_medicos_por_especialidad_y_dia("Pediatría", "lunes")], ["200"])
+
+    def test_snapshot_durante_importacion(self):
+        ruta = os.path.join(self.directorio.name, "pacientes.csv")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write("dni,nombre,fecha_nacimiento\n")
+            archivo.writelines(f"{1000000 + numero},Paciente {numero},01/01/1980\n" for numero in range(7))
+        clinica = self.reabrir(eventos_por_snapshot=5)
+        self.assertEqual(clinica.importar_pacientes(ruta), (7, []))
+        for _ in range(2):
+            clinica = self.reabrir(eventos_por_snapshot=5)
+            self.assertEqual(sorted(clinica.__pacientes__), [str(1000000 + numero) for numero in range(7)])
+
+    def test_descarta_linea_incompleta(self):
+        self.poblar(self.clinica)
+        self.clinica.cerrar()
+        with open(os.path.join(self.directorio.name, DiarioEventos.ARCHIVO_EVENTOS), "a") as archivo:
+            archivo.write('[99,"P","2222')
+        self.clinica = self.abrir()
+        self.verificar(self.clinica)
+        self.clinica.agregar_paciente(Paciente("22222222", "Luis Paz", "02/02/1990"))
+        self.assertTrue(self.reabrir().validar_existencia_paciente("22222222"))
+
+class TestInstantaneaBinaria(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.directorio.name, "clinica.bin")
+        origen = Clinica()
+        especialidad = Especialidad("Pediatría", list(TODOS_LOS_DIAS))
+        origen.agregar_especialidad(especialidad)
+        for dni in ("30000000", "10000000", "20000000"):
+            origen.agregar_paciente(Paciente(dni, f"Paciente {dni}", "01/01/1980"))
+        origen.agregar_medico(Medico("100", "Dra. Paz", [especialidad]))
+        origen.agregar_medico(Medico("200", "Dr. Ríos", ["Cardiología"]))
+        for hora, dni in ((11, "10000000"), (9, "20000000"), (10, "30000000")):
+            origen.agendar_turno(fecha_futura(hora=hora), dni, "100", especialidad)
+        origen.emitir_receta("20000000", "100", ["Ibuprofeno", "Amoxicilina"])
+        escribir_instantanea(origen, self.ruta)
+        self.clinica = Clinica(almacenamiento=InstantaneaBinaria(self.ruta))
+
+    def tearDown(self):
+        self.clinica.cerrar()
+        self.directorio.cleanup()
+
+    def test_lee_entidades_desde_la_instantanea(self):
+        self.assertEqual(sorted(p.__dni__ for p in self.clinica.obtener_pacientes()), ["10000000", "20000000", "30000000"])
+        self.assertEqual([m.__matricula__ for m in self.clinica.obtener_medicos()], ["100", "200"])
+        self.assertFalse(self.clinica.validar_existencia_paciente("40000000"))
+        historia = self.clinica.obtener_historia_clinica("20000000")
+        self.assertEqual([r.__medicamentos__ for r in historia.iter_recetas()], [["Ibuprofeno", "Amoxicilina"]])
+
+    def test_turnos_por_medico_y_en_orden_de_registro(self):
+        self.assertEqual([t.__fecha_hora__.hour for t in self.clinica.obtener_turnos_medico("100")], [9, 10, 11])
+        self.assertEqual([t.__fecha_hora__.hour for t in self.clinica.iter_turnos(offset=1)], [9, 10])
+        with self.assertRaises(TurnoSuperpuestoError):
+            self.clinica.agendar_turno(fecha_futura(hora=9, minuto=15), "10000000", "100", self.clinica.obtener_especialidad("pediatría"))
+
+    def test_sugerencias_desde_las_recetas_de_la_instantanea(self):
+        self.assertEqual(self.clinica.sugerir_medicamentos("amox"), ["Amoxicilina"])
+
+    def test_es_de_solo_lectura(self):
+        with self.assertRaises(InstantaneaSoloLecturaError):
+            self.clinica.agregar_paciente(Paciente("50000000", "Nuevo", "01/01/1990"))
+
+    def test_escritura_rechazada_no_modifica_la_clinica(self):
+        especialidad = self.clinica.obtener_especialidad("pediatría")
+        with self.assertRaises(InstantaneaSoloLecturaError):
+            self.clinica.agendar_turno(fecha_futura(hora=15), "10000000", "100", especialidad)
+        self.assertEqual([t.__fecha_hora__.hour for t in self.clinica.obtener_turnos_medico("100")], [9, 10, 11])
+        self.assertEqual([t.__fecha_hora__.hour for t in self.clinica.consultar_turnos(dni="10000000")], [11])
+        self.assertEqual(len(self.clinica.__turnos__), 0)
+        # El mismo horario sigue libre
+        self.assertEqual(self.clinica.obtener_turnos_superpuestos(fecha_futura(hora=15), fecha_futura(hora=16), matricula="100"), [])
+
+        with self.assertRaises(InstantaneaSoloLecturaError):
+            self.clinica.agregar_paciente(Paciente("50000000", "Nuevo", "01/01/1990"))
+        self.assertFalse(self.clinica.validar_existencia_paciente("50000000"))
+        with self.assertRaises(InstantaneaSoloLecturaError):
+            self.clinica.agregar_medico(Medico("300", "Dr. Gil", [especialidad]))
+        self.assertFalse(self.clinica.validar_existencia_medico("300"))
+        with self.assertRaises(InstantaneaSoloLecturaError):
+            self.clinica.agregar_especialidad(Especialidad("Dermatología", ["lunes"]))
+        self.assertIsNone(self.clinica.obtener_especialidad("dermatología"))
+        with self.assertRaises(InstantaneaSoloLecturaError):
+            self.clinica.emitir_receta("20000000", "100", ["Paracetamol"])
+        historia = self.clinica.obtener_historia_clinica("20000000")
+        self.assertEqual([r.__medicamentos__ for r in historia.iter_recetas()], [["Ibuprofeno", "Amoxicilina"]])
+
+    def test_rechaza_archivo_ajeno(self):
+        otro = os.path.join(self.directorio.name, "otro.bin")
+        with open(otro, "wb") as archivo:
+            archivo.write(b"\0" * 512)
+        with self.assertRaises(ValueError):
+            InstantaneaBinaria(otro)
+
+class TestImportacionMasiva(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.clinica = Clinica()
+        self.clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def archivo(self, nombre, contenido):
+        ruta = os.path.join(self.directorio.name, nombre)
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write(contenido)
+        return ruta
+
+    def test_importar_pacientes_csv_informa_filas_invalidas(self):
+        ruta = self.archivo("pacientes.csv", "dni,nombre,fecha_nacimiento\n"
+                                             "22222222,Luis Paz,10/6/1996\n"
+                                             "12AB,Sin DNI,01/01/1990\n"
+                                             "33333333,Fecha Mala,10/05/80\n"
+                                             "44444444,Día Inexistente,31/02/1990\n"
+                                             "11111111,Repetido,01/01/1980\n"
+                                             "55555555,Eva Ruiz,01/12/2000\n")
+        importados, errores = self.clinica.importar_pacientes(ruta, tamanio_bloque=1)
+
+        self.assertEqual(importados, 2)
+        self.assertEqual([linea for linea, _ in errores], [3, 4, 5, 6])
+        self.assertTrue(self.clinica.validar_existencia_paciente("55555555"))
+        self.assertEqual(self.clinica.obtener_historia_clinica("22222222").__paciente__.__nombre__, "Luis Paz")
+
+    def test_importar_pacientes_jsonl(self):
+        ruta = self.archivo("pacientes.jsonl", '{"dni": "22222222", "nombre": "Luis Paz", "fecha_nacimiento": "01/01/1990"}\n'
+                                               '{"dni": "22222222", "nombre": "Luis Paz", "fecha_nacimiento": "01/01/1990"}\n'
+                                               'no es json\n')
+        importados, errores = self.clinica.importar_pacientes(ruta)
+        self.assertEqual(importados, 1)
+        self.assertEqual([linea for linea, _ in errores], [2, 3])
+
+    def test_importar_medicos_resuelve_especialidades(self):
+        pediatria = Especialidad("Pediatría", list(TODOS_LOS_DIAS))
+        self.clinica.agregar_especialidad(pediatria)
+        ruta = self.archivo("medicos.csv", "matricula,nombre,especialidades\n"
+                                           "100,Dra. Paz,pediatría;Cardiología\n"
+                                           "200,,Pediatría\n")
+        importados, errores = self.clinica.importar_medicos(ruta)
+
+        self.assertEqual((importados, len(errores)), (1, 1))
+        self.assertEqual(self.clinica.obtener_medico_por_matricula("100").__especialidades__, [pediatria, "Cardiología"])
+        self.assertEqual([m.__matricula__ for m in self.clinica.obtener_medicos_por_especialidad_y_dia("Pediatría", "lunes")], ["100"])
+
+    def test_formato_no_soportado(self):
+        with self.assertRaises(ValueError):
+            self.clinica.importar_pacientes(self.archivo("pacientes.xml", ""))
+
+class TestExportacionHistorias(unittest.TestCase):
+
+    def setUp(self):
+        self.clinica = Clinica()
+        self.especialidad = Especialidad("Clínica Médica", list(TODOS_LOS_DIAS))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+        for dni in ("11111111", "22222222", "33333333"):
+            self.clinica.agregar_paciente(Paciente(dni, f"Paciente {dni}", "01/01/1980"))
+        self.clinica.agendar_turno(fecha_futura(dias=3), "11111111", "100", self.especialidad)
+        self.clinica.agendar_turno(fecha_futura(dias=10), "22222222", "100", self.especialidad)
+        self.clinica.emitir_receta("11111111", "100", ["Ibuprofeno"])
+
+    def exportar(self, **filtros):
+        salida = io.StringIO()
+        lineas = self.clinica.exportar_historias(salida, **filtros)
+        registros = [json.loads(linea) for linea in salida.getvalue().splitlines()]
+        self.assertEqual(lineas, len(registros))
+        return registros
+
+    def test_una_linea_por_paciente(self):
+        registros = self.exportar()
+        self.assertEqual([r["dni"] for r in registros], ["11111111", "22222222", "33333333"])
+        self.assertEqual(registros[0]["recetas"][0]["medicamentos"], ["Ibuprofeno"])
+        self.assertEqual(registros[0]["turnos"][0]["fecha_hora"], fecha_futura(dias=3).isoformat())
+
+    def test_filtro_por_dni_y_rango(self):
+        self.assertEqual([r["dni"] for r in self.exportar(dnis={"33333333", "22222222", "99999999"})], ["22222222", "33333333"])
+        registros = self.exportar(desde=fecha_futura(dias=5), hasta=fecha_futura(dias=15))
+        self.assertEqual([(r["dni"], len(r["turnos"]), len(r["recetas"])) for r in registros], [("22222222", 1, 0)])
+
+    def test_una_linea_por_evento(self):
+        registros = self.exportar(dnis={"11111111"}, por_evento=True)
+        self.assertEqual([r["tipo"] for r in registros], ["turno", "receta"])
+
+    def test_recorridos_con_backend_no_cachean_pacientes(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "clinica.db")
+            clinica = Clinica(almacenamiento=AlmacenamientoSQLite(ruta))
+            clinica.agregar_especialidad(self.especialidad)
+            clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+            for numero in range(30):
+                dni = str(20000000 + numero)
+                clinica.agregar_paciente(Paciente(dni, f"Paciente {numero}", "01/01/1980"))
+                clinica.agendar_turno(fecha_futura(dias=3 + numero // 10, hora=8 + numero % 10), dni, "100", self.especialidad)
+            clinica.cerrar()
+
+            clinica = Clinica(almacenamiento=AlmacenamientoSQLite(ruta))
+            try:
+                self.assertEqual(clinica.exportar_historias(io.StringIO()), 30)
+                self.assertEqual(len(list(clinica.iter_turnos())), 30)
+                self.assertEqual(clinica.ocupacion("100"), 30)
+                if analitica.np is not None:
+                    self.assertEqual(len(analitica.AnaliticaClinica(clinica)), 30)
+                self.assertEqual(len(clinica.__pacientes__), 0)
+            finally:
+                clinica.cerrar()
+
+class TestClinicaFragmentada(unittest.TestCase):
+
+    def setUp(self):
+        self.clinica = ClinicaFragmentada(fragmentos=2)
+        self.especialidad = Especialidad("Clínica Médica", list(TODOS_LOS_DIAS))
+        self.clinica.agregar_especialidad(self.especialidad)
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+        # DNIs que caen en fragmentos distintos
+        self.dnis = {}
+        for numero in range(11111111, 11111200):
+            self.dnis.setdefault(self.clinica.fragmento_de(str(numero)), str(numero))
+        self.assertEqual(len(self.dnis), 2)
+        self.assertEqual(self.clinica.agregar_pacientes(Paciente(dni, f"Paciente {dni}", "01/01/1980") for dni in self.dnis.values()), [None, None])
+
+    def tearDown(self):
+        self.clinica.cerrar()
+
+    def test_rechaza_superposicion_del_medico_entre_fragmentos(self):
+        primero, segundo = self.dnis[0], self.dnis[1]
+        self.clinica.agendar_turno(fecha_futura(hora=10), primero, "100", self.especialidad)
+        with self.assertRaises(TurnoSuperpuestoError):
+            self.clinica.agendar_turno(fecha_futura(hora=10, minuto=15), segundo, "100", self.especialidad)
+        with self.assertRaises(TurnoDuplicadoError):
+            self.clinica.agendar_turno(fecha_futura(hora=10), primero, "100", self.especialidad)
+
+    def test_lote_libera_reservas_fallidas(self):
+        primero, segundo = self.dnis[0], self.dnis[1]
+        resultados = self.clinica.agendar_turnos_lote([(fecha_futura(hora=9), "99999999", "100", self.especialidad),
+                                                       (fecha_futura(hora=10), primero, "100", self.especialidad),
+                                                       (fecha_futura(hora=10), segundo, "100", self.especialidad)])
+        self.assertIsInstance(resultados[0], PacienteNoExisteError)
+        self.assertIsNone(resultados[1])
+        self.assertIsInstance(resultados[2], TurnoSuperpuestoError)
+        # El horario que no se pudo agendar quedó libre
+        self.clinica.agendar_turno(fecha_futura(hora=9), segundo, "100", self.especialidad)
+        self.assertEqual([t.__fecha_hora__.hour for t in self.clinica.obtener_turnos_medico("100")], [9, 10])
+
+    def test_lote_valida_en_el_fragmento_del_paciente_antes_de_reservar(self):
+        # Un elemento inválido no debe ocupar el horario del médico: el resultado coincide
+        # con el de una única Clinica
+        turnos = [(fecha_futura(hora=10), "99999999", "100", self.especialidad),
+                  (fecha_futura(hora=10), self.dnis[0], "100", self.especialidad),
+                  (fecha_futura(hora=11), self.dnis[1], "100", self.especialidad),
+                  (fecha_futura(hora=11, minuto=15), self.dnis[1], "100", self.especialidad)]
+        referencia = Clinica()
+        referencia.agregar_especialidad(self.especialidad)
+        referencia.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+        for dni in self.dnis.values():
+            referencia.agregar_paciente(Paciente(dni, f"Paciente {dni}", "01/01/1980"))
+        esperados = referencia.agendar_turnos_lote(turnos, todo_o_nada=False)
+        resultados = self.clinica.agendar_turnos_lote(turnos)
+        self.assertEqual([type(r) for r in resultados],
+                         [type(r) if isinstance(r, Exception) else type(None) for r in esperados])
+        with self.assertRaises(PacienteNoExisteError):
+            self.clinica.agendar_turno(fecha_futura(hora=10), "99999999", "100", self.especialidad)
+
+    def test_recetas_en_el_fragmento_del_paciente(self):
+        resultados = self.clinica.emitir_recetas([(self.dnis[0], "100", ["Ibuprofeno"]), ("99999999", "100", ["Ibuprofeno"])])
+        self.assertIsInstance(resultados[1], PacienteNoExisteError)
+        historia = self.clinica.obtener_historia_clinica(self.dnis[0])
+        self.assertEqual([r.__medicamentos__ for r in historia.iter_recetas()], [["Ibuprofeno"]])
+
+    def test_consulta_de_turnos_entre_fragmentos(self):
+        primero, segundo = self.dnis[0], self.dnis[1]
+        self.clinica.agendar_turnos_lote([(fecha_futura(hora=h), (primero, segundo)[h % 2], "100", self.especialidad)
+                                          for h in range(9, 14)])
+        turnos = self.clinica.consultar_turnos(matricula="100", descendente=True, limite=3)
+        self.assertEqual([t.__fecha_hora__.hour for t in turnos], [13, 12, 11])
+        turnos = self.clinica.consultar_turnos(dni=segundo, desde=fecha_futura(hora=10))
+        self.assertEqual([t.__fecha_hora__.hour for t in turnos], [11, 13])
+
+class TestSerializacionClinica(unittest.TestCase):
+
+    def test_copia_conserva_las_suscripciones(self):
+        clinica = Clinica()
+        especialidad = Especialidad("Pediatría", ["lunes"])
+        clinica.agregar_especialidad(especialidad)
+        clinica.agregar_medico(Medico("100", "Dra. Paz", [especialidad]))
+        copia = pickle.loads(pickle.dumps(clinica))
+
+        copia.obtener_especialidad("pediatría").set_dias("martes")
+        self.assertEqual([m.__matricula__ for m in copia.obtener_medicos_por_especialidad_y_dia("Pediatría", "martes")], ["100"])
+        self.assertEqual(clinica.obtener_medicos_por_especialidad_y_dia("Pediatría", "martes"), [])
+
+    def test_suscripciones_no_retienen_clinicas(self):
+        especialidad = Especialidad("Pediatría", ["lunes"])
+        medico = Medico("100", "Dra. Paz", [especialidad])
+        clinica = Clinica()
+        clinica.agregar_especialidad(especialidad)
+        clinica.agregar_medico(medico)
+        referencia = weakref.ref(clinica)
+        del clinica
+        gc.collect()
+        self.assertIsNone(referencia())
+        self.assertEqual(len(especialidad.__observadores__), 0)
+        self.assertEqual(len(medico.__observadores__), 0)
+        # Sin observadores, modificar las entidades sigue funcionando
+        especialidad.set_dias("martes")
+        medico.set_especialidad([especialidad])
+
+class TestCatalogoMedicamentos(unittest.TestCase):
+
+    def test_interna_nombres_y_canonicos(self):
+        catalogo = CatalogoMedicamentos()
+        codigos = catalogo.codificar(["Ibuprofeno", "Paracetamol", "Ibuprofeno", " ibuprofeno "])
+        self.assertEqual(list(codigos), [0, 1, 0, 2])
+        self.assertEqual(catalogo.decodificar(codigos), ["Ibuprofeno", "Paracetamol", "Ibuprofeno", " ibuprofeno "])
+        self.assertEqual(catalogo.canonico(2), 0)
+        self.assertEqual(catalogo.buscar("PARACETAMOL"), 1)
+        self.assertIsNone(catalogo.buscar("Aspirina"))
+        self.assertEqual(len(catalogo), 3)
+
+    def test_receta_guarda_codigos(self):
+        paciente = Paciente("12345678", "Ana Gómez", "01/01/1980")
+        medico = Medico("100", "Dr. Sosa", [Especialidad("Clínica Médica")])
+        receta = Receta(paciente, medico, ["Ibuprofeno", "Omeprazol"])
+        self.assertEqual(receta.__codigos__.typecode, "I")
+        self.assertEqual(list(receta.__codigos__), [Receta.CATALOGO.codigo("Ibuprofeno"), Receta.CATALOGO.codigo("Omeprazol")])
+        self.assertEqual(pickle.loads(pickle.dumps(receta)).__medicamentos__, ["Ibuprofeno", "Omeprazol"])
+
+    def test_emitir_receta_detecta_duplicados_por_codigo(self):
+        clinica = Clinica()
+        clinica.agregar_paciente(Paciente("12345678", "Ana Gómez", "01/01/1980"))
+        clinica.agregar_medico(Medico("100", "Dr. Sosa", [Especialidad("Clínica Médica")]))
+        with self.assertRaises(RecetaInvalidaError):
+            clinica.emitir_receta("12345678", "100", ["Ibuprofeno", "IBUPROFENO "])
+
+class TestSugerenciasMedicamentos(unittest.TestCase):
+
+    def test_indice_ordena_por_frecuencia(self):
+        indice = IndiceMedicamentos()
+        indice.registrar(["Ibuprofeno", "Ibupirac", "Omeprazol"])
+        indice.registrar(["ibupirac ", "Iboga"])
+        self.assertEqual(indice.sugerir("ibu"), ["Ibupirac", "Ibuprofeno"])
+        self.assertEqual(indice.sugerir("IB", 2), ["Ibupirac", "Iboga"])
+        self.assertEqual(indice.sugerir("x"), [])
+        self.assertEqual(indice.frecuencia("IBUPIRAC"), 2)
+        self.assertEqual(len(indice), 4)
+
+    def test_clinica_registra_lo_prescripto(self):
+        clinica = Clinica()
+        clinica.agregar_paciente(Paciente("12345678", "Ana Gómez", "01/01/1980"))
+        clinica.agregar_medico(Medico("100", "Dr. Sosa", [Especialidad("Clínica Médica")]))
+        clinica.emitir_receta("12345678", "100", ["Amoxicilina", "Amiodarona"])
+        clinica.emitir_receta("12345678", "100", ["Amiodarona"])
+        self.assertEqual(clinica.sugerir_medicamentos("am"), ["Amiodarona", "Amoxicilina"])
+        self.assertEqual(clinica.sugerir_medicamentos("amox", 1), ["Amoxicilina"])
+
+    def cli_con_recetas(self, *recetas):
+        cli = CLI()
+        cli.clinica.agregar_paciente(Paciente("12345678", "Ana Gómez", "01/01/1980"))
+        cli.clinica.agregar_medico(Medico("100", "Dr. Sosa", [Especialidad("Clínica Médica")]))
+        for medicamentos in recetas:
+            cli.clinica.emitir_receta("12345678", "100", medicamentos)
+        return cli
+
+    @patch("builtins.input", side_effect=["1", "", "Paracetamol"])
+    @patch("builtins.print")
+    def test_cli_confirma_cada_nombre_nuevo(self, mock_print, mock_input):
+        cli = self.cli_con_recetas(["Ibuprofeno"], ["Ibupirac"])
+        self.assertEqual(cli.confirmar_medicamentos(["Ibupofeno", "Ibuprofeno", "Ibuprofeno 600", "Ibup"]),
+                         ["Ibupirac", "Ibuprofeno", "Ibuprofeno 600", "Paracetamol"])
+        self.assertEqual(mock_input.call_count, 3)
+        mock_print.assert_any_call("'Ibupofeno' no fue prescripto antes. Sugerencias: 1) Ibupirac, 2) Ibuprofeno")
+
+    @patch("builtins.input", side_effect=["12345678", "100", "Ibupofeno", "1"])
+    @patch("builtins.print")
+    def test_cli_emite_con_el_nombre_elegido(self, mock_print, mock_input):
+        cli = self.cli_con_recetas(["Ibuprofeno"])
+        cli.emitir_receta()
+        historia = cli.clinica.obtener_historia_clinica("12345678")
+        self.assertEqual([r.__medicamentos__ for r in historia.iter_recetas()], [["Ibuprofeno"], ["Ibuprofeno"]])
+        self.assertEqual(cli.clinica.frecuencia_medicamento("ibupofeno"), 0)
+
+    @patch("builtins.input")
+    @patch("builtins.print")
+    def test_cli_no_sugiere_para_un_nombre_ya_prescripto(self, mock_print, mock_input):
+        # "Ibu" queda fuera de las 3 sugerencias más frecuentes para su prefijo
+        cli = self.cli_con_recetas(*[["Ibuprofeno", "Ibupirac", "Ibuevanol"]] * 2, ["Ibu"])
+        self.assertNotIn("Ibu", cli.clinica.sugerir_medicamentos("Ibu", 3))
+        self.assertEqual(cli.confirmar_medicamentos([" IBU "]), [" IBU "])
+        mock_print.assert_not_called()
+        mock_input.assert_not_called()
+
+class TestInteraccionesMedicamentosas(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        ruta = os.path.join(self.directorio.name, "interacciones.csv")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write("medicamento_a,medicamento_b\nWarfarina,Aspirina\nSildenafil,Nitroglicerina\n,Vacío\n")
+        self.clinica = Clinica()
+        self.assertEqual(self.clinica.cargar_interacciones(ruta), 2)
+        self.clinica.agregar_paciente(Paciente("12345678", "Ana Gómez", "01/01/1980"))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [Especialidad("Clínica Médica")]))
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_interaccion_dentro_de_la_receta(self):
+        with self.assertRaises(InteraccionMedicamentosaError):
+            self.clinica.emitir_receta("12345678", "100", ["warfarina", "Aspirina"])
+
+    def test_interaccion_con_recetas_recientes(self):
+        self.clinica.emitir_receta("12345678", "100", ["Warfarina", "Omeprazol"])
+        with self.assertRaises(RecetaInvalidaError):
+            self.clinica.emitir_receta("12345678", "100", ["ASPIRINA "])
+        self.clinica.emitir_receta("12345678", "100", ["Nitroglicerina"])
+
+    def test_recetas_fuera_de_la_ventana_no_cuentan(self):
+        historia = self.clinica.obtener_historia_clinica("12345678")
+        antigua = datetime.now() - timedelta(days=Clinica.DIAS_VENTANA_INTERACCIONES + 1)
+        historia.agregar_receta_hist(Receta(historia.__paciente__, self.clinica.obtener_medico_por_matricula("100"), ["Warfarina"], antigua))
+        self.assertIn("Receta emitida", self.clinica.emitir_receta("12345678", "100", ["Aspirina"]))
+
+    def test_un_medicamento_no_interactua_consigo_mismo(self):
+        with self.assertRaises(ValueError):
+            self.clinica.agregar_interaccion("Warfarina", " warfarina")
+        self.assertEqual(len(self.clinica.__reglas_interaccion__), 2)
+
+    def test_snapshot_no_incluye_las_reglas(self):
+        # Las reglas no pasan por el diario: se cargan de nuevo sobre la copia
+        copia = pickle.loads(pickle.dumps(self.clinica))
+        self.assertFalse(copia.__reglas_interaccion__)
+        self.assertIn("Receta emitida", copia.emitir_receta("12345678", "100", ["Warfarina", "Aspirina"]))
+        copia.agregar_interaccion("Warfarina", "Aspirina")
+        with self.assertRaises(InteraccionMedicamentosaError):
+            copia.emitir_receta("12345678", "100", ["Aspirina"])
+
+class TestEmitirRecetasLote(unittest.TestCase):
+
+    def setUp(self):
+        self.clinica = Clinica()
+        self.clinica.agregar_interaccion("Warfarina", "Aspirina")
+        self.clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+        self.clinica.agregar_paciente(Paciente("22222222", "Luis Díaz", "01/01/1985"))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [Especialidad("Clínica Médica")]))
+
+    def test_lote_valido(self):
+        resultados = self.clinica.emitir_recetas_lote([
+            ("11111111", "100", ["Ibuprofeno"]),
+            ("22222222", "100", ["Omeprazol", "Paracetamol"]),
+            ("11111111", "100", ["Amoxicilina"]),
+        ])
+
+        self.assertTrue(all(isinstance(r, Receta) for r in resultados))
+        self.assertEqual(resultados[1].__medicamentos__, ["Omeprazol", "Paracetamol"])
+        self.assertEqual(len(self.clinica.obtener_historia_clinica("11111111").__recetas__), 2)
+        self.assertEqual(self.clinica.sugerir_medicamentos("ibu"), ["Ibuprofeno"])
+
+    def test_recetas_rechazadas_no_agrandan_el_catalogo(self):
+        tamanio = len(Receta.CATALOGO)
+        with self.assertRaises(RecetaInvalidaError):
+            self.clinica.emitir_receta("11111111", "100", ["Droga Rechazada A", " droga rechazada a"])
+        with self.assertRaises(InteraccionMedicamentosaError):
+            self.clinica.emitir_receta("11111111", "100", ["Droga Rechazada B", "Warfarina", "Aspirina"])
+        with self.assertRaises(LoteInvalidoError):
+            self.clinica.emitir_recetas_lote([("11111111", "100", ["Droga Rechazada C"]), ("99999999", "100", ["Droga Rechazada D"])])
+        self.assertEqual(len(Receta.CATALOGO), tamanio)
+
+        resultados = self.clinica.emitir_recetas_lote([("11111111", "100", ["Droga Rechazada C"]), ("99999999", "100", ["Droga Rechazada D"])],
+                                                      todo_o_nada=False)
+        self.assertEqual(resultados[0].__medicamentos__, ["Droga Rechazada C"])
+        self.assertIsNone(Receta.CATALOGO.buscar("Droga Rechazada D"))
+
+    def test_lote_todo_o_nada(self):
+        with self.assertRaises(LoteInvalidoError) as contexto:
+            self.clinica.emitir_recetas_lote([
+                ("11111111", "100", ["Ibuprofeno"]),
+                ("99999999", "100", ["Ibuprofeno"]),
+                ("22222222", "999", ["Ibuprofeno"]),
+            ])
+
+        indices = [indice for indice, _ in contexto.exception.errores]
+        self.assertEqual(indices, [1, 2])
+        self.assertIsInstance(contexto.exception.errores[0][1], PacienteNoExisteError)
+        self.assertIsInstance(contexto.exception.errores[1][1], MedicoNoExisteError)
+        self.assertEqual(self.clinica.obtener_historia_clinica("11111111").__recetas__, [])
+
+    def test_elemento_malformado_se_informa_por_elemento(self):
+        resultados = self.clinica.emitir_recetas_lote([
+            ("11111111", "100"),
+            None,
+            ("22222222", "100", ["Ibuprofeno"]),
+        ], todo_o_nada=False)
+
+        self.assertIsInstance(resultados[0], ValueError)
+        self.assertIsInstance(resultados[1], TypeError)
+        self.assertIsInstance(resultados[2], Receta)
+        with self.assertRaises(LoteInvalidoError):
+            self.clinica.emitir_recetas_lote([("11111111", "100")])
+
+    def test_historia_recibe_las_recetas_del_lote_en_orden(self):
+        historia = self.clinica.obtener_historia_clinica("11111111")
+        self.clinica.emitir_recetas_lote([
+            ("11111111", "100", ["Ibuprofeno"]),
+            ("22222222", "100", ["Omeprazol"]),
+            ("11111111", "100", ["Amoxicilina"]),
+        ])
+        self.assertEqual([r.__medicamentos__ for r in historia.iter_recetas()], [["Ibuprofeno"], ["Amoxicilina"]])
+
+    def test_interacciones_dentro_del_lote(self):
+        resultados = self.clinica.emitir_recetas_lote([
+            ("11111111", "100", ["Warfarina"]),
+            ("22222222", "100", ["Aspirina"]),
+            ("11111111", "100", ["Aspirina"]),
+            ("11111111", "100", []),
+        ], todo_o_nada=False)
+
+        self.assertIsInstance(resultados[0], Receta)
+        self.assertIsInstance(resultados[1], Receta)
+        self.assertIsInstance(resultados[2], InteraccionMedicamentosaError)
+        self.assertIsInstance(resultados[3], RecetaInvalidaError)
+        self.assertEqual(len(self.clinica.obtener_historia_clinica("11111111").__recetas__), 1)
+
+    def test_lote_con_almacenamiento(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "clinica.db")
+            clinica = Clinica(almacenamiento=AlmacenamientoSQLite(ruta))
+            clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+            clinica.agregar_medico(Medico("100", "Dr. Sosa", [Especialidad("Clínica Médica")]))
+            clinica.emitir_recetas_lote([("11111111", "100", ["Ibuprofeno"]), ("11111111", "100", ["Omeprazol"])])
+            clinica.cerrar()
+
+            restaurada = Clinica(almacenamiento=AlmacenamientoSQLite(ruta))
+            recetas = restaurada.obtener_historia_clinica("11111111").__recetas__
+            self.assertEqual([r.__medicamentos__ for r in recetas], [["Ibuprofeno"], ["Omeprazol"]])
+            restaurada.cerrar()
+
+class TestFechaNacimiento(unittest.TestCase):
+
+    FECHAS = ["01/01/1980", "10/6/1996", "29/02/2000", "29/02/1900", "31/04/2020", "10/05/80",
+              "00/01/2000", "01/13/2000", "1/1/0001", "10/06/1996 ", "aa/bb/cccc", ""]
+
+    def esperado(self, texto):
+        try:
+            return datetime.strptime(texto, "%d/%m/%Y").toordinal()
+        except ValueError:
+            return 0
+
+    def test_ordinal_igual_a_strptime(self):
+        for texto in self.FECHAS:
+            self.assertEqual(Paciente._ordinal_fecha(texto), self.esperado(texto), texto)
+
+    def test_columna_igual_a_escalar(self):
+        self.assertEqual(Paciente._ordinales_fechas(self.FECHAS), [self.esperado(t) for t in self.FECHAS])
+        self.assertEqual(Paciente._ordinales_fechas(["1/1/2000", "2/2/2000"]), [date(2000, 1, 1).toordinal(), date(2000, 2, 2).toordinal()])
+        self.assertEqual(Paciente._ordinales_fechas([]), [])
+
+    def test_paciente_guarda_ordinal(self):
+        paciente = Paciente("12345678", "Ana Gómez", "10/6/1996")
+        self.assertEqual(paciente.__fecha_nacimiento__, "10/6/1996")
+        self.assertEqual(paciente.__fecha_ordinal__, date(1996, 6, 10).toordinal())
+        self.assertEqual(paciente.calcular_edad(date(2026, 6, 9)), 29)
+        self.assertEqual(paciente.calcular_edad(date(2026, 6, 10)), 30)
+        paciente.set_nacimiento("01/01/1980")
+        self.assertEqual(paciente.__fecha_ordinal__, date(1980, 1, 1).toordinal())
+
+    def test_fecha_invalida(self):
+        with self.assertRaises(ValueError) as contexto:
+            Paciente("12345678", "Ana Gómez", "29/02/2023")
+        self.assertIn("dd/mm/aaaa", str(contexto.exception))
+
+    def test_importacion_guarda_ordinal(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "pacientes.csv")
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write("dni,nombre,fecha_nacimiento\n12345678,Ana,10/6/1996\n23456789,Luis,31/02/1990\n34567890,Eva,01/01/1980\n")
+            clinica = Clinica()
+            importados, errores = clinica.importar_pacientes(ruta, tamanio_bloque=2)
+        self.assertEqual(importados, 2)
+        self.assertEqual([numero for numero, _ in errores], [3])
+        self.assertEqual(clinica._paciente("12345678").__fecha_ordinal__, date(1996, 6, 10).toordinal())
+
+class TestConsultaTurnos(unittest.TestCase):
+
+    def setUp(self):
+        self.clinica = Clinica()
+        self.especialidad = Especialidad("Clínica Médica", list(TODOS_LOS_DIAS))
+        self.clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+        self.clinica.agregar_paciente(Paciente("22222222", "Luis Díaz", "01/01/1985"))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+        self.clinica.agregar_medico(Medico("200", "Dra. Paz", [self.especialidad]))
+        # Se agendan fuera de orden: días 9, 7 y 8 para Ana con Sosa, Paz y Sosa; Luis con Sosa el día 7
+        self.clinica.agendar_turnos_lote([
+            (fecha_futura(dias=9), "11111111", "100", self.especialidad),
+            (fecha_futura(dias=7), "11111111", "200", self.especialidad),
+            (fecha_futura(dias=8), "11111111", "100", self.especialidad),
+            (fecha_futura(dias=7), "22222222", "100", self.especialidad),
+        ])
+
+    def dias(self, turnos):
+        return [(t.__fecha_hora__ - fecha_futura(dias=0)).days for t in turnos]
+
+    def test_por_medico_con_rango(self):
+        self.assertEqual(self.dias(self.clinica.consultar_turnos(matricula="100")), [7, 8, 9])
+        turnos = self.clinica.consultar_turnos(matricula="100", desde=fecha_futura(dias=8), hasta=fecha_futura(dias=9))
+        self.assertEqual(self.dias(turnos), [8])
+
+    def test_orden_descendente_y_limite(self):
+        self.assertEqual(self.dias(self.clinica.consultar_turnos(matricula="100", descendente=True, limite=2)), [9, 8])
+        self.assertEqual(self.dias(self.clinica.consultar_turnos(dni="11111111", limite=1)), [7])
+        self.assertEqual(self.clinica.consultar_turnos(matricula="100", desde=fecha_futura(dias=9), hasta=fecha_futura(dias=7)), [])
+
+    def test_por_paciente_y_medico(self):
+        turnos = self.clinica.consultar_turnos(matricula="100", dni="11111111", descendente=True)
+        self.assertEqual(self.dias(turnos), [9, 8])
+        self.assertEqual(self.clinica.consultar_turnos(matricula="200", dni="22222222"), [])
+
+    def test_errores(self):
+        with self.assertRaises(ValueError):
+            self.clinica.consultar_turnos()
+        with self.assertRaises(MedicoNoExisteError):
+            self.clinica.consultar_turnos(matricula="999")
+        with self.assertRaises(PacienteNoExisteError):
+            self.clinica.consultar_turnos(dni="99999999")
+
+    def test_historia_en_orden_cronologico(self):
+        historia = self.clinica.obtener_historia_clinica("11111111")
+        historia.agregar_turno_a_lista(None)
+        self.assertIsNone(historia.__turnos__[0])
+        self.assertEqual(self.dias(historia.__turnos__[1:]), [7, 8, 9])
+        self.assertEqual(self.dias(historia.iter_turnos(desde=fecha_futura(dias=0))), [7, 8, 9])
+        self.assertEqual(self.dias(historia.iter_turnos(hasta=fecha_futura(dias=9), offset=1, limit=5)), [8])
+
+class TestOcupacion(unittest.TestCase):
+
+    def setUp(self):
+        self.clinica = Clinica()
+        self.especialidad = Especialidad("Clínica Médica", list(TODOS_LOS_DIAS))
+        self.clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+        self.clinica.agregar_paciente(Paciente("22222222", "Luis Díaz", "01/01/1985"))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+        self.clinica.agregar_medico(Medico("200", "Dra. Paz", [self.especialidad]))
+        self.turnos = [
+            (fecha_futura(dias=7, hora=9), "11111111", "100", self.especialidad),
+            (fecha_futura(dias=7, hora=10), "22222222", "100", self.especialidad),
+            (fecha_futura(dias=8, hora=10), "11111111", "100", self.especialidad),
+            (fecha_futura(dias=7, hora=9), "22222222", "200", self.especialidad),
+        ]
+
+    def test_contadores_incrementales(self):
+        self.clinica.agendar_turnos_lote(self.turnos[:3])
+        self.clinica.agendar_turno(*self.turnos[3])
+        dia = fecha_futura(dias=7)
+        nombre_dia = Especialidad.DIAS_SEMANA[dia.weekday()]
+
+        self.assertEqual(self.clinica.ocupacion("100"), 3)
+        self.assertEqual(self.clinica.ocupacion("100", dia), 2)
+        self.assertEqual(self.clinica.ocupacion("100", dia.date()), 2)
+        self.assertEqual(self.clinica.ocupacion("100", nombre_dia.upper()), 2)
+        self.assertEqual(self.clinica.ocupacion("200", dia.weekday()), 1)
+        self.assertEqual(self.clinica.ocupacion_especialidad("clínica médica"), 4)
+        self.assertEqual(self.clinica.ocupacion_por_dia_semana()[nombre_dia], 3)
+        self.assertEqual(self.clinica.ocupacion_por_hora()[9:11], [2, 2])
+        self.assertEqual(self.clinica.verificar_ocupacion(), [])
+
+    def test_errores(self):
+        with self.assertRaises(MedicoNoExisteError):
+            self.clinica.ocupacion("999")
+        with self.assertRaises(ValueError):
+            self.clinica.ocupacion("100", "feriado")
+        with self.assertRaises(ValueError):
+            self.clinica.ocupacion("100", 7)
+
+    def test_verificacion_detecta_diferencias(self):
+        self.clinica.agendar_turnos_lote(self.turnos)
+        self.clinica._contadores_ocupacion().descontar("200", "Clínica Médica", self.turnos[3][0])
+        diferencias = self.clinica.verificar_ocupacion()
+        self.assertIn(("medicos", "200", 0, 1), diferencias)
+        self.assertEqual(len(diferencias), len(ContadoresOcupacion.DIMENSIONES))
+
+    def test_con_almacenamiento_se_arman_al_consultar(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "clinica.db")
+            clinica = Clinica(almacenamiento=AlmacenamientoSQLite(ruta))
+            clinica.agregar_especialidad(self.especialidad)
+            clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "01/01/1980"))
+            clinica.agregar_paciente(Paciente("22222222", "Luis Díaz", "01/01/1985"))
+            clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+            clinica.agregar_medico(Medico("200", "Dra. Paz", [self.especialidad]))
+            clinica.agendar_turnos_lote(self.turnos[:2])
+            clinica.cerrar()
+
+            restaurada = Clinica(almacenamiento=AlmacenamientoSQLite(ruta))
+            self.assertEqual(restaurada.ocupacion("100"), 2)
+            restaurada.agendar_turno(*self.turnos[2])
+            self.assertEqual(restaurada.ocupacion("100"), 3)
+            self.assertEqual(restaurada.verificar_ocupacion(), [])
+            restaurada.cerrar()
+
+@unittest.skipIf(analitica.np is None, "src.analitica requiere NumPy")
+class TestAnalitica(unittest.TestCase):
+
+    def setUp(self):
+        self.clinica = Clinica()
+        self.especialidad = Especialidad("Clínica Médica", list(TODOS_LOS_DIAS))
+        self.clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "29/02/2000"))
+        self.clinica.agregar_paciente(Paciente("22222222", "Luis Díaz", "15/06/1950"))
+        self.clinica.agregar_paciente(Paciente("33333333", "Eva Ruiz", "01/01/1990"))
+        self.clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+        self.clinica.agregar_medico(Medico("200", "Dra. Paz", [self.especialidad]))
+        self.clinica.agendar_turnos_lote([
+            (fecha_futura(dias=7, hora=9), "11111111", "100", self.especialidad),
+            (fecha_futura(dias=7, hora=10), "22222222", "100", self.especialidad, 60),
+            (fecha_futura(dias=8, hora=9), "33333333", "100", self.especialidad),
+            (fecha_futura(dias=7, hora=9), "22222222", "200", self.especialidad),
+        ])
+
+    def test_mapa_calor(self):
+        reporte = analitica.AnaliticaClinica(self.clinica)
+        mapa = reporte.mapa_calor()
+        dia = fecha_futura(dias=7).weekday()
+        self.assertEqual(mapa.shape, (7, 24))
+        self.assertEqual(mapa[dia, 9], 2)
+        self.assertEqual(mapa[(dia + 1) % 7, 9], 1)
+        self.assertEqual(reporte.mapa_calor(por_duracion=True)[dia, 10], 60)
+        self.assertEqual(mapa.sum(), len(reporte))
+
+    def test_utilizacion_y_tasas(self):
+        reporte = analitica.AnaliticaClinica(self.clinica)
+        desde = fecha_futura(dias=7, hora=0)
+        utilizacion = reporte.utilizacion_medicos(desde, desde + timedelta(days=1))
+        jornada = (Clinica.HORA_CIERRE - Clinica.HORA_APERTURA) * 60
+        self.assertAlmostEqual(utilizacion["100"], 90 / jornada)
+        self.assertAlmostEqual(utilizacion["200"], 30 / jornada)
+        self.assertEqual(reporte.tasas_por_medico([True, False, False, True]), {"100": 1 / 3, "200": 1.0})
+        with self.assertRaises(ValueError):
+            reporte.tasas_por_medico([True])
+
+    def test_edades_igual_a_calcular_edad(self):
+        reporte = analitica.AnaliticaClinica(self.clinica)
+        for hoy in (date(2026, 2, 28), date(2026, 3, 1), date(2028, 2, 29)):
+            esperadas = sorted(p.calcular_edad(hoy) for p in self.clinica.__pacientes__.values())
+            self.assertEqual(sorted(reporte.edades(hoy).tolist()), esperadas)
+        cantidades, _ = reporte.distribucion_edades((0, 30, 60, 130), date(2026, 10, 17))
+        self.assertEqual(cantidades.tolist(), [1, 1, 1])
+
+    def test_almacen_columnar(self):
+        clinica = Clinica(almacen_turnos=AlmacenTurnosColumnar())
+        clinica.agregar_paciente(Paciente("11111111", "Ana Gómez", "29/02/2000"))
+        clinica.agregar_medico(Medico("100", "Dr. Sosa", [self.especialidad]))
+        clinica.agendar_turno(fecha_futura(dias=7, hora=9), "11111111", "100", self.especialidad)
+        columnar = analitica.AnaliticaClinica(clinica).mapa_calor()
+        self.assertEqual(columnar[fecha_futura(dias=7).weekday(), 9], 1)
+        self.assertEqual(columnar.sum(), 1)
+
 class TestCLI(unittest.TestCase):
 
     def setUp(self):
@@ -1280,12 +2663,28 @@ class TestCLI(unittest.TestCase):
     @patch("builtins.print")
     def test_ver_todos_los_turnos(self, mock_print):
         turnos_mock = ["Turno 1", "Turno 2"]
-        with patch("src.clinica.Clinica.obtener_turnos", return_value=turnos_mock):
+        with patch("src.clinica.Clinica.iter_turnos", return_value=turnos_mock):
             self.cli.ver_todos_los_turnos()
             mock_print.assert_any_call("\n--- TODOS LOS TURNOS ---")
             mock_print.assert_any_call("1. Turno 1")
             mock_print.assert_any_call("2. Turno 2")
 
+    @patch("builtins.input", side_effect=["", "q"])
+    @patch("builtins.print")
+    def test_ver_todos_los_turnos_paginado(self, mock_print, mock_input):
+        turnos = [f"Turno {i}" for i in range(1, 51)]
+        with patch("src.clinica.Clinica.iter_turnos", side_effect=lambda offset, limit: turnos[offset:offset + limit]):
+            self.cli.ver_todos_los_turnos()
+        mock_print.assert_any_call("20. Turno 20")
+        mock_print.assert_any_call("40. Turno 40")
+        self.assertNotIn(unittest.mock.call("41. Turno 41"), mock_print.call_args_list)
+        self.assertEqual(mock_input.call_count, 2)
+
+    @patch("builtins.print")
+    def test_ver_todos_los_turnos_sin_turnos(self, mock_print):
+        self.cli.ver_todos_los_turnos()
+        mock_print.assert_any_call("No hay turnos registrados")
+
     @patch("builtins.print")
     def test_ver_todos_los_medicos(self, mock_print):
         medicos_mock = ["Dr. Ana Gómez", "Dr. Juan Pérez"]